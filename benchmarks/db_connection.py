@@ -0,0 +1,72 @@
+"""Compare results-database connection strategies.
+
+Runs the same insert/select workload against:
+
+* ``per_call``: a fresh ``sqlite3.connect`` per operation (the previous behaviour)
+* ``pooled``: a thread-local ``ConnectionManager`` connection with WAL pragmas
+* ``staged``: a pooled connection on a local-disk copy synced back on close
+
+Usage::
+
+    python benchmarks/db_connection.py --db /dbfs/Workspace/Shared/bench.db --ops 500
+"""
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+from dbx_tester.db.init import ConnectionManager
+
+CREATE = "CREATE TABLE IF NOT EXISTS bench (id INTEGER PRIMARY KEY, name TEXT, payload TEXT)"
+INSERT = "INSERT INTO bench (name, payload) VALUES (?, ?)"
+SELECT = "SELECT COUNT(*) FROM bench WHERE name = ?"
+
+
+def _workload(get_conn, release, ops):
+    for i in range(ops):
+        conn = get_conn()
+        conn.execute(INSERT, (f"test_{i % 50}", "x" * 256))
+        conn.commit()
+        conn.execute(SELECT, (f"test_{i % 50}",)).fetchone()
+        release(conn)
+
+
+def bench_per_call(db_path, ops):
+    conn = sqlite3.connect(db_path)
+    conn.execute(CREATE)
+    conn.close()
+    _workload(lambda: sqlite3.connect(db_path), lambda conn: conn.close(), ops)
+
+
+def bench_manager(db_path, ops, staged):
+    manager = ConnectionManager(db_path=db_path, staged=staged, sync_interval=0)
+    manager.connection().execute(CREATE)
+    _workload(manager.connection, lambda conn: None, ops)
+    manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="/tmp/dbx_tester_bench/bench.db")
+    parser.add_argument("--ops", type=int, default=500)
+    args = parser.parse_args()
+
+    base = Path(args.db)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    cases = {
+        "per_call": lambda path: bench_per_call(path, args.ops),
+        "pooled": lambda path: bench_manager(path, args.ops, staged=False),
+        "staged": lambda path: bench_manager(path, args.ops, staged=True),
+    }
+    for name, case in cases.items():
+        path = base.with_name(f"{base.stem}_{name}{base.suffix}")
+        for stale in path.parent.glob(f"{path.name}*"):
+            stale.unlink()
+        start = time.perf_counter()
+        case(path)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>9}: {elapsed:8.3f}s  {args.ops / elapsed:10.1f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
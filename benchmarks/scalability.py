@@ -0,0 +1,270 @@
+"""Scalability of discovery, graph build and scheduling against the fake workspace.
+
+Every workload defines ``--sizes`` tests in modules of ``--tests-per-module``
+and drives the framework through the in-memory ``FakeBackend``:
+
+* ``flat``: tests without dependencies
+* ``deep``: every test depends on a chain of ``--depth`` notebooks
+* ``wide``: every test depends on ``--width`` independent notebooks
+* ``task_values``: every test sets ``--task-values`` task values
+
+Each workload is measured in three phases:
+
+* ``define``: decorating the tests and flushing the deferred registry (graph build and upload)
+* ``discover``: ``NotebookTestRunner`` reading the config file and finding the cached tests
+* ``schedule``: submitting the cached tests and waiting for every run (makespan)
+
+plus a ``config`` phase reading a config file with as many entries as tests.
+Phases report wall time, API calls per test and peak traced memory; results
+are written as JSON and can be compared against a previous file.
+
+Usage::
+
+    python benchmarks/scalability.py --sizes 10 100 1000 10000 --output bench.json
+    python benchmarks/scalability.py --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import dbx_tester.notebook as notebook_module
+from dbx_tester.config_manager import NotebookConfigManager
+from dbx_tester.global_config import CONFIG_SNAPSHOT_PARAM, GlobalConfig, GlobalConfigManager
+from dbx_tester.notebook import Notebook, NotebookTest, NotebookTestRunner, defer_registration, flush
+from dbx_tester.retry import RetryPolicy, RunRetrier
+from dbx_tester.utils.admission import configure_admission
+from dbx_tester.utils.backend import set_backend
+from dbx_tester.utils.fake_backend import FakeBackend
+
+SHAPES = ("flat", "deep", "wide", "task_values")
+# Rate limits high enough that only the framework's own overhead is measured
+UNLIMITED_RATES = {"workspace": (1e9, 1e9), "jobs": (1e9, 1e9)}
+# Slowdowns smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_SECONDS = 0.05
+
+
+def _measure(backend, fn):
+    """Run fn, returning its result with wall time, API calls and peak memory."""
+    calls = backend.total_calls()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {
+        "seconds": round(elapsed, 4),
+        "api_calls": backend.total_calls() - calls,
+        "peak_mb": round(peak / 2**20, 3),
+    }
+
+
+def _write_config(path, test_path, repo_path, entries):
+    """Config file holding the benchmark's entry after ``entries`` unrelated ones."""
+    config = {"dbx_tester": "v1"}
+    for i in range(entries):
+        other = f"/Workspace/Repos/team_{i}/tests"
+        config[other] = GlobalConfig(TEST_PATH=other, CLUSTER_ID=f"cluster-{i}").to_dict()
+    config[test_path] = GlobalConfig(TEST_PATH=test_path, CLUSTER_ID="bench-cluster", REPO_PATH=repo_path).to_dict()
+    path.write_text(json.dumps(config, indent=4, sort_keys=True))
+
+
+def _dependencies(shape, args, test_id):
+    """Dependency notebooks of one test."""
+    if shape == "deep":
+        upstream = None
+        for level in range(args.depth):
+            upstream = Notebook(f"src/setup_{level}", task_name=f"{test_id}_setup_{level}", depends_on=upstream)
+        return upstream
+    if shape == "wide":
+        return [Notebook(f"src/setup_{i}", task_name=f"{test_id}_setup_{i}") for i in range(args.width)]
+    return None
+
+
+def _config(shape, args):
+    if shape != "task_values":
+        return None
+    config = NotebookConfigManager()
+    for i in range(args.task_values):
+        config.add_task_value(f"upstream_{i % 5}", f"key_{i}", str(i))
+    return config
+
+
+def _define(backend, shape, size, args, test_path):
+    """Define every test module the way a test notebook run would."""
+    modules = (size + args.tests_per_module - 1) // args.tests_per_module
+    defined = 0
+    for module in range(modules):
+        module_path = test_path / f"test_module_{module}"
+        backend.add_notebook(module_path.as_posix())
+        backend.current_notebook = module_path
+        # Every test notebook runs in its own interpreter, with a fresh registry
+        notebook_module._registry = None
+        defer_registration()
+        for _ in range(min(args.tests_per_module, size - defined)):
+            test_id = f"test_{defined}"
+
+            def body():
+                pass
+
+            body.__name__ = test_id
+            notebook = Notebook(
+                "src/target",
+                task_name=f"{test_id}_main",
+                config=_config(shape, args),
+                depends_on=_dependencies(shape, args, test_id)
+            )
+            NotebookTest(notebook=notebook)(body)
+            defined += 1
+        flush()
+    return defined
+
+
+def _schedule(runner, args):
+    """Submit every cached test and wait for all runs, as NotebookTestRunner.run does."""
+    run_ids = []
+    tasks = 0
+    for cached_test in runner.test_cache:
+        for submission in runner._create_cached_test_submissions(cached_test, runner._load_setup(cached_test)):
+            tasks += len(submission.tasks)
+            run_ids.append(submission.run().run_id)
+    retrier = RunRetrier(RetryPolicy(max_attempts=1), poll_interval=args.poll_interval)
+    results = retrier.watch(run_ids)
+    return {
+        "runs": len(run_ids),
+        "tasks": tasks,
+        "failed": sum(result != "SUCCESS" for result in results.values()),
+    }
+
+
+def run_workload(shape, size, args, workdir):
+    root = Path(tempfile.mkdtemp(prefix=f"{shape}_{size}_", dir=workdir))
+    test_path, repo_path = root / "tests", root / "repo"
+    test_path.mkdir()
+    config_path = root / "dbx_tester_cfg.json"
+    _write_config(config_path, test_path.as_posix(), repo_path.as_posix(), args.config_entries)
+    GlobalConfigManager.DEFAULT_CONFIG_PATH = config_path
+
+    snapshot = GlobalConfig(TEST_PATH=test_path.as_posix(), CLUSTER_ID="bench-cluster", REPO_PATH=repo_path.as_posix())
+    backend = FakeBackend(params={CONFIG_SNAPSHOT_PARAM: snapshot.to_snapshot()}, task_duration=args.task_duration)
+    for name in ["target", *(f"setup_{i}" for i in range(max(args.depth, args.width)))]:
+        backend.add_notebook((repo_path / "src" / name).as_posix())
+    previous = set_backend(backend)
+    configure_admission(rates=UNLIMITED_RATES, max_active_runs=args.max_active_runs, reap_interval=args.poll_interval)
+
+    rows = []
+    try:
+        defined, metrics = _measure(backend, lambda: _define(backend, shape, size, args, test_path))
+        metrics["uploads"] = backend.calls["workspace.import_"]
+        rows.append({"phase": "define", **metrics})
+
+        runner, metrics = _measure(backend, lambda: NotebookTestRunner(test_path.as_posix()))
+        metrics["cached_tests"] = len(runner.test_cache)
+        rows.append({"phase": "discover", **metrics})
+
+        schedule, metrics = _measure(backend, lambda: _schedule(runner, args))
+        rows.append({"phase": "schedule", "makespan_s": metrics["seconds"], **schedule, **metrics})
+    finally:
+        set_backend(previous)
+
+    for row in rows:
+        row.update(shape=shape, tests=defined, api_calls_per_test=round(row["api_calls"] / defined, 3))
+    return rows
+
+
+def run_config(size, workdir):
+    """Reading a config file with ``size`` entries."""
+    root = Path(tempfile.mkdtemp(prefix=f"config_{size}_", dir=workdir))
+    test_path = (root / "tests").as_posix()
+    config_path = root / "dbx_tester_cfg.json"
+    _write_config(config_path, test_path, None, size)
+    backend = FakeBackend(notebook_path=f"{test_path}/test_module_0")
+    previous = set_backend(backend)
+    try:
+        def load():
+            manager = GlobalConfigManager(config_path)
+            manager._load_config()
+            manager._load_config_from_test_path(test_path)
+            return len(manager.list_configurations())
+
+        entries, metrics = _measure(backend, load)
+    finally:
+        set_backend(previous)
+    return [{"phase": "config", "shape": "config", "tests": size, "entries": entries, **metrics}]
+
+
+def compare(results, baseline, tolerance):
+    """Print time ratios against a baseline, returning the regressed rows."""
+    previous = {(row["shape"], row["tests"], row["phase"]): row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        old = previous.get((row["shape"], row["tests"], row["phase"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = row["seconds"] / old["seconds"]
+        flag = ""
+        if ratio > 1 + tolerance and row["seconds"] - old["seconds"] > NOISE_FLOOR_SECONDS:
+            regressions.append(row)
+            flag = "  REGRESSION"
+        print(f"{row['shape']:>12} {row['tests']:>6} {row['phase']:>9}: {old['seconds']:9.3f}s -> {row['seconds']:9.3f}s  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--tests-per-module", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--width", type=int, default=5)
+    parser.add_argument("--task-values", type=int, default=50)
+    parser.add_argument("--config-entries", type=int, default=100, help="unrelated entries in the config file")
+    parser.add_argument("--task-duration", type=float, default=0.01, help="simulated seconds per task")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--max-active-runs", type=int, default=100)
+    parser.add_argument("--workdir", default=None, help="directory for the simulated workspace files")
+    parser.add_argument("--output", default="scalability.json")
+    parser.add_argument("--baseline", default=None, help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    logging.getLogger("dbx_tester").setLevel(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for size in args.sizes:
+            results.extend(run_config(size, workdir))
+            for shape in args.shapes:
+                rows = run_workload(shape, size, args, workdir)
+                for row in rows:
+                    print(
+                        f"{shape:>12} {size:>6} {row['phase']:>9}: {row['seconds']:9.3f}s"
+                        f"  {row['api_calls_per_test']:7.2f} calls/test  {row['peak_mb']:9.1f} MB"
+                    )
+                results.extend(rows)
+
+    parameters = {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "workdir")}
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""Command line entry point, ``dbx-tester``.
+
+Drives ``NotebookTestRunner`` from outside the workspace, e.g. in CI::
+
+    dbx-tester run --test-path /Workspace/Repos/me/project/tests --jobs 20 --shard 1/4
+    dbx-tester run --test-path ... -k orders --changed-since origin/main --timeout 3600
+    dbx-tester run --test-path ... --junit-xml report.xml --jsonl results.jsonl --record-results --progress
+    dbx-tester plan --test-path ... --json
+    dbx-tester list --test-path ... --static
+    dbx-tester gc --test-path ... --dry-run
+
+Exit status: 0 when every selected test passed, 1 when a test failed, 2 on
+usage, configuration or workspace errors, 3 when the run timed out and 5 when no test
+was selected.
+"""
+from dbx_tester.global_config import CONFIG_SNAPSHOT_ENV, ConfigurationError, GlobalConfig, GlobalConfigManager
+from dbx_tester.notebook import NotebookTestRunner, NotebookValidationError
+from dbx_tester.outcome import NotebookTestOutcome
+from dbx_tester.reporting import JsonLinesReporter, ProgressReporter, Reporter, expected_durations
+from dbx_tester.retry import RetryPolicy
+from dbx_tester.scanner import NotebookScanner
+from dbx_tester.utils.admission import configure_admission
+from dbx_tester.utils.databricks_api import (
+    delete_job,
+    delete_workspace_path,
+    has_active_runs,
+    list_tagged_jobs,
+    read_workspace_file,
+    submit_run
+)
+
+from databricks.sdk.service.workspace import ObjectType
+
+from pathlib import Path
+from collections.abc import Callable
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_ERROR = 2
+EXIT_TIMEOUT = 3
+EXIT_NO_TESTS = 5
+
+# Suffixes of local notebook sources, stripped to match workspace paths
+NOTEBOOK_SUFFIXES = (".py", ".ipynb", ".sql", ".scala", ".r")
+
+
+class CommandLineError(ValueError):
+    pass
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse ``i/n`` into a 1-based shard index and a shard count."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def in_shard(notebook_id: str, index: int, count: int) -> bool:
+    """Whether a test notebook belongs to a shard.
+
+    Shards are assigned per test notebook from a stable hash, so a notebook's
+    tests and shared setup always land on the same shard and the assignment
+    does not move when other notebooks are added.
+    """
+    digest = hashlib.sha1(notebook_id.encode("utf-8")).hexdigest()
+    return int(digest, 16) % count == index - 1
+
+
+def keyword_filter(keywords: Sequence[str]) -> Callable[[str], bool]:
+    """Case-insensitive substring match against any of the keywords."""
+    keywords = [keyword.lower() for keyword in keywords]
+    return lambda test_id: any(keyword in test_id.lower() for keyword in keywords)
+
+
+def _git(*args: str) -> List[str]:
+    try:
+        output = subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise CommandLineError(f"git {' '.join(args)} failed: {getattr(e, 'stderr', None) or e}")
+    return [line for line in output.splitlines() if line]
+
+
+def _strip_suffix(path: str) -> str:
+    return path[:-len(Path(path).suffix)] if Path(path).suffix.lower() in NOTEBOOK_SUFFIXES else path
+
+
+def changed_filter(ref: str, config: GlobalConfig) -> Callable[[str], bool]:
+    """Select test notebooks affected by the local changes since a git ref.
+
+    A test notebook is selected when it changed itself or when its local
+    source mentions the repo-relative path of a changed file, the way
+    ``Notebook("src/orders")`` refers to ``src/orders.py``.
+    """
+    if config.REPO_PATH is None or not Path(config.TEST_PATH).is_relative_to(Path(config.REPO_PATH)):
+        raise CommandLineError("--changed-since needs a TEST_PATH inside the configured REPO_PATH")
+    root = Path(_git("rev-parse", "--show-toplevel")[0])
+    changed = {
+        _strip_suffix(path)
+        for path in _git("diff", "--name-only", ref) + _git("ls-files", "--others", "--exclude-standard")
+    }
+    test_dir = Path(config.TEST_PATH).relative_to(Path(config.REPO_PATH)).as_posix()
+    test_prefix = "" if test_dir == "." else f"{test_dir}/"
+    dependencies = [path for path in changed if not path.startswith(test_prefix)]
+    logger.info(f"{len(changed)} files changed since {ref}")
+
+    def source(notebook_path: str) -> str:
+        for suffix in ("", *NOTEBOOK_SUFFIXES):
+            local = root / f"{notebook_path}{suffix}"
+            if local.is_file():
+                return local.read_text(errors="ignore")
+        return ""
+
+    def predicate(notebook_id: str) -> bool:
+        notebook_path = f"{test_prefix}{notebook_id}"
+        if notebook_path in changed:
+            return True
+        text = source(notebook_path)
+        return any(path in text for path in dependencies)
+
+    return predicate
+
+
+def resolve_config(test_path: str, config_path: Optional[str]) -> GlobalConfig:
+    """Configuration entry of the test path, exported as a snapshot for the runner."""
+    if os.environ.get(CONFIG_SNAPSHOT_ENV):
+        config = GlobalConfig.from_snapshot(os.environ[CONFIG_SNAPSHOT_ENV])
+        if config.TEST_PATH == test_path:
+            return config
+    path = config_path or GlobalConfigManager.DEFAULT_CONFIG_PATH.as_posix()
+    try:
+        entry = json.loads(read_workspace_file(path)).get(test_path)
+    except Exception as e:
+        raise CommandLineError(f"Unable to read configuration {path}: {e}")
+    if entry is None:
+        raise CommandLineError(f"Configuration not found for test path: {test_path}")
+    config = GlobalConfig.from_dict(entry)
+    os.environ[CONFIG_SNAPSHOT_ENV] = config.to_snapshot()
+    return config
+
+
+def _notebook_filter(args: argparse.Namespace, config: Optional[GlobalConfig]) -> Optional[Callable[[str], bool]]:
+    filters = []
+    if getattr(args, "shard", None):
+        index, count = args.shard
+        filters.append(lambda notebook_id: in_shard(notebook_id, index, count))
+    if getattr(args, "changed_since", None):
+        filters.append(changed_filter(args.changed_since, config or resolve_config(args.test_path, args.config)))
+    return (lambda notebook_id: all(f(notebook_id) for f in filters)) if filters else None
+
+
+def _test_filter(args: argparse.Namespace) -> Optional[Callable[[str], bool]]:
+    return keyword_filter(args.keyword) if getattr(args, "keyword", None) else None
+
+
+def _runner(
+    args: argparse.Namespace, 
+    submit_definitions: bool = False, 
+    reporters: Optional[List[Reporter]] = None
+) -> NotebookTestRunner:
+    config = resolve_config(args.test_path, args.config)
+    return NotebookTestRunner(
+        args.test_path,
+        retry_policy=RetryPolicy(max_attempts=getattr(args, "retries", 0) + 1),
+        notebook_filter=_notebook_filter(args, config),
+        test_filter=_test_filter(args),
+        submit_definitions=submit_definitions,
+        junit_path=getattr(args, "junit_xml", None),
+        record_results=getattr(args, "record_results", False),
+        reporters=reporters
+    )
+
+
+def _print(args: argparse.Namespace, payload: Any, lines: List[str]) -> None:
+    if args.json:
+        print(json.dumps(payload, indent=2, default=str))
+    else:
+        for line in lines:
+            print(line)
+
+
+class _OutcomeRows(Reporter):
+    """Output rows of the run command, one per outcome."""
+
+    def __init__(self):
+        self.rows: List[Dict[str, Any]] = []
+
+    def test_finished(self, outcome: NotebookTestOutcome) -> None:
+        self.rows.append({
+            "test": outcome.test_id, 
+            "run_id": outcome.run_id, 
+            "task": outcome.task_key, 
+            "result": outcome.status,
+            "message": outcome.message,
+            "duration_seconds": outcome.duration_seconds,
+            "metrics": outcome.metrics
+        })
+
+
+def _run(args: argparse.Namespace) -> int:
+    reported = _OutcomeRows()
+    reporters: List[Reporter] = [reported]
+    if args.jsonl:
+        reporters.append(JsonLinesReporter(args.jsonl))
+    if args.progress:
+        # History only comes from the results database when it is in use
+        expected = expected_durations(Path(args.test_path).as_posix()) if args.record_results else None
+        reporters.append(ProgressReporter(expected))
+    runner = _runner(args, submit_definitions=True, reporters=reporters)
+    if not runner.tests:
+        logger.error("No test notebooks selected")
+        return EXIT_NO_TESTS
+    runner.run(timeout=args.timeout)
+
+    outcomes = [
+        {"test": runner.notebook_id(notebook), "run_id": None, "result": "DEFINITION_FAILED"}
+        for notebook in runner.failed_definitions
+    ]
+    outcomes += sorted(reported.rows, key=lambda row: (row["test"], row["task"] or ""))
+    # Runs without reported outcomes, e.g. with no main task, keep their run result
+    reported_runs = {row["run_id"] for row in reported.rows}
+    outcomes += [
+        {"test": runner.test_id(cached_test), "run_id": run_id, "result": runner.results.get(run_id, "UNKNOWN")}
+        for run_id, cached_test in runner.run_tests.items() if run_id not in reported_runs
+    ]
+    if not outcomes:
+        logger.error("No tests found in the selected test notebooks")
+        return EXIT_NO_TESTS
+    _print(args, outcomes, [
+        f"{row['result']:<18} {row['test']}" + (f"  {row['message'].splitlines()[0]}" if row.get("message") else "")
+        for row in outcomes
+    ])
+
+    if "TIMEDOUT" in runner.results.values():
+        return EXIT_TIMEOUT
+    return EXIT_OK if {row["result"] for row in outcomes} == {"SUCCESS"} else EXIT_FAILED
+
+
+def _plan(args: argparse.Namespace) -> int:
+    runner = _runner(args)
+    submissions = [
+        submission
+        for cached_test in runner.test_cache
+        for submission in runner._create_cached_test_submissions(cached_test, runner._load_setup(cached_test))
+    ]
+    if not submissions:
+        return EXIT_NO_TESTS
+    _print(
+        args,
+        [submission.as_dict() for submission in submissions],
+        [f"{submission.name}: {len(submission.tasks)} tasks" for submission in submissions]
+    )
+    return EXIT_OK
+
+
+def _list(args: argparse.Namespace) -> int:
+    if args.static:
+        return _list_static(args)
+    runner = _runner(args)
+    tests = [runner.test_id(cached_test) for cached_test in runner.test_cache]
+    if not tests:
+        return EXIT_NO_TESTS
+    _print(args, tests, tests)
+    return EXIT_OK
+
+
+def _list_static(args: argparse.Namespace) -> int:
+    """Inventory from the test notebook sources, without the test cache or a config entry."""
+    scanner = NotebookScanner(args.test_path)
+    test_filter = _test_filter(args)
+    tests = [
+        test for test in scanner.scan(notebook_filter=_notebook_filter(args, None))
+        if test_filter is None or test_filter(test.test_id)
+    ]
+    _print(args, [test.to_dict() for test in tests], [test.test_id for test in tests])
+    for notebook_id, error in scanner.errors.items():
+        logger.error(f"Unable to scan {notebook_id}: {error}")
+    if scanner.errors:
+        return EXIT_ERROR
+    return EXIT_OK if tests else EXIT_NO_TESTS
+
+
+def _gc(args: argparse.Namespace) -> int:
+    runner = _runner(args)
+    notebooks = {
+        runner.notebook_id(notebook) for notebook in runner._notebooks(runner.test_path)
+        if "_test_cache" not in notebook.parts
+    }
+    stale = []
+    for path, object_type in sorted(runner.objects.items()):
+        path = Path(path)
+        if object_type != ObjectType.DIRECTORY or path.parent.name != "_test_cache":
+            continue
+        # <test cache>/<folders>/_test_cache/<test notebook>
+        relative = path.relative_to(runner.test_cache_path)
+        if (relative.parent.parent / relative.name).as_posix() not in notebooks:
+            stale.append(path.as_posix())
+
+    # Younger transient jobs may belong to a run that has not started them yet
+    created_before = int((time.time() - args.grace_minutes * 60) * 1000)
+    jobs = [
+        job_id for job_id in list_tagged_jobs(submit_run.TRANSIENT_JOB_TAG, created_before=created_before)
+        if not has_active_runs(job_id)
+    ]
+    if not args.dry_run:
+        for path in stale:
+            delete_workspace_path(path, recursive=True)
+        for job_id in jobs:
+            delete_job(job_id)
+
+    _print(
+        args,
+        {"cache": stale, "jobs": jobs, "deleted": not args.dry_run},
+        [f"cache {path}" for path in stale] + [f"job {job_id}" for job_id in jobs]
+    )
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="dbx-tester", description="Run Databricks notebook tests.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--test-path", required=True, help="workspace test path of a configuration entry")
+    common.add_argument("--config", default=None, help="workspace path of the configuration file")
+    common.add_argument("--json", action="store_true", help="print machine readable output")
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument("-k", dest="keyword", action="append", default=[], help="select tests whose ID contains the keyword; repeatable")
+    selection.add_argument("--shard", type=parse_shard, default=None, help="run shard i of n, e.g. 2/4")
+    selection.add_argument("--changed-since", default=None, metavar="REF", help="select tests affected by changes since a git ref")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", parents=[common, selection], help="run the selected tests")
+    run.add_argument("--jobs", type=int, default=None, help="maximum concurrently active runs")
+    run.add_argument("--timeout", type=float, default=None, help="seconds before unfinished runs are cancelled")
+    run.add_argument("--retries", type=int, default=0, help="repairs of failed tasks per run")
+    run.add_argument("--junit-xml", default=None, metavar="PATH", help="write the test outcomes as a JUnit XML report")
+    run.add_argument("--record-results", action="store_true", help="add the test outcomes to the results database")
+    run.add_argument("--jsonl", default=None, metavar="PATH", help="append each test outcome to a JSON lines file as it finishes")
+    run.add_argument(
+        "--progress", action="store_true",
+        help="print a progress line with throughput and ETA; the ETA uses past durations with --record-results"
+    )
+    run.set_defaults(handler=_run)
+    plan = commands.add_parser("plan", parents=[common, selection], help="print the submissions without running them")
+    plan.set_defaults(handler=_plan)
+    list_ = commands.add_parser("list", parents=[common, selection], help="print the selected test IDs")
+    list_.add_argument("--static", action="store_true", help="parse the test notebooks instead of reading the test cache")
+    list_.set_defaults(handler=_list)
+    gc = commands.add_parser("gc", parents=[common], help="delete orphaned test cache and transient jobs")
+    gc.add_argument("--dry-run", action="store_true", help="only print what would be deleted")
+    gc.add_argument(
+        "--grace-minutes", type=float, default=60.0,
+        help="only delete transient jobs created at least this long ago (default: 60)"
+    )
+    gc.set_defaults(handler=_gc)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if getattr(args, "jobs", None):
+        configure_admission(max_active_runs=args.jobs)
+    try:
+        return args.handler(args)
+    except (CommandLineError, ConfigurationError, NotebookValidationError) as e:
+        logger.error(str(e))
+        return EXIT_ERROR
+    except Exception as e:
+        # Keep tool and workspace errors apart from failed tests
+        logger.exception(f"dbx-tester {args.command} failed: {e}")
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,11 @@
 from dbx_tester.utils.databricks_api import notebook_builder
-from dataclasses import dataclass
-from typing import Any, Dict, List
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import json
+
+
+# Base parameter carrying the JSON task values a stub task sets
+TASK_VALUES_PARAM = "dbx_tester_task_values"
 
 
 @dataclass
@@ -41,6 +46,61 @@ class RunParameter:
     value: Any
 
 
+@dataclass
+class JobClusterConfig:
+    """Represents a job cluster shared by the tasks of a test submission.
+    
+    Either ``node_type_id`` or ``instance_pool_id`` should be set; drawing
+    nodes from an instance pool amortizes cluster start-up across test runs.
+    
+    Attributes:
+        spark_version: The Databricks runtime version of the cluster.
+        key: The job cluster key tasks refer to.
+        num_workers: Fixed number of workers, ignored when autoscaling.
+        node_type_id: The node type of the cluster.
+        instance_pool_id: Instance pool to draw worker nodes from.
+        driver_instance_pool_id: Instance pool for the driver, defaults to
+            the worker pool.
+        policy_id: Cluster policy applied to the cluster.
+        min_workers: Lower autoscaling bound, enables autoscaling with max_workers.
+        max_workers: Upper autoscaling bound.
+        spark_conf: Additional Spark configuration.
+    """
+    spark_version: str
+    key: str = "dbx_tester_cluster"
+    num_workers: int = 1
+    node_type_id: Optional[str] = None
+    instance_pool_id: Optional[str] = None
+    driver_instance_pool_id: Optional[str] = None
+    policy_id: Optional[str] = None
+    min_workers: Optional[int] = None
+    max_workers: Optional[int] = None
+    spark_conf: Dict[str, str] = field(default_factory=dict)
+
+    def to_cluster_spec(self) -> Dict[str, Any]:
+        """Generates the Jobs API cluster specification.
+        
+        Returns:
+            A dictionary suitable for a job cluster's new_cluster field.
+        """
+        spec: Dict[str, Any] = {"spark_version": self.spark_version}
+        if self.min_workers is not None and self.max_workers is not None:
+            spec["autoscale"] = {"min_workers": self.min_workers, "max_workers": self.max_workers}
+        else:
+            spec["num_workers"] = self.num_workers
+        if self.instance_pool_id is not None:
+            spec["instance_pool_id"] = self.instance_pool_id
+            spec["driver_instance_pool_id"] = self.driver_instance_pool_id or self.instance_pool_id
+        elif self.node_type_id is not None:
+            spec["node_type_id"] = self.node_type_id
+        if self.policy_id is not None:
+            spec["policy_id"] = self.policy_id
+            spec["apply_policy_default_values"] = True
+        if self.spark_conf:
+            spec["spark_conf"] = dict(self.spark_conf)
+        return spec
+
+
 class NotebookConfigManager:
     """Manages notebook configuration including widgets and task values."""
     
@@ -134,28 +194,41 @@ class NotebookConfigManager:
         
         return "\n".join(lines) + "\n"
     
-    def create_task_notebooks(self) -> Dict[str, Any]:
-        """Creates tasks and returns a dictionary of notebooks.
+    def task_value_parameters(self) -> Dict[str, Dict[str, str]]:
+        """Returns the stub notebook parameters for every task key.
+        
+        All task value tasks run the same stub notebook (see
+        ``create_task_value_stub``); the values each task sets are passed as
+        JSON in the ``TASK_VALUES_PARAM`` base parameter.
         
         Returns:
-            A dictionary with task keys and their corresponding notebooks.
+            A dictionary with task keys and their base parameters.
         """
-        notebooks = {}
-        
+        values: Dict[str, Dict[str, str]] = {}
         for task_value in self._task_values:
-            task_key = task_value.task_key
-            
-            if task_key not in notebooks:
-                notebooks[task_key] = notebook_builder(task_key)
-            
-            cell_content = (
-                f"dbutils.jobs.taskValues.set("
-                f"key='{task_value.key}', "
-                f"value='{task_value.value}')"
-            )
-            notebooks[task_key].add_cell(cell_content)
-        
-        return notebooks
+            values.setdefault(task_value.task_key, {})[task_value.key] = task_value.value
+        
+        return {
+            task_key: {TASK_VALUES_PARAM: json.dumps(task_values, separators=(',', ':'))}
+            for task_key, task_values in values.items()
+        }
+
+
+def create_task_value_stub() -> notebook_builder:
+    """Creates the generic notebook that sets task values from its parameters.
+    
+    Returns:
+        A notebook setting every key/value pair of the ``TASK_VALUES_PARAM``
+        JSON widget as a task value.
+    """
+    stub = notebook_builder("task_values")
+    stub.add_cell(
+        "import json\n"
+        f"dbutils.widgets.text('{TASK_VALUES_PARAM}', '{{}}')\n"
+        f"for key, value in json.loads(dbutils.widgets.get('{TASK_VALUES_PARAM}')).items():\n"
+        "    dbutils.jobs.taskValues.set(key=key, value=value)"
+    )
+    return stub
 
 
 class JobConfigManager:
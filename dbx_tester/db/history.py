@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta, timezone
+import itertools
+import math
+
+from dbx_tester.db.init import db_conn
+
+
+class HistoryError(Exception):
+    pass
+
+# Test kind -> (test table, status table)
+TABLES = {
+    "notebook": ("notebook_test", "notebook_test_status"),
+    "job": ("job_test", "job_test_status"),
+}
+
+PASSED = "SUCCESS"
+FAILED = "FAILED"
+
+DURATION_MS = "(julianday(ends_at) - julianday(created_at)) * 86400000.0"
+
+
+def _tables(kind):
+    try:
+        return TABLES[kind]
+    except KeyError:
+        raise HistoryError(f"Unknown test kind: {kind}")
+
+def _cutoff(window):
+    """Convert a lookback window into a CURRENT_TIMESTAMP-comparable string."""
+    if window is None:
+        return None
+    if isinstance(window, timedelta):
+        window = datetime.now(timezone.utc) - window
+    return window.strftime("%Y-%m-%d %H:%M:%S")
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latest_status(kind, test_dir):
+    """Latest status row for every test in ``test_dir``.
+
+    Each lookup is a single descent of the ``(test_id, created_at)`` index,
+    so the cost grows with the number of tests, not the history length.
+    """
+    test_table, status_table = _tables(kind)
+    conn, cursor = db_conn()
+    try:
+        query = f"""
+        SELECT t.test_id, t.test_path, t.test_name, s.status, s.error, s.created_at, s.ends_at
+        FROM {test_table} t
+        JOIN {status_table} s ON s.status_id = (
+            SELECT status_id FROM {status_table}
+            WHERE test_id = t.test_id
+            ORDER BY created_at DESC, status_id DESC
+            LIMIT 1
+        )
+        WHERE t.test_dir=? """
+        cursor.execute(query, (test_dir,))
+        return [
+            {
+                "test_id": result[0],
+                "test_path": result[1],
+                "test_name": result[2],
+                "status": result[3],
+                "error": result[4],
+                "created_at": result[5],
+                "ends_at": result[6],
+            }
+            for result in cursor.fetchall()
+        ]
+    except Exception as e:
+        raise HistoryError(f"Error fetching latest status: {e}")
+    finally:
+        cursor.close()
+
+def pass_rates(kind, window=timedelta(days=7), test_id=None):
+    """Run, pass and fail counts per test within the lookback ``window``.
+
+    Args:
+        kind: "notebook" or "job".
+        window: A timedelta lookback or an absolute UTC datetime cutoff.
+        test_id: Optionally restrict to a single test.
+
+    Returns:
+        Dictionary mapping test_id to counts and the pass rate.
+    """
+    _, status_table = _tables(kind)
+    conn, cursor = db_conn()
+    try:
+        # "+test_id" keeps the planner on the created_at range instead of
+        # walking the whole (test_id, created_at) index to satisfy GROUP BY
+        query = f"""
+        SELECT test_id, COUNT(*), SUM(status = ?), SUM(status = ?)
+        FROM {status_table}
+        WHERE created_at >= ? {"AND test_id = ?" if test_id is not None else ""}
+        GROUP BY +test_id """
+        params = (PASSED, FAILED, _cutoff(window) or "") + ((test_id,) if test_id is not None else ())
+        cursor.execute(query, params)
+        return {
+            result[0]: {
+                "runs": result[1],
+                "passed": result[2],
+                "failed": result[3],
+                "pass_rate": result[2] / result[1],
+            }
+            for result in cursor.fetchall()
+        }
+    except Exception as e:
+        raise HistoryError(f"Error computing pass rates: {e}")
+    finally:
+        cursor.close()
+
+def duration_percentiles(kind, test_id, percentiles=(50, 95), window=None):
+    """Run duration percentiles in milliseconds for one test.
+
+    Returns:
+        Dictionary mapping each requested percentile to a duration, or None
+        when the test has no finished runs in the window.
+    """
+    _, status_table = _tables(kind)
+    conn, cursor = db_conn()
+    try:
+        query = f"""
+        SELECT {DURATION_MS} AS duration_ms
+        FROM {status_table}
+        WHERE test_id = ? AND created_at >= ? AND ends_at IS NOT NULL
+        ORDER BY duration_ms """
+        cursor.execute(query, (test_id, _cutoff(window) or ""))
+        durations = [result[0] for result in cursor.fetchall()]
+        return {pct: percentile(durations, pct) for pct in percentiles}
+    except Exception as e:
+        raise HistoryError(f"Error computing duration percentiles: {e}")
+    finally:
+        cursor.close()
+
+def median_durations(kind, test_dir, window=timedelta(days=30)):
+    """Median run duration in milliseconds of every test in ``test_dir``.
+
+    One pass over the status rows of the directory instead of a
+    ``duration_percentiles`` call per test.
+
+    Returns:
+        Dictionary mapping (test_path, test_name) to a duration, for the tests
+        with finished runs in the window.
+    """
+    test_table, status_table = _tables(kind)
+    conn, cursor = db_conn()
+    try:
+        cursor.execute(f"SELECT test_id, test_path, test_name FROM {test_table} WHERE test_dir=?", (test_dir,))
+        tests = {result[0]: (result[1], result[2]) for result in cursor.fetchall()}
+        query = f"""
+        SELECT test_id, {DURATION_MS} AS duration_ms
+        FROM {status_table}
+        WHERE test_id IN (SELECT test_id FROM {test_table} WHERE test_dir=?)
+        AND created_at >= ? AND ends_at IS NOT NULL
+        ORDER BY test_id, duration_ms """
+        cursor.execute(query, (test_dir, _cutoff(window) or ""))
+        medians = {}
+        for test_id, rows in itertools.groupby(cursor, key=lambda result: result[0]):
+            medians[tests[test_id]] = percentile([result[1] for result in rows], 50)
+        return medians
+    except Exception as e:
+        raise HistoryError(f"Error computing median durations: {e}")
+    finally:
+        cursor.close()
@@ -1,9 +1,163 @@
 from pathlib import Path
+import atexit
+import logging
+import os
+import shutil
 import sqlite3
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = Path("/dbfs/Workspace/Shared") / "dbx_tester.db"
+# Parent of the per-process directories holding staged copies
+LOCAL_DB_DIR = Path(tempfile.gettempdir()) / "dbx_tester"
+
+# "direct" works on DB_PATH, "staged" works on a local-disk copy synced back to DB_PATH
+DB_MODE_ENV = "DBX_TESTER_DB_MODE"
+
+DEFAULT_PRAGMAS = {
+    # Only takes effect on new databases; retention converts existing ones
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -16000,
+    "busy_timeout": 30000,
+}
+
+
+class ConnectionManager:
+    """Keeps one sqlite connection per thread for the results database.
+
+    In staged mode the database is copied to local disk on first use, all
+    connections work on the local copy and snapshots are written back to
+    ``db_path`` every ``sync_interval`` seconds and on close. DBFS FUSE only
+    sees sequential whole-file writes, never sqlite's random I/O or locks.
+    Every manager stages into its own temporary directory, removed on close,
+    so processes on the same machine never touch each other's copy.
+    """
+
+    def __init__(self, db_path=DB_PATH, staged=False, sync_interval=60.0, pragmas=None):
+        self.db_path = Path(db_path)
+        self.staged = staged
+        self.sync_interval = sync_interval
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        # Set while staged, inside a directory of this manager only
+        self.local_path = None
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._staged_ready = False
+        self._stop_sync = threading.Event()
+        self._sync_thread = None
+
+    @property
+    def path(self):
+        return self.local_path if self.staged else self.db_path
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _connect(self):
+        with self._lock:
+            if self.staged and not self._staged_ready:
+                self._stage()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Each connection is only used by the thread that created it;
+            # check_same_thread is disabled so close() can run from any thread.
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            for pragma, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {pragma}={value}")
+            self._connections.append(conn)
+            return conn
+
+    def _stage(self):
+        LOCAL_DB_DIR.mkdir(parents=True, exist_ok=True)
+        self.local_path = Path(tempfile.mkdtemp(dir=LOCAL_DB_DIR)) / self.db_path.name
+        if self.db_path.exists():
+            shutil.copyfile(self.db_path, self.local_path)
+        self._staged_ready = True
+        if self.sync_interval:
+            self._sync_thread = threading.Thread(target=self._sync_loop, name="dbx_tester-db-sync", daemon=True)
+            self._sync_thread.start()
+
+    def _sync_loop(self):
+        while not self._stop_sync.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"Database snapshot sync failed: {e}")
+
+    def sync(self):
+        """Write a consistent snapshot of the local copy back to ``db_path``."""
+        if not self.staged or not self._staged_ready:
+            return
+        snapshot_path = self.local_path.with_suffix(".snapshot")
+        src = sqlite3.connect(self.local_path)
+        dst = sqlite3.connect(snapshot_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.db_path.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copyfile(snapshot_path, tmp_path)
+        os.replace(tmp_path, self.db_path)
+
+    def close(self):
+        self._stop_sync.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+            self._sync_thread = None
+        with self._lock:
+            for conn in self._connections:
+                conn.commit()
+            self.sync()
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._staged_ready = False
+            if self.local_path is not None:
+                shutil.rmtree(self.local_path.parent, ignore_errors=True)
+                self.local_path = None
+        self._local = threading.local()
+        self._stop_sync = threading.Event()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_connection_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ConnectionManager(staged=os.environ.get(DB_MODE_ENV) == "staged")
+            atexit.register(_manager.close)
+        return _manager
+
+
+def configure_connection_manager(**kwargs):
+    """Replace the shared connection manager, closing the current one."""
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            atexit.unregister(_manager.close)
+            _manager.close()
+        _manager = ConnectionManager(**kwargs)
+        atexit.register(_manager.close)
+        return _manager
+
+
 def db_conn():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection_manager().connection()
     cursor = conn.cursor()
     return conn, cursor
 
@@ -11,35 +165,75 @@ class InitError(Exception):
     pass
 
 class init:
+    # Ordered schema migrations; the database records the number applied in
+    # PRAGMA user_version, so each migration runs exactly once.
+    MIGRATIONS = [
+        [
+            "create_global_config",
+            "create_notebook_test",
+            "create_job_test",
+            "create_notebook_test_status",
+            "create_job_test_status",
+            "create_notebook_test_logs",
+            "create_job_test_logs",
+        ],
+        [
+            "create_test_identity_keys",
+            "create_history_indexes",
+        ],
+        [
+            "create_notebook_test_daily",
+            "create_job_test_daily",
+            "create_maintenance",
+        ],
+        [
+            "create_trace_spans",
+        ],
+    ]
+    SCHEMA_VERSION = len(MIGRATIONS)
+
     def __init__(self):
 
         self.conn, self.cursor = db_conn()
         try:
-            self.create_global_config()
-            self.create_notebook_test()
-            self.create_job_test()
-            self.create_notebook_test_status()
-            self.create_job_test_status()
-            self.create_notebook_test_logs()
-            self.create_job_test_logs()
+            self.migrate()
         except Exception as e:
             raise InitError(f"Error initializing database: {e}")
         finally:
-            if self.conn:
-                self.conn.close()
+            self.cursor.close()
         pass
 
+    def schema_version(self):
+        return self.cursor.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self):
+        version = self.schema_version()
+        if version > self.SCHEMA_VERSION:
+            raise InitError(
+                f"Database schema version {version} is newer than supported version {self.SCHEMA_VERSION}"
+            )
+        for target in range(version + 1, self.SCHEMA_VERSION + 1):
+            self.cursor.execute("BEGIN")
+            try:
+                for step in self.MIGRATIONS[target - 1]:
+                    getattr(self, step)()
+                self.cursor.execute(f"PRAGMA user_version={target}")
+                self.cursor.execute("COMMIT")
+            except Exception:
+                self.cursor.execute("ROLLBACK")
+                raise
+            logger.info(f"Migrated database schema to version {target}")
+
     def create_global_config(self):
         query = """
         CREATE TABLE IF NOT EXISTS global_config (
             test_dir TEXT,
             cluster TEXT,
             repo_dir TEXT,
-            test_cache_dir TEXT,
+            test_cache_dir TEXT
         )
         """
         self.cursor.execute(query)
-        self.conn.commit()
         pass
 
     def create_notebook_test(self):
@@ -52,10 +246,9 @@ class init:
             test_dag TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP 
-    )
+        )
         """
         self.cursor.execute(query)
-        self.conn.commit()
         pass
 
     def create_job_test(self):
@@ -68,9 +261,9 @@ class init:
             test_dag TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP 
+        )
         """
         self.cursor.execute(query)
-        self.conn.commit()
         pass
 
     def create_notebook_test_status(self):
@@ -87,7 +280,6 @@ class init:
         )
         """
         self.cursor.execute(query)
-        self.conn.commit()
         pass
 
 
@@ -105,7 +297,6 @@ class init:
         )
         """
         self.cursor.execute(query)
-        self.conn.commit()
         pass
 
     def create_notebook_test_logs(self):
@@ -115,11 +306,10 @@ class init:
             test_id INTEGER,
             event_type TEXT,
             message TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         """
         self.cursor.execute(query)
-        self.conn.commit()
         pass
 
     def create_job_test_logs(self):
@@ -129,9 +319,95 @@ class init:
             test_id INTEGER,
             event_type TEXT,
             message TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        self.cursor.execute(query)
+        pass
+
+    def create_test_identity_keys(self):
+        # Keep the newest row per identity so the unique index can be built
+        for table in ("notebook_test", "job_test"):
+            self.cursor.execute(f"""
+            DELETE FROM {table} WHERE test_id NOT IN (
+                SELECT MAX(test_id) FROM {table} GROUP BY test_dir, test_path, test_name
+            )
+            """)
+            self.cursor.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_{table}_identity
+            ON {table} (test_dir, test_path, test_name)
+            """)
+        pass
+
+    def create_history_indexes(self):
+        for table in ("notebook_test_status", "job_test_status", "notebook_test_logs", "job_test_logs"):
+            self.cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS ix_{table}_test_created
+            ON {table} (test_id, created_at)
+            """)
+            self.cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS ix_{table}_created
+            ON {table} (created_at)
+            """)
+        pass
+
+    def create_notebook_test_daily(self):
+        query = """
+        CREATE TABLE IF NOT EXISTS notebook_test_daily (
+            test_id INTEGER,
+            day TEXT,
+            runs INTEGER,
+            passed INTEGER,
+            failed INTEGER,
+            p50_ms REAL,
+            p95_ms REAL,
+            log_events INTEGER,
+            PRIMARY KEY (test_id, day)
+        )
+        """
+        self.cursor.execute(query)
+        pass
+
+    def create_job_test_daily(self):
+        query = """
+        CREATE TABLE IF NOT EXISTS job_test_daily (
+            test_id INTEGER,
+            day TEXT,
+            runs INTEGER,
+            passed INTEGER,
+            failed INTEGER,
+            p50_ms REAL,
+            p95_ms REAL,
+            log_events INTEGER,
+            PRIMARY KEY (test_id, day)
+        )
+        """
+        self.cursor.execute(query)
+        pass
+
+    def create_maintenance(self):
+        query = """
+        CREATE TABLE IF NOT EXISTS maintenance (
+            task TEXT PRIMARY KEY,
+            last_run TIMESTAMP
+        )
+        """
+        self.cursor.execute(query)
+        pass
+
+    def create_trace_spans(self):
+        query = """
+        CREATE TABLE IF NOT EXISTS trace_spans (
+            trace_id TEXT,
+            span_id INTEGER,
+            parent_id INTEGER,
+            name TEXT,
+            started_at REAL,
+            duration_ms REAL,
+            thread_id INTEGER,
+            attributes TEXT,
+            PRIMARY KEY (trace_id, span_id)
         )
         """
         self.cursor.execute(query)
-        self.conn.commit()
         pass
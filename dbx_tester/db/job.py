@@ -2,6 +2,7 @@ import sqlite3
 import json
 
 from dbx_tester.db.init import db_conn
+from dbx_tester.db.writer import get_writer
 
 
 class JobError(Exception):
@@ -12,81 +13,84 @@ def add_job_test(test_dir, test_path, test_name, test_dag):
     try:
         query = """
         INSERT INTO job_test (test_dir,test_path, test_name, test_dag)
-        VALUES (?, ?, ?) ON CONFLICT(test_dir,test_path, test_name) DO UPDATE SET
+        VALUES (?, ?, ?, ?) ON CONFLICT(test_dir,test_path, test_name) DO UPDATE SET
             test_dag=excluded.test_dag,
             updated_at=CURRENT_TIMESTAMP"""
         
-        cursor.execute(query, (test_path, test_name, json.dumps(test_dag)))
+        cursor.execute(query, (test_dir, test_path, test_name, json.dumps(test_dag)))
         conn.commit()
     except Exception as e:
         raise JobError(f"Error adding job: {e}")
     finally:
-        if conn:
-            conn.close()
+        cursor.close()
 
 
 def get_job_test(test_dir, test_path, test_name):
     conn, cursor = db_conn()
     try:
         query = """
-        SELECT * FROM job_test WHERE test_dir=? AND test_path=? AND test_name=? """
+        SELECT test_id, test_path, test_name, test_dag, created_at, updated_at
+        FROM job_test WHERE test_dir=? AND test_path=? AND test_name=? """
         cursor.execute(query, (test_dir, test_path, test_name))
         result = cursor.fetchone()
         if result:
             return {
-                "test_path": result[0],
-                "test_name": result[1],
-                "test_dag": json.loads(result[2]),
-                "created_at": result[3],
-                "updated_at": result[4],
+                "test_id": result[0],
+                "test_path": result[1],
+                "test_name": result[2],
+                "test_dag": json.loads(result[3]),
+                "created_at": result[4],
+                "updated_at": result[5],
             }
         else:
             return None
     except Exception as e:
         raise JobError(f"Error fetching job: {e}")
     finally:
-        if conn:
-            conn.close()
+        cursor.close()
 
 def list_job_tests(test_dir):
     conn, cursor = db_conn()
     try:
         query = """
-        SELECT * FROM job_test WHERE test_dir=? """
+        SELECT test_id, test_path, test_name, test_dag, created_at, updated_at
+        FROM job_test WHERE test_dir=? """
         cursor.execute(query, (test_dir,))
         results = cursor.fetchall()
         jobs = []
         for result in results:
             jobs.append({
-                "test_path": result[0],
-                "test_name": result[1],
-                "test_dag": json.loads(result[2]),
-                "created_at": result[3],
-                "updated_at": result[4],
+                "test_id": result[0],
+                "test_path": result[1],
+                "test_name": result[2],
+                "test_dag": json.loads(result[3]),
+                "created_at": result[4],
+                "updated_at": result[5],
             })
         return jobs
     except Exception as e:
         raise JobError(f"Error listing jobs: {e}")
     finally:
-        if conn:
-            conn.close()
+        cursor.close()
 
 class JobTestLogger:
     def __init__(self, test_id):
         self.test_id = test_id
-        self.conn, self.cursor = db_conn()
+        self.writer = get_writer()
         pass
 
     def log_run(self, runs, status, errorlogs):
         try:
             query = """
-            INSERT INTO job_test_logs (test_id, runs, status, errorlogs)
+            INSERT INTO job_test_status (test_id, runs, status, error)
             VALUES (?, ?, ?, ?)"""
-            self.cursor.execute(query, (self.test_id, json.dumps(runs), status, errorlogs))
-            self.conn.commit()
+            self.writer.submit(query, (self.test_id, json.dumps(runs), status, errorlogs))
         except Exception as e:
             raise JobError(f"Error logging job run: {e}")
-    def close(self):
-        if self.conn:
-            self.conn.close()
 
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        # The writer is shared; make sure this logger's rows are persisted
+        self.writer.flush()
@@ -1,7 +1,9 @@
+from datetime import datetime, timezone
 import sqlite3
 import json
 
 from dbx_tester.db.init import db_conn
+from dbx_tester.db.writer import get_writer
 
 
 class JobError(Exception):
@@ -21,78 +23,108 @@ def add_notebook_test(test_dir, test_path, test_name, test_dag):
     except Exception as e:
         raise JobError(f"Error adding job: {e}")
     finally:
-        if conn:
-            conn.close()
+        cursor.close()
+
+
+def add_notebook_tests(test_dir, tests):
+    """Add or update many tests in one transaction.
+
+    Args:
+        tests: (test_path, test_name, test_dag) tuples.
+
+    Returns:
+        Test IDs of every test in ``test_dir`` by (test_path, test_name).
+    """
+    conn, cursor = db_conn()
+    try:
+        query = """
+        INSERT INTO notebook_test (test_dir,test_path, test_name, test_dag)
+        VALUES (?, ?, ?, ?) ON CONFLICT(test_dir,test_path, test_name) DO UPDATE SET
+            test_dag=excluded.test_dag,
+            updated_at=CURRENT_TIMESTAMP"""
+        cursor.executemany(query, [(test_dir, test_path, test_name, json.dumps(test_dag)) for test_path, test_name, test_dag in tests])
+        conn.commit()
+        cursor.execute("SELECT test_id, test_path, test_name FROM notebook_test WHERE test_dir=?", (test_dir,))
+        return {(result[1], result[2]): result[0] for result in cursor.fetchall()}
+    except Exception as e:
+        raise JobError(f"Error adding jobs: {e}")
+    finally:
+        cursor.close()
 
 
 def get_notebook_test(test_dir, test_path, test_name):
     conn, cursor = db_conn()
     try:
         query = """
-        SELECT * FROM notebook_test WHERE test_dir=? AND test_path=? AND test_name=? """
+        SELECT test_id, test_path, test_name, test_dag, created_at, updated_at
+        FROM notebook_test WHERE test_dir=? AND test_path=? AND test_name=? """
         cursor.execute(query, (test_dir, test_path, test_name))
         result = cursor.fetchone()
         if result:
             return {
-                "test_path": result[0],
-                "test_name": result[1],
-                "test_dag": json.loads(result[2]),
-                "created_at": result[3],
-                "updated_at": result[4],
+                "test_id": result[0],
+                "test_path": result[1],
+                "test_name": result[2],
+                "test_dag": json.loads(result[3]),
+                "created_at": result[4],
+                "updated_at": result[5],
             }
         else:
             return None
     except Exception as e:
         raise JobError(f"Error fetching job: {e}")
     finally:
-        if conn:
-            conn.close()
+        cursor.close()
 
 def list_notebook_tests(test_dir):
     conn, cursor = db_conn()
     try:
         query = """
-        SELECT * FROM notebook_test WHERE test_dir=? """
+        SELECT test_id, test_path, test_name, test_dag, created_at, updated_at
+        FROM notebook_test WHERE test_dir=? """
         cursor.execute(query, (test_dir,))
         results = cursor.fetchall()
         jobs = []
         for result in results:
             jobs.append({
-                "test_path": result[0],
-                "test_name": result[1],
-                "test_dag": json.loads(result[2]),
-                "created_at": result[3],
-                "updated_at": result[4],
+                "test_id": result[0],
+                "test_path": result[1],
+                "test_name": result[2],
+                "test_dag": json.loads(result[3]),
+                "created_at": result[4],
+                "updated_at": result[5],
             })
         return jobs
     except Exception as e:
         raise JobError(f"Error listing jobs: {e}")
     finally:
-        if conn:
-            conn.close()
+        cursor.close()
+
+def _timestamp(epoch_seconds):
+    """CURRENT_TIMESTAMP format, with milliseconds."""
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
 
-def log_notebook_test(self,test_id, runs, status, errorlogs):
+def log_notebook_test(test_id, runs, status, errorlogs, started_at=None, ended_at=None):
+    """Log a test result; started_at and ended_at (epoch seconds) default to now."""
     try:
-        query = """
-        INSERT INTO notebook_test_logs (test_id, runs, status, errorlogs)
-        VALUES (?, ?, ?, ?)"""
-        self.cursor.execute(query, (test_id, json.dumps(runs), status, errorlogs))
-        self.conn.commit()
+        if started_at is None or ended_at is None:
+            query = """
+            INSERT INTO notebook_test_status (test_id, runs, status, error)
+            VALUES (?, ?, ?, ?)"""
+            get_writer().submit(query, (test_id, json.dumps(runs), status, errorlogs))
+        else:
+            query = """
+            INSERT INTO notebook_test_status (test_id, runs, status, error, created_at, ends_at)
+            VALUES (?, ?, ?, ?, ?, ?)"""
+            get_writer().submit(query, (test_id, json.dumps(runs), status, errorlogs, _timestamp(started_at), _timestamp(ended_at)))
     except Exception as e:
         raise JobError(f"Error logging job run: {e}")
-    finally:
-        if self.conn:
-            self.conn.close()
 
-def log_events(self,event_type, event_details):
+def log_events(test_id, event_type, event_details):
     try:
         query = """
-        INSERT INTO job_events (event_type, event_details)
-        VALUES (?, ?)"""
-        self.cursor.execute(query, (event_type, json.dumps(event_details)))
-        self.conn.commit()
+        INSERT INTO notebook_test_logs (test_id, event_type, message)
+        VALUES (?, ?, ?)"""
+        get_writer().submit(query, (test_id, event_type, json.dumps(event_details)))
     except Exception as e:
         raise JobError(f"Error logging event: {e}")
-    finally:
-        if self.conn:
-            self.conn.close()
\ No newline at end of file
@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import itertools
+import logging
+
+from dbx_tester.db.history import DURATION_MS, FAILED, PASSED, percentile
+from dbx_tester.db.init import db_conn
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionError(Exception):
+    pass
+
+# Test kind -> (status table, log table, daily rollup table)
+TABLES = {
+    "notebook": ("notebook_test_status", "notebook_test_logs", "notebook_test_daily"),
+    "job": ("job_test_status", "job_test_logs", "job_test_daily"),
+}
+
+RETENTION_TASK = "retention"
+
+
+@dataclass
+class RetentionPolicy:
+    """How long raw history is kept and how often retention runs.
+
+    Attributes:
+        keep_days: Days of raw status and log rows to keep. Older rows are
+            rolled into daily per-test aggregates and deleted.
+        interval_hours: Minimum time between scheduled retention runs.
+        vacuum_pages: Free pages to release per run, None releases all.
+    """
+    keep_days: int = 30
+    interval_hours: float = 24
+    vacuum_pages: int = None
+
+
+def _cutoff_day(keep_days):
+    # Align to midnight UTC so a day is always rolled up in one pass
+    cutoff = datetime.now(timezone.utc) - timedelta(days=keep_days)
+    return cutoff.strftime("%Y-%m-%d 00:00:00")
+
+def _rollup(cursor, kind, cutoff):
+    status_table, log_table, daily_table = TABLES[kind]
+
+    cursor.execute(f"""
+    SELECT test_id, date(created_at), COUNT(*)
+    FROM {log_table}
+    WHERE created_at < ?
+    GROUP BY test_id, date(created_at) """, (cutoff,))
+    log_counts = {(test_id, day): count for test_id, day, count in cursor.fetchall()}
+
+    # Streamed in duration order, so only the durations of one test day are held at a time
+    cursor.execute(f"""
+    SELECT test_id, date(created_at) AS day, status, {DURATION_MS} AS duration
+    FROM {status_table}
+    WHERE created_at < ?
+    ORDER BY test_id, day, duration """, (cutoff,))
+    rows = []
+    for key, day_rows in itertools.groupby(cursor, key=lambda row: (row[0], row[1])):
+        runs, passed, failed, durations = 0, 0, 0, []
+        for _, _, status, duration in day_rows:
+            runs += 1
+            passed += status == PASSED
+            failed += status == FAILED
+            if duration is not None:
+                durations.append(duration)
+        rows.append((
+            key[0], key[1], runs, passed, failed,
+            percentile(durations, 50), percentile(durations, 95), log_counts.pop(key, 0),
+        ))
+    rows.extend((test_id, day, 0, 0, 0, None, None, count) for (test_id, day), count in log_counts.items())
+
+    # Late rows for an already rolled day are merged; percentiles become run-weighted means
+    cursor.executemany(f"""
+    INSERT INTO {daily_table} (test_id, day, runs, passed, failed, p50_ms, p95_ms, log_events)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(test_id, day) DO UPDATE SET
+        p50_ms=COALESCE((p50_ms * runs + excluded.p50_ms * excluded.runs) / NULLIF(runs + excluded.runs, 0), p50_ms, excluded.p50_ms),
+        p95_ms=COALESCE((p95_ms * runs + excluded.p95_ms * excluded.runs) / NULLIF(runs + excluded.runs, 0), p95_ms, excluded.p95_ms),
+        runs=runs + excluded.runs,
+        passed=passed + excluded.passed,
+        failed=failed + excluded.failed,
+        log_events=log_events + excluded.log_events""", rows)
+
+    cursor.execute(f"DELETE FROM {status_table} WHERE created_at < ?", (cutoff,))
+    deleted = cursor.rowcount
+    cursor.execute(f"DELETE FROM {log_table} WHERE created_at < ?", (cutoff,))
+    return len(rows), deleted + cursor.rowcount
+
+def apply_retention(policy=None):
+    """Roll raw history older than the policy window into daily aggregates.
+
+    Returns:
+        Dictionary with the number of rollup rows written and raw rows deleted.
+    """
+    policy = policy or RetentionPolicy()
+    cutoff = _cutoff_day(policy.keep_days)
+    conn, cursor = db_conn()
+    try:
+        cursor.execute("BEGIN")
+        rolled_up, deleted = 0, 0
+        for kind in TABLES:
+            kind_rolled_up, kind_deleted = _rollup(cursor, kind, cutoff)
+            rolled_up += kind_rolled_up
+            deleted += kind_deleted
+        cursor.execute("""
+        INSERT INTO maintenance (task, last_run) VALUES (?, CURRENT_TIMESTAMP)
+        ON CONFLICT(task) DO UPDATE SET last_run=excluded.last_run""", (RETENTION_TASK,))
+        cursor.execute("COMMIT")
+        logger.info(f"Retention rolled up {rolled_up} test days and deleted {deleted} raw rows")
+    except Exception as e:
+        conn.rollback()
+        raise RetentionError(f"Error applying retention: {e}")
+    finally:
+        cursor.close()
+
+    compact(policy.vacuum_pages)
+    return {"rolled_up": rolled_up, "deleted": deleted}
+
+def compact(pages=None):
+    """Release free pages back to the filesystem.
+
+    Databases created before incremental auto-vacuum was enabled are
+    converted with a one-off full VACUUM.
+    """
+    conn, cursor = db_conn()
+    try:
+        if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            cursor.execute("VACUUM")
+        elif pages is None:
+            cursor.execute("PRAGMA incremental_vacuum").fetchall()
+        else:
+            cursor.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    except Exception as e:
+        raise RetentionError(f"Error compacting database: {e}")
+    finally:
+        cursor.close()
+
+def is_retention_due(policy=None):
+    policy = policy or RetentionPolicy()
+    conn, cursor = db_conn()
+    try:
+        cursor.execute("SELECT last_run FROM maintenance WHERE task=?", (RETENTION_TASK,))
+        result = cursor.fetchone()
+    finally:
+        cursor.close()
+    if result is None:
+        return True
+    last_run = datetime.strptime(result[0], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - last_run >= timedelta(hours=policy.interval_hours)
+
+def run_retention_if_due(policy=None):
+    """Runner hook: apply retention when the policy interval has elapsed."""
+    if is_retention_due(policy):
+        return apply_retention(policy)
+    return None
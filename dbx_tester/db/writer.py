@@ -0,0 +1,184 @@
+from dataclasses import dataclass, asdict
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from dbx_tester.db.init import get_connection_manager
+
+logger = logging.getLogger(__name__)
+
+
+class WriterError(Exception):
+    pass
+
+
+@dataclass
+class WriterStats:
+    submitted: int = 0
+    written: int = 0
+    flushes: int = 0
+    throttled: int = 0
+    dropped: int = 0
+    failed: int = 0
+
+
+class _Control:
+    """Queue marker asking the writer thread to flush (and optionally stop)."""
+
+    def __init__(self, stop=False):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class BufferedWriter:
+    """Batches INSERT statements on a background thread.
+
+    Producers enqueue ``(query, params)`` pairs; the writer thread groups them
+    by query and writes each group with ``executemany`` in its own transaction
+    once ``batch_size`` rows are pending or ``flush_interval`` seconds passed
+    since the first pending row. When the queue is full, ``submit`` blocks for
+    up to ``put_timeout`` seconds before dropping the row.
+    """
+
+    # Seconds between checks that the writer thread is still alive during flush
+    _FLUSH_POLL = 0.1
+
+    def __init__(self, flush_interval=1.0, batch_size=500, max_queue_size=10000, put_timeout=5.0):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.stats = WriterStats()
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stats_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            setattr(self.stats, name, getattr(self.stats, name) + n)
+
+    def get_stats(self):
+        with self._stats_lock:
+            return asdict(self.stats)
+
+    def _ensure_started(self):
+        with self._thread_lock:
+            if self._closed:
+                raise WriterError("Writer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="dbx_tester-db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, query, params):
+        """Queue a row for writing. Returns False if it had to be dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((query, params))
+        except queue.Full:
+            self._count("throttled")
+            try:
+                self._queue.put((query, params), timeout=self.put_timeout)
+            except queue.Full:
+                self._count("dropped")
+                logger.warning("Result writer queue is full, dropping row")
+                return False
+        self._count("submitted")
+        return True
+
+    def flush(self, timeout=None):
+        """Block until every row submitted so far has been written.
+
+        Returns straight away once the writer is closed or its thread has
+        stopped, as nothing would process the request.
+        """
+        with self._thread_lock:
+            thread = self._thread
+            if thread is None or self._closed or not thread.is_alive():
+                return
+        control = _Control()
+        self._queue.put(control)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not control.done.wait(self._FLUSH_POLL) and thread.is_alive():
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+
+    def close(self, timeout=None):
+        """Flush pending rows and stop the writer thread."""
+        with self._thread_lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        control = _Control(stop=True)
+        self._queue.put(control)
+        control.done.wait(timeout)
+        thread.join(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(batch)
+                batch = []
+                continue
+
+            if isinstance(item, _Control):
+                self._write(batch)
+                batch = []
+                item.done.set()
+                if item.stop:
+                    return
+                continue
+
+            if not batch:
+                deadline = time.monotonic() + self.flush_interval
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch):
+        if not batch:
+            return
+        grouped = {}
+        for query, params in batch:
+            grouped.setdefault(query, []).append(params)
+
+        # One transaction per query, so a failing statement only loses its own rows
+        conn = get_connection_manager().connection()
+        for query, rows in grouped.items():
+            try:
+                with conn:
+                    conn.executemany(query, rows)
+            except Exception as e:
+                self._count("failed", len(rows))
+                logger.error(f"Error writing {len(rows)} buffered rows: {e}")
+                continue
+            self._count("written", len(rows))
+        self._count("flushes")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Return the shared writer, flushed at interpreter exit."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            # Create the connection manager first so its atexit hook runs after ours
+            get_connection_manager()
+            _writer = BufferedWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -7,11 +7,16 @@ import logging
 from contextlib import contextmanager
 
 from dbx_tester.utils.databricks_api import get_notebook_path
+from dbx_tester.utils.databricks_dbutils import get_param
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Task parameter / environment variable carrying a resolved config snapshot
+CONFIG_SNAPSHOT_PARAM = "dbx_tester_config"
+CONFIG_SNAPSHOT_ENV = "DBX_TESTER_CONFIG"
+
 
 class ConfigurationError(Exception):
     """Custom exception for configuration-related errors."""
@@ -59,6 +64,27 @@ class GlobalConfig:
         """Create configuration from dictionary."""
         return cls(**data)
 
+    def to_snapshot(self) -> str:
+        """Serialize configuration to a compact JSON snapshot.
+        
+        Unset fields are omitted so the snapshot stays small enough to be
+        passed as a task base parameter.
+        """
+        data = {key: str(value) for key, value in self.to_dict().items() if value is not None}
+        return json.dumps(data, separators=(',', ':'), sort_keys=True)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: str) -> 'GlobalConfig':
+        """Create configuration from a snapshot produced by ``to_snapshot``.
+        
+        Raises:
+            ConfigurationError: If the snapshot is not a valid configuration.
+        """
+        try:
+            return cls.from_dict(json.loads(snapshot))
+        except (TypeError, ValueError) as e:
+            raise ConfigurationError(f"Invalid configuration snapshot: {e}")
+
 
 class PathValidator:
     """Utility class for path validation and creation."""
@@ -207,9 +233,20 @@ class GlobalConfigManager:
             config_path: Optional custom path for the configuration file.
         """
         self.config_path = config_path or self.DEFAULT_CONFIG_PATH
-        self.file_manager = ConfigFileManager(self.config_path)
+        self._file_manager: Optional[ConfigFileManager] = None
         self._config: Optional[GlobalConfig] = None
 
+    @property
+    def file_manager(self) -> ConfigFileManager:
+        """The configuration file manager, created on first use.
+        
+        Deferred so that managers hydrated from a snapshot never touch the
+        shared configuration file.
+        """
+        if self._file_manager is None:
+            self._file_manager = ConfigFileManager(self.config_path)
+        return self._file_manager
+
     def add_config(
         self,
         test_path: str,
@@ -258,9 +295,15 @@ class GlobalConfigManager:
     def _load_config(self) -> None:
         """Load the active configuration based on the current notebook path.
         
+        A snapshot passed by the submitting side takes precedence; the shared
+        configuration file is only read when no snapshot is present.
+        
         Raises:
             ConfigurationError: If no active configuration is found.
         """
+        if self._load_config_from_snapshot():
+            return
+
         try:
             config_data = self.file_manager.read_config()
             current_path = Path(get_notebook_path())
@@ -310,6 +353,28 @@ class GlobalConfigManager:
         except Exception as e:
             raise ConfigurationError(f"Failed to load configuration from test path: {e}")
 
+    def _load_config_from_snapshot(self) -> bool:
+        """Load configuration from a task parameter or environment snapshot.
+        
+        Returns:
+            True if a snapshot was found and loaded, False otherwise.
+        """
+        snapshot = get_param(CONFIG_SNAPSHOT_PARAM) or os.environ.get(CONFIG_SNAPSHOT_ENV)
+        if not snapshot:
+            return False
+
+        self._config = GlobalConfig.from_snapshot(snapshot)
+        logger.debug("Loaded configuration from snapshot")
+        return True
+
+    def snapshot_parameters(self) -> Dict[str, str]:
+        """Task parameters that propagate the resolved configuration.
+        
+        Returns:
+            Dictionary suitable for merging into task base parameters.
+        """
+        return {CONFIG_SNAPSHOT_PARAM: self.get_config().to_snapshot()}
+
     def _ensure_config_loaded(self) -> None:
         """Ensure configuration is loaded, loading it if necessary."""
         if self._config is None:
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
-from dbx_tester.global_config import GlobalConfig
+from dbx_tester.global_config import GlobalConfigManager
 from dbx_tester.utils.databricks_api import *
 from dbx_tester.config_manager import JobConfigManager
+from dbx_tester.utils.admission import get_admission_controller
+from dbx_tester.utils.tracing import span
 
-from typing import List, Dict, Set
+from typing import Any, List, Dict, Set, Deque, Tuple
+from collections import deque
 from enum import Enum
 from pathlib import Path
 from dataclasses import dataclass, field
+from array import array
+import hashlib
 import logging
 import json
+import threading
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,6 +43,22 @@ class JobTrigger(Enum):
     ON_DEMAND = "ON_DEMAND"
     WAIT = "WAIT"
 
+_RUNNING_LIFE_CYCLE_STATES = {"PENDING", "QUEUED", "BLOCKED", "WAITING_FOR_RETRY", "RUNNING", "TERMINATING"}
+
+def _to_test_state(life_cycle_state, result_state) -> JobTestState:
+    """Map a Jobs API run state onto a JobTestState."""
+    life_cycle_state = getattr(life_cycle_state, 'value', life_cycle_state)
+    result_state = getattr(result_state, 'value', result_state)
+    if life_cycle_state in _RUNNING_LIFE_CYCLE_STATES:
+        return JobTestState.RUNNING
+    if life_cycle_state == "SKIPPED":
+        return JobTestState.SKIPPED
+    if result_state == "SUCCESS":
+        return JobTestState.SUCCESS
+    if result_state == "CANCELED":
+        return JobTestState.CANCELED
+    return JobTestState.FAILED
+
 @dataclass
 class JobTestGraph:
     job_index: Dict[int, Job] = field(default_factory=dict)
@@ -45,13 +68,80 @@ class JobTestGraph:
 
 
 
+_STATES = list(JobTestState)
+_STATE_CODES = {state: code for code, state in enumerate(_STATES)}
+
+
+class RunStateTable:
+    """Per-job run state for a graph, stored in compact integer-indexed arrays.
+
+    Jobs are addressed by their JobTestGraph index. Writes that do not change
+    a job's state are ignored; changed jobs are marked dirty until drained,
+    and the number of jobs per state is kept up to date for O(1) summaries.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.states = array('b', [_STATE_CODES[JobTestState.PENDING]]) * size
+        self.run_ids = array('q', [0]) * size
+        self.updated_at = array('d', [0.0]) * size
+        self.active: Set[int] = set()
+        self._dirty: Set[int] = set()
+        self._counts = [0] * len(_STATES)
+        self._counts[_STATE_CODES[JobTestState.PENDING]] = size
+
+    def get(self, index: int) -> JobTestState:
+        return _STATES[self.states[index]]
+
+    def set(self, index: int, state: JobTestState) -> bool:
+        """Record a state, returning True if it changed."""
+        code = _STATE_CODES[state]
+        previous = self.states[index]
+        if previous == code:
+            return False
+        self.states[index] = code
+        self._counts[previous] -= 1
+        self._counts[code] += 1
+        self.updated_at[index] = time.time()
+        self._dirty.add(index)
+        return True
+
+    def set_run(self, index: int, run_id: int) -> None:
+        self.run_ids[index] = run_id
+        self.active.add(index)
+
+    def count(self, state: JobTestState) -> int:
+        return self._counts[_STATE_CODES[state]]
+
+    def summary(self) -> Dict[JobTestState, int]:
+        return {state: self._counts[code] for code, state in enumerate(_STATES)}
+
+    def drain_dirty(self) -> List[int]:
+        """Return and clear the indices whose state changed since the last drain."""
+        dirty, self._dirty = sorted(self._dirty), set()
+        return dirty
+
+
 @dataclass
 class JobTestProcess:
     test_graph: JobTestGraph = None
     state: JobTestState = JobTestState.PENDING
-    current_jobs: Set[int] = field(default_factory=set)
+    table: RunStateTable = None
     runs: Dict[int,JobRunner] = field(default_factory=dict)
-    logs: Dict[int,str] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.table is None and self.test_graph is not None:
+            self.table = RunStateTable(len(self.test_graph.job_index))
+
+    @property
+    def current_jobs(self) -> Set[int]:
+        """Indices of jobs with a run in flight."""
+        return self.table.active
+
+    @property
+    def logs(self) -> Dict[int, JobTestState]:
+        """Snapshot of every job's state, keyed by graph index."""
+        return {i: self.table.get(i) for i in range(self.table.size)}
 
 
 
@@ -62,7 +152,7 @@ class Job:
     config: JobConfigManager = None
     depends_on: List[Job] = field(default_factory=list)
     trigger: JobTrigger = JobTrigger.ON_DEMAND
-    global_config: GlobalConfig = GlobalConfig()
+    global_config: GlobalConfigManager = field(default_factory=GlobalConfigManager, compare=False, repr=False)
 
     def __post_init__(self):
         self._validate_inputs()
@@ -98,54 +188,239 @@ class Job:
         else:
             object.__setattr__(self, 'job_id', get_job_id(name=self.name, job_id=self.job_id))
 
+@dataclass
+class SharedRun:
+    runner: JobRunner
+    holders: int = 0
+    state: JobTestState = JobTestState.RUNNING
+    finished_at: float = None
+    # Set once the launching caller has started the run, or failed to
+    started: threading.Event = field(default_factory=threading.Event)
+    error: Exception = None
+
+
+class JobRunRegistry:
+    """Shares job runs between the JobTests of a suite.
+
+    Runs are keyed by job ID plus a hash of the job parameters. A request for
+    a job whose identical run is still in flight attaches to that run, and a
+    run that succeeded within the last ``reuse_minutes`` is reused instead of
+    triggering the job again.
+    """
+
+    def __init__(self, reuse_minutes: float = 0):
+        self.reuse_minutes = reuse_minutes
+        self.stats = {"launched": 0, "attached": 0, "reused": 0}
+        self._runs: Dict[Tuple[int, str], SharedRun] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(job_id: int, params: Dict[str, Any]) -> Tuple[int, str]:
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return job_id, hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _reusable(self, shared: SharedRun) -> bool:
+        if shared.state == JobTestState.RUNNING:
+            return True
+        return (
+            shared.state == JobTestState.SUCCESS
+            and time.time() - shared.finished_at <= self.reuse_minutes * 60
+        )
+
+    def acquire(self, job_id: int, params: Dict[str, Any]) -> JobRunner:
+        """Return a runner for the job, starting a new run only when needed.
+
+        The run is started outside the lock, so acquires of other jobs do not
+        wait on it; callers attaching meanwhile wait until it has started.
+
+        Raises:
+            JobTestProcessError: If the shared run failed to start.
+        """
+        key = self.key(job_id, params)
+        with self._lock:
+            shared = self._runs.get(key)
+            launch = shared is None or not self._reusable(shared)
+            if launch:
+                shared = self._runs[key] = SharedRun(runner=JobRunner(job_id, params))
+                self.stats["launched"] += 1
+            else:
+                self.stats["attached" if shared.state == JobTestState.RUNNING else "reused"] += 1
+            shared.holders += 1
+
+        if launch:
+            try:
+                shared.runner.run()
+            except Exception as e:
+                with self._lock:
+                    shared.error, shared.state, shared.finished_at = e, JobTestState.FAILED, time.time()
+                    shared.holders -= 1
+                raise
+            finally:
+                shared.started.set()
+        else:
+            shared.started.wait()
+            if shared.error is not None:
+                with self._lock:
+                    shared.holders -= 1
+                raise JobTestProcessError(f"Shared run of job {job_id} failed to start: {shared.error}") from shared.error
+        return shared.runner
+
+    def record(self, job_id: int, params: Dict[str, Any], state: JobTestState) -> None:
+        """Record the terminal state of a shared run."""
+        with self._lock:
+            shared = self._runs.get(self.key(job_id, params))
+            if shared is not None and shared.state == JobTestState.RUNNING:
+                shared.state = state
+                shared.finished_at = time.time()
+
+    def release(self, job_id: int, params: Dict[str, Any]) -> bool:
+        """Drop one holder of a run, returning True if nobody else uses it."""
+        with self._lock:
+            shared = self._runs.get(self.key(job_id, params))
+            if shared is None:
+                return True
+            shared.holders -= 1
+            return shared.holders <= 0
+
+
 class JobTestProcessManager:
-    def __init__(self, processs:JobTestProcess):
+    """Schedules the jobs of a JobTestGraph as their upstreams complete.
+
+    Jobs become ready when their count of unfinished upstream jobs drops to
+    zero and are launched straight away, up to ``max_concurrency`` runs at a
+    time, so wall time follows the critical path of the graph. A failed job
+    only skips its own descendants; independent branches keep running.
+    ``JobTrigger.WAIT`` jobs are not launched by the manager: once ready it
+    attaches to the first run of the job started after that point.
+    """
+
+    def __init__(self, processs:JobTestProcess, max_concurrency: int = None, registry: JobRunRegistry = None):
         self.processes: JobTestProcess = processs
+        self.max_concurrency = max_concurrency
+        self.registry = registry
+
+        graph = self.processes.test_graph
+        self._upstream: Dict[int, Set[int]] = {i: set() for i in graph.job_index}
+        for index, downstream in graph.job_flow.items():
+            for next_job in downstream:
+                self._upstream[next_job].add(index)
+        self._remaining: Dict[int, int] = {i: len(up) for i, up in self._upstream.items()}
+        self._ready: Deque[int] = deque(sorted(i for i, n in self._remaining.items() if n == 0))
+        self._waiting: Dict[int, int] = {}
+        self._table = self.processes.table
 
     def _run_job(self, index):
-        run = JobRunner(self.processes.test_graph.job_index[index].job_id, self.processes.test_graph.job_index[index].config).run()
-        self.processes.current_jobs.add(index)
-        self.processes.runs.update({index: run})
-        self.processes.logs.update({index: run.get_run_status()})
-    
-    def _update_status(self, index):
+        job = self.processes.test_graph.job_index[index]
+        params = job.config.get_job_config()
+        with span("job.start", job_id=job.job_id, index=index) as s:
+            if self.registry is not None:
+                runner = self.registry.acquire(job.job_id, params)
+            else:
+                runner = JobRunner(job.job_id, params)
+                runner.run()
+            s.set(run_id=runner.run_id)
+        self._track_run(index, runner)
+
+    def _track_run(self, index, runner):
+        self._table.set_run(index, runner.run_id)
+        self._table.set(index, JobTestState.RUNNING)
+        self.processes.runs.update({index: runner})
+
+    def _update_status(self, index) -> bool:
         run = self.processes.runs[index]
-        self.processes.logs.update({index: run.get_run_status()})
+        return self._table.set(index, _to_test_state(*run.get_run_status()))
+
+    def _finish_run(self, index):
+        self._table.active.discard(index)
+        runner = self.processes.runs.pop(index, None)
+        if runner is None:
+            return
+        if self.registry is not None:
+            self.registry.record(runner.job_id, runner.params, self._table.get(index))
+            if not self.registry.release(runner.job_id, runner.params):
+                return
+        get_admission_controller().release_run(runner.run_id)
+
+    def _cancel_run(self, index):
+        runner = self.processes.runs[index]
+        # Shared runs are only canceled once no other test is attached
+        if self.registry is None or self.registry.release(runner.job_id, runner.params):
+            runner.cancel_run()
+            if self.registry is not None:
+                self.registry.record(runner.job_id, runner.params, JobTestState.CANCELED)
+            get_admission_controller().release_run(runner.run_id)
+        self._table.active.discard(index)
+        self.processes.runs.pop(index, None)
+
+    def _at_capacity(self) -> bool:
+        return self.max_concurrency is not None and len(self._table.active) >= self.max_concurrency
+
+    def _launch_ready(self) -> None:
+        while self._ready and not self._at_capacity():
+            index = self._ready.popleft()
+            if self.processes.test_graph.job_index[index].trigger == JobTrigger.WAIT:
+                self._waiting[index] = int(time.time() * 1000)
+            else:
+                self._run_job(index)
+
+    def _attach_waiting(self) -> None:
+        for index, ready_at in list(self._waiting.items()):
+            job = self.processes.test_graph.job_index[index]
+            run_id = find_job_run(job.job_id, start_time_from=ready_at)
+            if run_id is not None:
+                del self._waiting[index]
+                self._track_run(index, JobRunner(job.job_id, run_id=run_id))
 
     def _init_process(self) -> None:
-        for i in self.processes.test_graph.entry_point:
-            self._run_job(i)
         self.processes.state = JobTestState.RUNNING
+        self._launch_ready()
     
     def _stop_process(self) -> None:
-        for i in self.processes.current_jobs:
-            run = self.processes.runs[i]
-            if run.get_run_status() == 'RUNNING':
-                run.cancel_run()
-                self.processes.logs.update({i: 'CANCELED'})
+        for i in list(self._table.active):
+            self._cancel_run(i)
+            self._table.set(i, JobTestState.CANCELED)
+        for i in list(self._ready) + list(self._waiting):
+            self._table.set(i, JobTestState.CANCELED)
+        self._ready.clear()
+        self._waiting.clear()
         self.processes.state = JobTestState.CANCELED
     
     def _check_and_update_current_state(self):
-        for i in self.processes.current_jobs:
-            run = self.processes.runs[i]
-            self.processes.logs.update({i: run.get_run_status()})
-    
-    def _check_for_failure(self):
-        for i in self.processes.current_jobs:
-            if self.processes.logs[i] == 'FAILED':
-                    self.processes.state = JobTestState.FAILED
-                    return
-
-    def _check_for_next_run(self):
-        if self.processes.state != JobTestState.FAILED:
-            return
-        for i in self.processes.current_jobs:
-            if self.processes.logs[i] != 'SUCCESS':
+        for i in list(self._table.active):
+            if not self._update_status(i):
+                continue
+            state = self._table.get(i)
+            if state == JobTestState.SUCCESS:
+                self._finish_run(i)
+                self._release_downstream(i)
+            elif state in (JobTestState.FAILED, JobTestState.CANCELED, JobTestState.SKIPPED):
+                self._finish_run(i)
+                self._skip_downstream(i)
+
+    def _release_downstream(self, index):
+        for next_job in self.processes.test_graph.job_flow.get(index, set()):
+            self._remaining[next_job] -= 1
+            if self._remaining[next_job] == 0 and self._table.get(next_job) == JobTestState.PENDING:
+                self._ready.append(next_job)
+
+    def _skip_downstream(self, index):
+        stack = list(self.processes.test_graph.job_flow.get(index, set()))
+        while stack:
+            next_job = stack.pop()
+            if self._table.get(next_job) != JobTestState.PENDING:
                 continue
-            next_jobs = self.processes.test_graph.job_flow.get(i, set())
-            for next_job in next_jobs:
-                if next_job not in self.processes.current_jobs:
-                    self._run_job(next_job)
+            self._table.set(next_job, JobTestState.SKIPPED)
+            self._waiting.pop(next_job, None)
+            stack.extend(self.processes.test_graph.job_flow.get(next_job, set()))
+        self._ready = deque(i for i in self._ready if self._table.get(i) == JobTestState.PENDING)
+
+    def _check_for_completion(self):
+        if self._table.active or self._ready or self._waiting:
+            return
+        if self._table.count(JobTestState.SUCCESS) == self._table.size:
+            self.processes.state = JobTestState.SUCCESS
+        else:
+            self.processes.state = JobTestState.FAILED
     
     def init(self):
         self._init_process()
@@ -154,13 +429,43 @@ class JobTestProcessManager:
     def state(self):
         return self.processes.state
 
+    def summary(self) -> Dict[JobTestState, int]:
+        """Number of jobs in each state."""
+        return self._table.summary()
+
+    def changes(self) -> List[int]:
+        """Graph indices of jobs whose state changed since the last call."""
+        return self._table.drain_dirty()
+
     def monitor(self):
-        self._check_and_update_current_state()
-        self._check_for_failure()
-        if self.processes.state != JobTestState.FAILED:
-            self._stop_process()
+        """Advance the schedule by one polling step."""
+        if self.processes.state != JobTestState.RUNNING:
             return
-        self._check_for_next_run()
+        self._attach_waiting()
+        self._check_and_update_current_state()
+        self._launch_ready()
+        self._check_for_completion()
+
+    def run(self, poll_interval: float = 10.0, timeout: float = None) -> JobTestState:
+        """Run the whole graph, polling until every job has finished.
+
+        Raises:
+            JobTestProcessError: If the graph does not finish within timeout
+                seconds; outstanding runs are canceled first.
+        """
+        with span("job.run", jobs=len(self.processes.test_graph.job_index)) as s:
+            if self.processes.state == JobTestState.PENDING:
+                self.init()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                self.monitor()
+                if self.processes.state != JobTestState.RUNNING:
+                    s.set(state=self.processes.state.name)
+                    return self.processes.state
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._stop_process()
+                    raise JobTestProcessError(f"Job test did not finish within {timeout} seconds")
+                time.sleep(poll_interval)
 
     def stop(self):
         self._stop_process()
@@ -170,12 +475,14 @@ class JobTest():
     def __init__(self, fn, job: Job):
         self.fn = fn
         self.job = job
-        self.global_config = GlobalConfig()
+        self.global_config = GlobalConfigManager()
         self.dep_graph = JobTestGraph()
 
-        self._initialize_paths()
-        self._build_dep_graph()
-        self._build_test_notebook()
+        with span("job_test.define", test=fn.__name__):
+            self._initialize_paths()
+            with span("job_test.build_graph"):
+                self._build_dep_graph()
+            self._build_test_notebook()
         pass
 
     def _initialize_paths(self) -> None:
@@ -201,27 +508,37 @@ class JobTest():
         self.notebook_dir = self.current_path.parent
 
     def _build_dep_graph(self):
-
-        visited = set()
-        
-        stack = [{0:self.job}]
-
-        while stack:
-            index, job = stack.pop()
-            if job in visited:
+        """Index every job reachable from the tested job.
+
+        ``job_flow`` maps each job to the jobs that depend on it and
+        ``entry_point`` holds the jobs without dependencies. Jobs shared by
+        several dependants are indexed once.
+        """
+        indices: Dict[int, int] = {}
+        visiting: Set[int] = set()
+
+        def visit(job: Job) -> int:
+            key = id(job)
+            if key in indices:
+                return indices[key]
+            if key in visiting:
                 raise JobTestError("Circular dependency detected")
-            visited.add(job)
-            if index not in self.dep_graph.job_flow:
-                self.dep_graph.job_flow[index] = set()
-            if index > 0:
-                self.dep_graph.job_flow[index].add(index - 1)
+            visiting.add(key)
+            depends_on = job.depends_on if isinstance(job.depends_on, list) else [job.depends_on]
+            upstream = [visit(dep) for dep in depends_on]
+            visiting.discard(key)
+
+            index = len(indices)
+            indices[key] = index
             self.dep_graph.job_index[index] = job
-            if len(job.depends_on) == 0:
+            self.dep_graph.job_flow.setdefault(index, set())
+            for up in upstream:
+                self.dep_graph.job_flow[up].add(index)
+            if not upstream:
                 self.dep_graph.entry_point.add(index)
-            else:
-                for dep in job.depends_on:
-                    dep_index = index + 1
-                    stack.append({dep_index: dep})
+            return index
+
+        visit(self.job)
     
     def _build_test_notebook(self):
 
@@ -248,7 +565,7 @@ class JobTest():
 
 class JobTestRunner():
     def __init__(self, test_path: str = None):
-        self.global_config = GlobalConfig()
+        self.global_config = GlobalConfigManager()
 
         self.test_path = Path(self.global_config.TEST_PATH)  
         self.test_cache_path = Path(self.global_config.TEST_CACHE_PATH)
@@ -260,7 +577,8 @@ class JobTestRunner():
         pass
 
     def _identify_job_tests(self):
-        self.tests = [f for f in self.test_path.rglob("*") if is_notebook(f) and '_test_cache' not in f.parts]
+        with span("runner.discover", kind="job"):
+            self.tests = [f for f in self.test_path.rglob("*") if is_notebook(f) and '_test_cache' not in f.parts]
         pass
 
     def _run_job_tests(self):
@@ -0,0 +1,354 @@
+from databricks.sdk.service.workspace import ObjectType
+
+from dbx_tester.global_config import GlobalConfigManager
+from dbx_tester.config_manager import create_task_value_stub
+from dbx_tester.notebook import NotebookGraph, NotebookTest, get_test_registry
+from dbx_tester.utils.backend import set_backend
+from dbx_tester.utils.fake_backend import FakeBackend, FakeDBUtils, NotebookExit
+from dbx_tester.utils.notebook_source import jupyter_cells, parse_cells
+from dbx_tester.utils.tracing import span
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+import io
+import logging
+import posixpath
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# Local file suffixes tried for a workspace notebook path
+NOTEBOOK_SUFFIXES = ("", ".py", ".ipynb")
+# Magics skipped instead of failing the notebook
+SKIPPED_MAGICS = {"%md", "%pip"}
+
+
+class LocalExecutionError(Exception):
+    pass
+
+
+def _without_workspace_prefix(path: str) -> str:
+    """Workspace paths are valid with and without the /Workspace mount prefix."""
+    return path[len("/Workspace"):] if path.startswith("/Workspace/") else path
+
+
+class LocalPaths:
+    """Maps workspace paths onto a local checkout.
+
+    Args:
+        mapping: Workspace directory (e.g. ``REPO_PATH``) to local directory.
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.mapping = sorted(
+            ((_without_workspace_prefix(workspace.rstrip("/")), Path(local)) for workspace, local in mapping.items()),
+            key=lambda item: len(item[0]),
+            reverse=True
+        )
+
+    def local(self, path: str) -> Optional[Path]:
+        """Local file of a workspace notebook, None if it is not checked out."""
+        path = _without_workspace_prefix(str(path))
+        for workspace, local in self.mapping:
+            if path != workspace and not path.startswith(workspace + "/"):
+                continue
+            candidate = local / path[len(workspace):].lstrip("/")
+            for suffix in NOTEBOOK_SUFFIXES:
+                notebook = candidate.with_name(candidate.name + suffix)
+                if notebook.is_file():
+                    return notebook
+        return None
+
+
+def read_cells(path: Path) -> List[str]:
+    """Code cells of a local notebook in Jupyter or Databricks source format."""
+    path = Path(path)
+    return parse_cells(path.read_text(), jupyter=path.suffix == ".ipynb")
+
+
+def _execute(cells: List[str], namespace: Dict[str, Any], notebook_path: str, paths: LocalPaths) -> None:
+    """Execute notebook cells in one namespace, inlining ``%run`` includes."""
+    for index, cell in enumerate(cells):
+        source = cell.strip()
+        name = f"<{notebook_path} cell {index}>"
+        if not source.startswith("%"):
+            exec(compile(cell, name, "exec"), namespace)
+            continue
+
+        first_line, _, body = source.partition("\n")
+        magic, _, argument = first_line.partition(" ")
+        if magic == "%run":
+            target = argument.strip().strip("\"'")
+            if not target.startswith("/"):
+                target = posixpath.normpath(posixpath.join(posixpath.dirname(notebook_path), target))
+            local = paths.local(target)
+            if local is None:
+                raise LocalExecutionError(f"%run target is not checked out locally: {target}")
+            _execute(read_cells(local), namespace, target, paths)
+        elif magic == "%python":
+            exec(compile(f"{argument}\n{body}", name, "exec"), namespace)
+        elif magic in SKIPPED_MAGICS:
+            logger.debug(f"Skipping {magic} cell {index} of {notebook_path}")
+        else:
+            raise LocalExecutionError(f"{magic} cells cannot run locally ({notebook_path} cell {index})")
+
+
+class LocalBackend(FakeBackend):
+    """In-memory workspace whose notebooks are read from a local checkout.
+
+    Only absolute workspace paths are looked up locally, so relative
+    notebook paths still resolve against ``REPO_PATH`` as in the workspace.
+    """
+
+    def __init__(
+        self,
+        paths: LocalPaths,
+        notebook_path: str,
+        params: Dict[str, str],
+        task_key: Optional[str] = None,
+        task_values: Optional[Dict[Tuple[str, str], Any]] = None
+    ):
+        super().__init__(notebook_path=notebook_path, params=params, local_files=False)
+        self.paths = paths
+        self.dbutils = FakeDBUtils(params, task_values=task_values, task_key=task_key, run_notebook=self.run_notebook)
+
+    def _object_info(self, path):
+        path = str(path)
+        if path not in self.objects and path.startswith("/") and self.paths.local(path) is not None:
+            return SimpleNamespace(path=path, object_type=ObjectType.NOTEBOOK)
+        return super()._object_info(path)
+
+
+@dataclass
+class LocalTaskResult:
+    task_key: str
+    status: str
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+    exit_value: Optional[str] = None
+    output: str = ""
+    task_values: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _TaskRequest:
+    task_key: str
+    notebook_path: str
+    # None runs the shared task value stub
+    cells: Optional[List[str]]
+    params: Dict[str, str]
+    task_values: Dict[Tuple[str, str], Any]
+    paths: LocalPaths
+
+
+def _run_task(request: _TaskRequest) -> LocalTaskResult:
+    """Run one task in a worker process."""
+    store = dict(request.task_values)
+    backend = LocalBackend(request.paths, request.notebook_path, request.params, request.task_key, store)
+    set_backend(backend)
+    cells = request.cells
+    if cells is None:
+        cells = jupyter_cells(create_task_value_stub()._notebook_dict)
+
+    namespace = {"__name__": "__main__", "dbutils": backend.dbutils}
+    output = io.StringIO()
+    status, error, exit_value = "SUCCESS", None, None
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            _execute(cells, namespace, request.notebook_path, request.paths)
+    except NotebookExit as e:
+        exit_value = e.value
+    except Exception:
+        status, error = "FAILED", traceback.format_exc()
+    return LocalTaskResult(
+        task_key=request.task_key,
+        status=status,
+        duration_seconds=time.perf_counter() - start,
+        error=error,
+        exit_value=exit_value,
+        output=output.getvalue(),
+        task_values={key: value for (task, key), value in store.items() if task == request.task_key}
+    )
+
+
+class LocalExecutor:
+    """Runs notebook graphs on this machine instead of a cluster.
+
+    Notebooks come from the graph itself and ``%run`` includes are read
+    from local checkouts of ``REPO_PATH`` and ``TEST_PATH``. Tasks run in
+    a process pool as soon as their upstream tasks succeeded, with stub
+    ``dbutils`` widgets and task values, so logic that needs no Spark gets
+    feedback in well under a second.
+
+    Args:
+        repo_path: Local checkout of the configured ``REPO_PATH``.
+        test_path: Local checkout of the configured ``TEST_PATH``.
+        global_config: Configuration to resolve; loaded as usual if omitted.
+        max_workers: Size of the process pool.
+    """
+
+    def __init__(
+        self,
+        repo_path: Optional[str] = None,
+        test_path: Optional[str] = None,
+        global_config: Optional[GlobalConfigManager] = None,
+        max_workers: Optional[int] = None
+    ):
+        self.global_config = global_config or GlobalConfigManager()
+        self.paths = LocalPaths({
+            workspace: local
+            for workspace, local in ((self.global_config.REPO_PATH, repo_path), (self.global_config.TEST_PATH, test_path))
+            if workspace and local
+        })
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "LocalExecutor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def collect_tests(self, notebook_path: str) -> List[NotebookTest]:
+        """Define the tests of a test notebook without touching the workspace.
+
+        Args:
+            notebook_path: Workspace path of the test notebook below ``TEST_PATH``.
+
+        Returns:
+            The notebook tests, with their graphs built.
+        """
+        local = self.paths.local(notebook_path)
+        if local is None:
+            raise LocalExecutionError(f"Test notebook is not checked out locally: {notebook_path}")
+
+        backend = LocalBackend(self.paths, notebook_path, self.global_config.snapshot_parameters())
+        previous = set_backend(backend)
+        # Collect definitions through the registry instead of publishing them
+        registry = get_test_registry()
+        enabled, start = registry.enabled, len(registry.pending)
+        registry.enabled = True
+        try:
+            with span("local.collect", notebook=notebook_path):
+                _execute(read_cells(local), {"__name__": "__main__", "dbutils": backend.dbutils}, notebook_path, self.paths)
+                tests = registry.pending[start:]
+                for test in tests:
+                    graph = test._build_test_cache()
+                    if graph is not None:
+                        test.notebook_paths = {task: test.notebook_dir / task for task in graph.nodes}
+        finally:
+            del registry.pending[start:]
+            registry.enabled = enabled
+            set_backend(previous)
+        return [test for test in tests if test.notebook is not None]
+
+    def run_test(self, test: NotebookTest) -> Dict[str, LocalTaskResult]:
+        """Run a collected test once per parameter combination.
+
+        Returns:
+            Task results by task key; parametrized main tasks are keyed as
+            in submissions, ``<task>__p<index>``.
+        """
+        main_task = test.notebook.task_name
+        results: Dict[str, LocalTaskResult] = {}
+        matrix = test.parameter_matrix if test.parametrize else [{}]
+        for index, params in enumerate(matrix):
+            with span("local.test", test=test.fn.__name__, combination=index):
+                run = self.run(test.notebook.notebook_graph, test.notebook_paths, params)
+            if test.parametrize:
+                run[f"{main_task}__p{index}"] = run.pop(main_task)
+                run[f"{main_task}__p{index}"].task_key = f"{main_task}__p{index}"
+            results.update(run)
+        return results
+
+    def run(
+        self,
+        graph: NotebookGraph,
+        notebook_paths: Optional[Dict[str, Path]] = None,
+        parameters: Optional[Dict[str, str]] = None
+    ) -> Dict[str, LocalTaskResult]:
+        """Run the tasks of a graph in dependency order.
+
+        Args:
+            graph: Graph of notebooks and task value tasks.
+            notebook_paths: Workspace path of each task's notebook; tasks run
+                as if from the test cache when omitted.
+            parameters: Widget values passed to every task.
+
+        Returns:
+            Task results by task key. Tasks downstream of a failure are
+            reported as "UPSTREAM_FAILED" without running.
+        """
+        cache_dir = Path(self.global_config.TEST_CACHE_PATH) / "_test_cache" / "local"
+        notebook_paths = notebook_paths or {}
+        base_parameters = {**self.global_config.snapshot_parameters(), "trigger_run": "true", **(parameters or {})}
+        pending = {task: list(graph.edges.get(task, [])) for task in graph.nodes}
+        results: Dict[str, LocalTaskResult] = {}
+        task_values: Dict[Tuple[str, str], Any] = {}
+        running = {}
+
+        while pending or running:
+            for task in self._ready(pending, results):
+                node = graph.nodes[task]
+                request = _TaskRequest(
+                    task_key=task,
+                    notebook_path=Path(notebook_paths.get(task, cache_dir / task)).as_posix(),
+                    cells=None if node.notebook is None else jupyter_cells(node.notebook._notebook_dict),
+                    params={**base_parameters, **node.params},
+                    task_values=dict(task_values),
+                    paths=self.paths
+                )
+                running[self.pool.submit(_run_task, request)] = task
+            if not running:
+                if pending:
+                    raise LocalExecutionError(f"Dependency cycle between tasks: {sorted(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results[running.pop(future)] = result
+                task_values.update({(result.task_key, key): value for key, value in result.task_values.items()})
+                if result.status == "FAILED":
+                    logger.error(f"Local task {result.task_key} failed:\n{result.error}")
+        return results
+
+    @staticmethod
+    def _ready(pending: Dict[str, List[str]], results: Dict[str, LocalTaskResult]) -> List[str]:
+        """Remove and return the tasks whose upstream finished successfully.
+
+        Tasks with a failed upstream are resolved as "UPSTREAM_FAILED" here,
+        repeatedly, so failures propagate through the whole downstream graph.
+        """
+        ready = []
+        changed = True
+        while changed:
+            changed = False
+            for task, upstream in list(pending.items()):
+                if not all(dep in results for dep in upstream):
+                    continue
+                del pending[task]
+                changed = True
+                failed = [dep for dep in upstream if results[dep].status != "SUCCESS"]
+                if failed:
+                    results[task] = LocalTaskResult(task, "UPSTREAM_FAILED", error=f"Upstream tasks failed: {failed}")
+                else:
+                    ready.append(task)
+        return ready
@@ -1,35 +1,70 @@
 from __future__ import annotations
 
 from dbx_tester.global_config import GlobalConfigManager
-from dbx_tester.config_manager import NotebookConfigManager
+from dbx_tester.config_manager import NotebookConfigManager, JobClusterConfig, create_task_value_stub
 from dbx_tester.utils.databricks_api import (
     get_notebook_path, 
+    get_run,
     notebook_builder, 
     submit_run, 
+    is_directory,
     is_notebook, 
+    list_workspace,
+    make_workspace_dirs,
+    read_workspace_file,
     run_notebook
 )
-from dbx_tester.utils.databricks_dbutils import get_param
+from dbx_tester.utils.databricks_dbutils import exit_notebook, get_param
 from dbx_tester.db.notebook import add_notebook_test, get_notebook_test, list_notebook_tests
+from dbx_tester.outcome import ERROR, SKIPPED, NotebookTestFailed, NotebookTestOutcome, run_outcomes, run_test_function
+from dbx_tester.reporting import JUnitXmlReporter, Reporter, ReporterGroup, ResultsDatabaseReporter, SummaryReporter
+from dbx_tester.db.retention import RetentionPolicy, run_retention_if_due
+from dbx_tester.retry import RetryPolicy, RunRetrier, task_failed
+from dbx_tester.utils.tracing import span, traced
+from dbx_tester.utils.profiler import report_api_profile
 
+from databricks.sdk.service.workspace import ObjectType
+
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from collections.abc import Callable
-from typing import Type, Any, List, Dict, Literal, Optional, Union
+from typing import Type, Any, List, Dict, Literal, Optional, Set, Tuple, Union
 from datetime import datetime
 from dataclasses import dataclass, field
+import hashlib
+import itertools
+import json
 import logging
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Jobs API limit on tasks in a single run submission
+MAX_TASKS_PER_RUN = 100
+# Finished runs whose outcomes are collected concurrently
+OUTCOME_WORKERS = 16
+# Sidecar next to a cached test notebook listing its widget combinations
+MATRIX_SUFFIX = ".matrix.json"
+# Sidecar next to a cached test notebook listing its task value tasks
+TASKS_SUFFIX = ".tasks.json"
+# Sidecar next to a cached test notebook listing its dependency notebooks by scope
+SETUP_SUFFIX = ".setup.json"
+SETUP_SCOPES = ("function", "module", "session")
+# Shared task value stub, relative to the test cache path
+TASK_VALUE_STUB = Path("_test_cache") / "_task_values"
+
+_uploaded_stubs = set()
+
 
 @dataclass
 class NotebookNode:
     task_name: str
-    notebook: notebook_builder
+    notebook: Optional[notebook_builder]
     type: Literal["notebook", "task"] = "notebook"
     cluster: Optional[str] = None
+    params: Dict[str, str] = field(default_factory=dict)
 
 
 @dataclass
@@ -42,6 +77,80 @@ class NotebookValidationError(ValueError):
     pass
 
 
+def _job_clusters(job_cluster: Optional[JobClusterConfig]) -> Dict[str, Dict[str, Any]]:
+    """Job cluster declarations for a submission."""
+    if job_cluster is None:
+        return {}
+    return {job_cluster.key: job_cluster.to_cluster_spec()}
+
+def _notebook_source(notebook: notebook_builder) -> List[List[str]]:
+    """Cell sources of a notebook, without the cell IDs generated on every build."""
+    return [cell["source"] for cell in notebook._notebook_dict["cells"]]
+
+def _matrix_chunks(matrix: List[Dict[str, Any]], shared_tasks: int) -> List[List[Dict[str, Any]]]:
+    """Split a parameter matrix so every submission stays within the task limit."""
+    per_run = max(1, MAX_TASKS_PER_RUN - shared_tasks)
+    return [matrix[start:start + per_run] for start in range(0, len(matrix), per_run)]
+
+def _pack_submissions(
+    name: str,
+    plans: List[Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]],
+    cluster_id: Optional[str],
+    base_parameters: Dict[str, str],
+    job_clusters: Dict[str, Dict[str, Any]]
+) -> List[submit_run]:
+    """Pack test plans into as few submissions as the task limit allows.
+    
+    A plan is a pair of shared tasks (by task key) and main tasks. Shared
+    tasks go into every submission holding one of the plan's main tasks and
+    are added once per submission, so tests with a common upstream share it.
+    A plan whose task keys clash with a different task of the current
+    submission starts a new one, as a run rejects duplicate task keys.
+    """
+    batches: List[Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]] = []
+    for shared, mains in plans:
+        for chunk in _matrix_chunks(mains, len(shared)):
+            if batches:
+                batch_shared, batch_mains = batches[-1]
+                main_keys = {task["task_key"] for task in batch_mains}
+                conflict = any(
+                    task in main_keys or (task in batch_shared and batch_shared[task] != spec)
+                    for task, spec in shared.items()
+                ) or any(
+                    task["task_key"] in main_keys or task["task_key"] in batch_shared for task in chunk
+                )
+                size = len(batch_shared.keys() | shared.keys()) + len(batch_mains) + len(chunk)
+                if not conflict and size <= MAX_TASKS_PER_RUN:
+                    for task, spec in shared.items():
+                        batch_shared.setdefault(task, spec)
+                    batch_mains.extend(chunk)
+                    continue
+            batches.append((dict(shared), list(chunk)))
+    
+    submissions = []
+    for index, (shared, mains) in enumerate(batches):
+        submission = submit_run(
+            name if len(batches) == 1 else f"{name}_{index}",
+            cluster_id,
+            base_parameters=base_parameters,
+            job_clusters=job_clusters
+        )
+        for task in [*shared.values(), *mains]:
+            submission.add_task(**task)
+        submissions.append(submission)
+    return submissions
+
+def _task_value_stub_path(global_config: GlobalConfigManager) -> Path:
+    """Path of the task value stub notebook, uploaded once per workspace."""
+    stub_path = Path(global_config.TEST_CACHE_PATH) / TASK_VALUE_STUB
+    if stub_path not in _uploaded_stubs:
+        if not is_notebook(stub_path.as_posix()):
+            make_workspace_dirs(stub_path.parent.as_posix())
+            create_task_value_stub().save_notebook(stub_path.as_posix())
+        _uploaded_stubs.add(stub_path)
+    return stub_path
+
+
 class Notebook:
     def __init__(
         self, 
@@ -49,14 +158,17 @@ class Notebook:
         task_name: Optional[str] = None,
         config: Optional[NotebookConfigManager] = None, 
         cluster: Optional[str] = None, 
-        depends_on: Optional[Union[Notebook, List[Notebook]]] = None
+        depends_on: Optional[Union[Notebook, List[Notebook]]] = None,
+        scope: Literal["function", "module", "session"] = "function"
     ):
         self.notebook_path = notebook_path
         self.task_name = task_name
         self.config = config
         self.cluster = cluster
+        self.scope = scope
         self.depends_on = self._normalize_dependencies(depends_on)
         self.notebook_graph = NotebookGraph()
+        self._transformed = False
         self.global_config = self._initialize_global_config()
         
         self._validate_and_resolve_paths()
@@ -118,6 +230,9 @@ class Notebook:
             not isinstance(self.task_name, str) or not self.task_name.strip()
         ):
             raise NotebookValidationError("task_name must be a non-empty string")
+        
+        if self.scope not in SETUP_SCOPES:
+            raise NotebookValidationError(f"scope must be one of {SETUP_SCOPES}")
             
         if self.config is not None and not isinstance(self.config, NotebookConfigManager):
             raise NotebookValidationError(
@@ -126,11 +241,27 @@ class Notebook:
 
     def _initialize_task_name(self) -> None:
         """Initialize task name if not provided."""
+        self._generated_task_name = self.task_name is None
         if self.task_name is None:
             timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
             notebook_name = Path(self.notebook_path).stem
             self.task_name = f"{notebook_name}_task_{timestamp}"
 
+    def _namespace_task_name(self, test_name: str) -> None:
+        """Name a generated main task after the test running it.
+        
+        Generated names only differ by the second they were created in, so
+        tests defined together would share a task key within a submission.
+        """
+        if not self._generated_task_name or self._transformed:
+            return
+        task_name = f"{test_name}_{Path(self.notebook_path).stem}"
+        self.notebook_graph.nodes[task_name] = self.notebook_graph.nodes.pop(self.task_name)
+        self.notebook_graph.nodes[task_name].task_name = task_name
+        self.notebook_graph.edges[task_name] = self.notebook_graph.edges.pop(self.task_name)
+        self.task_name = task_name
+        self._generated_task_name = False
+
     def _create_main_notebook(self) -> None:
         """Create the main notebook and initialize the graph."""
         self.main_notebook = notebook_builder(self.task_name)
@@ -143,21 +274,30 @@ class Notebook:
         self.notebook_graph.edges[self.task_name] = []
 
     def _transform_notebook(self) -> NotebookGraph:
-        """Transform the notebook to be run in the test cache."""
-        self._add_config_tasks()
-        self._add_main_notebook_cell()
-        self._process_dependencies()
+        """Transform the notebook to be run in the test cache.
+        
+        Dependencies shared by several tests are transformed only once, so
+        every test sees identical setup notebooks.
+        """
+        if self._transformed:
+            return self.notebook_graph
+        self._transformed = True
+        with span("notebook.transform", task=self.task_name):
+            self._add_config_tasks()
+            self._add_main_notebook_cell()
+            self._process_dependencies()
         return self.notebook_graph
 
     def _add_config_tasks(self) -> None:
         """Add configuration tasks to the notebook graph."""
         if self.config is not None:
-            for task, notebook in self.config.create_task_notebooks().items():
+            for task, params in self.config.task_value_parameters().items():
                 self.notebook_graph.nodes[task] = NotebookNode(
                     task_name=task,
-                    notebook=notebook,
+                    notebook=None,
                     type="task",
-                    cluster=self.cluster
+                    cluster=self.cluster,
+                    params=params
                 )
                 self.notebook_graph.edges[self.task_name].append(task)
             
@@ -190,24 +330,51 @@ class Notebook:
 class NotebookTest:
     """Handles notebook testing functionality."""
     
-    
-    def __init__(self, notebook: Optional[Notebook] = None, cluster_id: Optional[str] = None):
+    def __init__(
+        self, 
+        notebook: Optional[Notebook] = None, 
+        cluster_id: Optional[str] = None, 
+        job_cluster: Optional[JobClusterConfig] = None,
+        parametrize: Optional[Dict[str, List[Any]]] = None
+    ):
         self.notebook = notebook
         self.cluster_id = cluster_id
+        self.job_cluster = job_cluster
+        self.parametrize = parametrize or {}
         self.global_config = GlobalConfigManager()
+        self.submissions: List[submit_run] = []
+        self.notebook_paths: Dict[str, Path] = {}
 
     def __call__(self, fn: Union[Callable[..., Any], Type[Any]]):
         self.fn = fn
-        self._validate_inputs()
-        self._initialize_cluster_id()
-        self._initialize_paths()
-        self._setup_environment()
+        with span("test.define", test=fn.__name__):
+            self._validate_inputs()
+            if self.notebook is not None:
+                self.notebook._namespace_task_name(fn.__name__)
+            self._initialize_cluster_id()
+            self._initialize_paths()
+            self._setup_environment()
         return self
 
     def _validate_inputs(self) -> None:
         """Validate input parameters."""
         if self.notebook is not None and not isinstance(self.notebook, Notebook):
             raise NotebookValidationError("notebook must be a Notebook instance")
+        if self.job_cluster is not None and not isinstance(self.job_cluster, JobClusterConfig):
+            raise NotebookValidationError("job_cluster must be a JobClusterConfig instance")
+        if not isinstance(self.parametrize, dict) or not all(
+            isinstance(values, (list, tuple)) and values for values in self.parametrize.values()
+        ):
+            raise NotebookValidationError("parametrize must map widget keys to non-empty lists of values")
+
+    @property
+    def parameter_matrix(self) -> List[Dict[str, str]]:
+        """Every combination of parametrized widget values."""
+        keys = list(self.parametrize)
+        return [
+            dict(zip(keys, map(str, values)))
+            for values in itertools.product(*(self.parametrize[key] for key in keys))
+        ]
 
     def _initialize_cluster_id(self) -> None:
         """Initialize cluster ID from config if not provided."""
@@ -229,72 +396,196 @@ class NotebookTest:
         relative_path = self.current_path.relative_to(self.global_config.TEST_PATH)
         self.test_cache_path = self.global_config.TEST_CACHE_PATH / relative_path.parent / '_test_cache'
         self.notebook_dir = self.test_cache_path / self.current_path.name / 'test_type=notebook' / self.fn.__name__
-        self.task_dir = self.notebook_dir / 'tasks' 
 
     def _setup_cache_paths(self) -> None:
         """Setup paths for cache execution."""
         cache_index = self.current_path.parts.index("_test_cache") + 1
         self.test_cache_path = Path(*self.current_path.parts[:cache_index])
         self.notebook_dir = self.current_path.parent
-        self.task_dir = self.notebook_dir / 'tasks' / self.fn.__name__
 
     def _setup_environment(self) -> None:
-        """Setup the test environment."""
-        if self.is_test:
-            self._create_directories()
-            self._save_test_cache()
+        """Setup the test environment, or defer it to the registry's flush."""
+        if not self.is_test:
+            return
+        registry = get_test_registry()
+        if registry.enabled:
+            registry.register(self)
+            return
+        self._create_directories()
+        self._save_test_cache()
 
     def _create_directories(self) -> None:
         """Create necessary directories for test execution."""
-        for directory in [self.test_cache_path, self.notebook_dir, self.task_dir]:
+        for directory in [self.test_cache_path, self.notebook_dir]:
             directory.mkdir(exist_ok=True, parents=True)
 
     def _save_test_cache(self) -> None:
         """Save the test cache notebook and tasks."""
-        if self.notebook is None:
+        notebook_graph = self._build_test_cache()
+        if notebook_graph is None:
             return
+        
+        with span("test.publish", test=self.fn.__name__):
+            self._publish(notebook_graph)
+        with span("test.plan", test=self.fn.__name__):
+            self._create_submission(notebook_graph)
+
+    def _build_test_cache(self) -> Optional[NotebookGraph]:
+        """Build the graph of notebooks and tasks making up the test."""
+        if self.notebook is None:
+            return None
             
         notebook_graph = self.notebook._transform_notebook()
         main_node = notebook_graph.nodes[self.notebook.task_name]
         
+        # Declare parametrized widgets up front; values arrive as base parameters
+        if self.parametrize:
+            widgets = "\n".join(f"dbutils.widgets.text('{key}', '')" for key in self.parametrize)
+            main_node.notebook.add_cell(f"##### Parametrized DBUtils Widgets #####\n{widgets}\n", index=0)
+        
         # Add test execution cells
         main_node.notebook.add_cell(f"%run {self.current_path}")
         main_node.notebook.add_cell(f"{self.fn.__name__}.run()")
-        
-        self._save_notebooks(notebook_graph)
-        self._create_submission(notebook_graph)
+        return notebook_graph
+
+    def _publish(self, notebook_graph: NotebookGraph, uploaded: Optional[Dict[str, Path]] = None) -> None:
+        """Upload the test notebooks and write the sidecars used by the runner."""
+        self._save_notebooks(notebook_graph, uploaded)
+        self._save_setup(notebook_graph)
+        if self.parametrize:
+            matrix_path = self.notebook_dir / f"{self.notebook.task_name}{MATRIX_SUFFIX}"
+            matrix_path.write_text(json.dumps(self.parameter_matrix))
 
-    def _save_notebooks(self, notebook_graph: NotebookGraph) -> None:
-        """Save all notebooks in the graph."""
+    def _save_notebooks(self, notebook_graph: NotebookGraph, uploaded: Optional[Dict[str, Path]] = None) -> None:
+        """Save all notebooks in the graph.
+        
+        Task value tasks run the shared stub notebook, so only their
+        parameters are saved for the runner. Notebooks found in ``uploaded``
+        (content digest to path) are not uploaded again but referenced.
+        """
+        uploaded = {} if uploaded is None else uploaded
+        main_task = self.notebook.task_name
+        task_values = {}
         for task, node in notebook_graph.nodes.items():
-            save_path = (
-                self.notebook_dir / task 
-                if node.type == "notebook" 
-                else self.task_dir / task
-            )
-            node.notebook.save_notebook(save_path.as_posix())
+            if node.type == "task":
+                self.notebook_paths[task] = _task_value_stub_path(self.global_config)
+                if task in notebook_graph.edges[main_task]:
+                    task_values[task] = node.params
+                continue
+            
+            digest = hashlib.sha256(json.dumps(_notebook_source(node.notebook)).encode("utf-8")).hexdigest()
+            if digest not in uploaded:
+                save_path = self.notebook_dir / task
+                node.notebook.save_notebook(save_path.as_posix())
+                uploaded[digest] = save_path
+            self.notebook_paths[task] = uploaded[digest]
+        
+        if task_values:
+            tasks_path = self.notebook_dir / f"{self.notebook.task_name}{TASKS_SUFFIX}"
+            tasks_path.write_text(json.dumps(task_values))
 
-    def _create_submission(self, notebook_graph: NotebookGraph) -> None:
-        """Create job submission with tasks."""
-        submission = submit_run(self.fn.__name__, self.cluster_id)
-        
-        for task, edges in notebook_graph.edges.items():
-            node = notebook_graph.nodes[task]
-            task_path = (
-                self.task_dir / task 
-                if node.type == "task" 
-                else self.notebook_dir / task
-            )
+    def _save_setup(self, notebook_graph: NotebookGraph) -> None:
+        """Save the dependency notebooks of the test, grouped by scope.
+        
+        Each direct dependency forms a setup group with its own upstream
+        tasks. The group key is a digest of the group's notebooks and
+        parameters, so the runner can recognise the same setup across tests.
+        """
+        groups = []
+        for dependency in self.notebook.depends_on:
+            tasks = {}
+            pending = [dependency.task_name]
+            while pending:
+                task = pending.pop()
+                if task in tasks:
+                    continue
+                node = notebook_graph.nodes[task]
+                tasks[task] = {
+                    "path": self.notebook_paths[task].as_posix(),
+                    "params": node.params,
+                    "depends_on": notebook_graph.edges.get(task, []),
+                    "cluster": node.cluster,
+                }
+                pending.extend(notebook_graph.edges.get(task, []))
             
-            submission.add_task(
-                task_key=task,
-                notebook_path=task_path.as_posix(),
-                cluster_id=node.cluster or self.cluster_id,
-                depend_on=edges if edges else None,
-                params={"trigger_run": "true"}
+            # Generated task names differ between modules, so only content counts
+            contents = sorted(
+                json.dumps([
+                    _notebook_source(node.notebook) if node.notebook is not None else [], 
+                    node.params
+                ], sort_keys=True)
+                for node in (notebook_graph.nodes[task] for task in tasks)
             )
-        self.submission = submission
-        logger.info(f"Created submission: {submission.as_dict()}")
+            groups.append({
+                "task": dependency.task_name,
+                "scope": dependency.scope,
+                "key": hashlib.sha256("\n".join(contents).encode("utf-8")).hexdigest()[:16],
+                "tasks": tasks,
+            })
+        
+        setup_path = self.notebook_dir / f"{self.notebook.task_name}{SETUP_SUFFIX}"
+        setup_path.write_text(json.dumps(groups))
+
+    def _create_submission(self, notebook_graph: NotebookGraph) -> None:
+        """Create job submissions with tasks.
+        
+        Without parametrization this is a single submission mirroring the
+        graph. With parametrization the uploaded test notebook is reused:
+        every combination becomes its own task receiving the widget values as
+        base parameters, while dependency and task value tasks run once per
+        submission. Combinations are split across submissions to stay within
+        the per-run task limit.
+        """
+        self.submissions = _pack_submissions(
+            self.fn.__name__,
+            [self._plan(notebook_graph)],
+            self.cluster_id,
+            self.global_config.snapshot_parameters(),
+            _job_clusters(self.job_cluster)
+        )
+        for submission in self.submissions:
+            logger.info(f"Created submission: {submission.as_dict()}")
+        self.submission = self.submissions[0]
+
+    def _plan(self, notebook_graph: NotebookGraph) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+        """Tasks of the test as ``add_task`` arguments.
+        
+        Returns:
+            Tuple of the shared tasks by task key and the main tasks, one per
+            parameter combination.
+        """
+        main_task = self.notebook.task_name
+        shared = {
+            task: self._graph_task(notebook_graph, task, task)
+            for task in notebook_graph.edges if task != main_task
+        }
+        if not self.parametrize:
+            return shared, [self._graph_task(notebook_graph, main_task, main_task)]
+        return shared, [
+            self._graph_task(notebook_graph, main_task, f"{main_task}__p{index}", params)
+            for index, params in enumerate(self.parameter_matrix)
+        ]
+
+    def _graph_task(
+        self, 
+        notebook_graph: NotebookGraph, 
+        task: str, 
+        task_key: str, 
+        params: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """A graph node as ``add_task`` arguments under the given task key."""
+        node = notebook_graph.nodes[task]
+        edges = notebook_graph.edges[task]
+        
+        # Tasks pinned to a cluster keep it; the rest share the job cluster
+        return {
+            "task_key": task_key,
+            "notebook_path": self.notebook_paths[task].as_posix(),
+            "cluster_id": node.cluster or self.cluster_id,
+            "depend_on": edges if edges else None,
+            "params": {"trigger_run": "true", **node.params, **(params or {})},
+            "job_cluster_key": self.job_cluster.key if self.job_cluster and not node.cluster else None,
+        }
 
     def run(self, debug: bool = False) -> None:
         """Run the notebook test."""
@@ -314,37 +605,187 @@ class NotebookTest:
 
     def _run_debug_mode(self) -> None:
         """Run in debug mode."""
-        run = self.submission.run()
-        logger.info(f"Test execution triggered: {run.run_id}")
+        if self in get_test_registry().pending:
+            logger.warning("Test is registered but not published yet. Call flush() first")
+        for submission in self.submissions:
+            run = submission.run()
+            logger.info(f"Test execution triggered: {run.run_id}")
 
     def _run_test_execution(self) -> None:
-        """Execute the actual test function."""
-        try:
-            self.fn()
-        except AssertionError:
-            logger.error("Test failed due to assertion error")
-        except Exception as e:
-            logger.error(f"Test failed with exception: {e}")
+        """Execute the actual test function and report its outcome.
+        
+        From the test cache the outcome ends the notebook: it is the exit
+        value of a passing test, while a failing test raises
+        ``NotebookTestFailed`` carrying it, so the task fails and can be
+        repaired.
+        """
+        outcome = run_test_function(self.fn)
+        if not outcome.passed:
+            logger.error(f"Test {self.fn.__name__} {outcome.status}: {outcome.message}")
+        if self.is_test:
+            return
+        if outcome.passed:
+            exit_notebook(outcome.to_json())
+            return
+        raise NotebookTestFailed(outcome.to_json())
+
+
+class NotebookTestRegistry:
+    """Collects decorated tests and publishes them as one batch.
+    
+    While enabled, ``NotebookTest`` only records its definition. ``flush``
+    then creates every cache directory once, uploads each distinct notebook
+    once and packs all tests into as few submissions as possible.
+    """
+    
+    def __init__(self) -> None:
+        self.enabled = False
+        self.pending: List[NotebookTest] = []
+        self.submissions: List[submit_run] = []
+        self._directories: Set[Path] = set()
+        self._uploaded: Dict[str, Path] = {}
+
+    def register(self, test: NotebookTest) -> None:
+        self.pending.append(test)
+
+    def flush(self, run: bool = False) -> List[submit_run]:
+        """Publish pending tests.
+        
+        Args:
+            run: Submit the batched plan right away.
+            
+        Returns:
+            The submissions created for the pending tests.
+        """
+        tests, self.pending = self.pending, []
+        with span("registry.flush", tests=len(tests)):
+            return self._publish(tests, run)
+
+    def _publish(self, tests: List[NotebookTest], run: bool) -> List[submit_run]:
+        plans = []
+        published = []
+        for test in tests:
+            notebook_graph = test._build_test_cache()
+            if notebook_graph is None:
+                continue
+            if test.notebook_dir not in self._directories:
+                test.notebook_dir.mkdir(exist_ok=True, parents=True)
+                self._directories.add(test.notebook_dir)
+            with span("test.publish", test=test.fn.__name__):
+                test._publish(notebook_graph, self._uploaded)
+            plans.append(test._plan(notebook_graph))
+            published.append(test)
+        if not plans:
+            return []
+        
+        job_clusters = {}
+        for test in published:
+            job_clusters.update(_job_clusters(test.job_cluster))
+        submissions = _pack_submissions(
+            published[0].current_path.name,
+            plans,
+            published[0].cluster_id,
+            published[0].global_config.snapshot_parameters(),
+            job_clusters
+        )
+        logger.info(f"Published {len(published)} tests in {len(submissions)} submissions")
+        for test in published:
+            test.submissions = submissions
+            test.submission = submissions[0]
+        self.submissions.extend(submissions)
+        
+        if run:
+            for submission in submissions:
+                logger.info(f"Test execution triggered: {submission.run().run_id}")
+        return submissions
+
+
+_registry = None
+
+
+def get_test_registry() -> NotebookTestRegistry:
+    global _registry
+    if _registry is None:
+        _registry = NotebookTestRegistry()
+    return _registry
+
+def defer_registration(enabled: bool = True) -> NotebookTestRegistry:
+    """Record decorated tests until ``flush`` instead of publishing each one."""
+    registry = get_test_registry()
+    registry.enabled = enabled
+    return registry
+
+def flush(run: bool = False) -> List[submit_run]:
+    """Publish every deferred test of this notebook as one batched plan."""
+    return get_test_registry().flush(run=run)
 
 
 class NotebookTestRunner:
-    """Runs multiple notebook tests."""
+    """Runs multiple notebook tests.
+    
+    Test notebooks and cached tests are found in one recursive listing of
+    the workspace and sidecars are read from the /Workspace mount or through
+    the API, so the runner also works outside a notebook. Filters receive
+    notebook IDs (the test notebook path relative to the test path) and test
+    IDs (``<notebook ID>::<test function>``).
     
-    def __init__(self, test_path: str):
+    While the runs are watched, the outcome reported by every main task is
+    collected as soon as its run finishes and passed to the reporters: a
+    summary, ``junit_path`` and the results database when requested, and
+    any given ``reporters``.
+    """
+    
+    def __init__(
+        self, 
+        test_path: str, 
+        retention: Optional[RetentionPolicy] = None, 
+        retry_policy: Optional[RetryPolicy] = None, 
+        job_cluster: Optional[JobClusterConfig] = None,
+        notebook_filter: Optional[Callable[[str], bool]] = None,
+        test_filter: Optional[Callable[[str], bool]] = None,
+        submit_definitions: bool = False,
+        junit_path: Optional[str] = None,
+        record_results: bool = False,
+        reporters: Optional[List[Reporter]] = None
+    ):
+        self.retention = retention
+        self.retry_policy = retry_policy
+        self.job_cluster = job_cluster
+        self.notebook_filter = notebook_filter
+        self.test_filter = test_filter
+        # Run the test notebooks as submitted runs instead of dbutils.notebook.run
+        self.submit_definitions = submit_definitions
+        self.submissions: List[Any] = []
+        self.results: Dict[int, str] = {}
+        self.run_tests: Dict[int, Path] = {}
+        self.skipped: List[Path] = []
+        self.failed_definitions: List[Path] = []
+        self.setup_results: Dict[str, str] = {}
+        self.objects: Dict[str, Any] = {}
+        self._deadline: Optional[float] = None
         self._validate_test_path(test_path)
         self._initialize_config(test_path)
         self._setup_paths()
         self._discover_tests()
+        
+        self.summary = SummaryReporter()
+        reporters = [self.summary, *(reporters or [])]
+        if junit_path:
+            reporters.append(JUnitXmlReporter(junit_path))
+        if record_results:
+            reporters.append(ResultsDatabaseReporter(self.test_path.as_posix()))
+        self.reporter = ReporterGroup(reporters)
 
     def _validate_test_path(self, test_path: str) -> None:
         """Validate that the test path exists."""
-        if not Path(test_path).exists():
+        if not Path(test_path).exists() and not is_directory(test_path):
             raise NotebookValidationError(f"Test path does not exist: {test_path}")
 
     def _initialize_config(self, test_path: str) -> None:
-        """Initialize global configuration."""
+        """Initialize global configuration, preferring a snapshot for the same test path."""
         self.global_config = GlobalConfigManager()
-        self.global_config._load_config_from_test_path(test_path=test_path)
+        if not (self.global_config._load_config_from_snapshot() and self.global_config.TEST_PATH == test_path):
+            self.global_config._load_config_from_test_path(test_path=test_path)
         self.cluster_id = self.global_config.CLUSTER_ID
 
     def _setup_paths(self) -> None:
@@ -352,59 +793,356 @@ class NotebookTestRunner:
         self.test_path = Path(self.global_config.TEST_PATH)
         self.test_cache_path = Path(self.global_config.TEST_CACHE_PATH)
 
+    def notebook_id(self, test_notebook: Path) -> str:
+        """Path of a test notebook relative to the test path."""
+        return test_notebook.relative_to(self.test_path).as_posix().split(".")[0]
+
+    def test_id(self, cached_test: Path) -> str:
+        """``<notebook ID>::<test function>`` of a cached test."""
+        # <test cache>/<folders>/_test_cache/<test notebook>/test_type=notebook/<test function>/<test>
+        parts = cached_test.relative_to(self.test_cache_path).parts
+        index = parts.index("_test_cache")
+        return f"{'/'.join(parts[:index] + parts[index + 1:index + 2])}::{parts[index + 3]}"
+
+    def _notebooks(self, root: Path) -> List[Path]:
+        return sorted(
+            Path(path) for path, object_type in self.objects.items()
+            if object_type == ObjectType.NOTEBOOK and Path(path).is_relative_to(root)
+        )
+
+    def _read_json(self, path: Path, default: Any) -> Any:
+        """A sidecar listed during discovery, or the default if there is none."""
+        if path.as_posix() not in self.objects:
+            return default
+        return json.loads(read_workspace_file(path.as_posix()))
+
+    @traced("runner.discover")
     def _discover_tests(self) -> None:
-        """Discover test notebooks and cached tests."""
-        self.tests = [
-            f for f in self.test_path.rglob("*")
-            if is_notebook(f.as_posix()) and '_test_cache' not in f.parts
+        """Discover selected test notebooks and their cached tests."""
+        self.objects = {}
+        roots = [self.test_path]
+        if not self.test_cache_path.is_relative_to(self.test_path):
+            roots.append(self.test_cache_path)
+        for root in roots:
+            self.objects.update(list_workspace(root.as_posix()))
+        
+        test_cache = [
+            f for f in self._notebooks(self.test_cache_path)
+            if 'test_type=notebook' in f.parts and 'tasks' not in f.parts
         ]
         
-        self.test_cache = [
-            f for f in self.test_cache_path.rglob("*")
-            if ('test_type=notebook' in f.parts and 
-                'tasks' not in f.parts and 
-                is_notebook(f.as_posix()))
+        # Dependency notebooks are saved next to the tests using them
+        setup_notebooks = {
+            spec["path"]
+            for cached_test in test_cache
+            for group in self._load_setup(cached_test)
+            for spec in group["tasks"].values()
+        }
+        test_cache = [
+            f for f in test_cache
+            if (f.parent / f.name.split(".")[0]).as_posix() not in setup_notebooks
+            and (self.test_filter is None or self.test_filter(self.test_id(f)))
         ]
+        
+        # With a test filter, notebooks are kept if their name or a cached test matches
+        cached_notebooks = {self.test_id(f).split("::")[0] for f in test_cache}
+        self.tests = [
+            f for f in self._notebooks(self.test_path)
+            if '_test_cache' not in f.parts
+            and (self.notebook_filter is None or self.notebook_filter(self.notebook_id(f)))
+            and (self.test_filter is None or self.test_filter(self.notebook_id(f)) or self.notebook_id(f) in cached_notebooks)
+        ]
+        selected = {self.notebook_id(f) for f in self.tests}
+        self.test_cache = [f for f in test_cache if self.test_id(f).split("::")[0] in selected]
+
+    def _remaining(self) -> Optional[float]:
+        """Seconds left until the run deadline, None without a timeout."""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
 
-    def run(self) -> List[Any]:
-        """Run all discovered tests."""
+    @traced("runner.run")
+    def run(self, timeout: Optional[float] = None) -> List[Any]:
+        """Run all discovered tests.
+        
+        Args:
+            timeout: Seconds for the whole run; runs still unfinished are
+                cancelled and reported as "TIMEDOUT".
+        """
+        self._deadline = None if timeout is None else time.monotonic() + timeout
         logger.info(f"Running {len(self.tests)} test notebooks")
         
-        # Run original test notebooks
-        for test_notebook in self.tests:
-            notebook_path = test_notebook.as_posix().split(".")[0]
-            run_notebook(notebook_path, params={"trigger_run": "true"})
+        # Run original test notebooks, then pick up the cache they refreshed
+        self._define_tests()
+        self._discover_tests()
 
         logger.info(f"Found {len(self.test_cache)} cached tests")
         
+        # Module and session setup runs first; its tests are held back until it finishes
+        self._run_setups()
+        
         # Run cached test submissions
         runs = []
+        # Test ID of every outcome to expect, one per main task
+        planned: List[str] = []
+        skipped: List[NotebookTestOutcome] = []
         for cached_test in self.test_cache:
-            submission = self._create_cached_test_submission(cached_test)
-            runs.append(submission.run())
+            setup = self._load_setup(cached_test)
+            failed = self._failed_setups(cached_test, setup)
+            if failed:
+                logger.error(f"Skipping {cached_test}: shared setup failed: {failed}")
+                self.skipped.append(cached_test)
+                skipped.append(NotebookTestOutcome(SKIPPED, message=f"Shared setup failed: {failed}", test_id=self.test_id(cached_test)))
+                continue
+            for submission in self._create_cached_test_submissions(cached_test, setup):
+                self.submissions.append(submission)
+                run = submission.run()
+                self.run_tests[run.run_id] = cached_test
+                runs.append(run)
+                planned.extend(
+                    self.test_id(cached_test) for task in submission.tasks if self._is_main_task(run.run_id, task.task_key)
+                )
         
+        self._retry_failed_runs(runs, planned, skipped)
+        self._apply_retention()
+        report_api_profile()
         return runs
 
-    def _create_cached_test_submission(self, cached_test: Path) -> Any:
-        """Create submission for a cached test."""
-        test_name = cached_test.name.split(".")[0]
-        submission = submit_run(test_name, self.cluster_id)
+    @traced("runner.define")
+    def _define_tests(self) -> None:
+        """Run the test notebooks so their decorators refresh the test cache."""
+        if not self.submit_definitions:
+            for test_notebook in self.tests:
+                notebook_path = test_notebook.as_posix().split(".")[0]
+                run_notebook(notebook_path, params={"trigger_run": "true"})
+            return
+        if not self.tests:
+            return
         
-        # Add task submissions
-        tasks_dir = cached_test.parent / 'tasks' / test_name
-        for task_path in tasks_dir.iterdir():
-            task_name = task_path.name.split(".")[0]
+        # One task per test notebook, packed into as few runs as possible
+        job_cluster_key = self.job_cluster.key if self.job_cluster else None
+        notebooks = {f"define_{index}": test_notebook for index, test_notebook in enumerate(self.tests)}
+        plans = [
+            ({}, [{
+                "task_key": task_key,
+                "notebook_path": test_notebook.as_posix().split(".")[0],
+                "cluster_id": self.cluster_id,
+                "depend_on": None,
+                "params": {"trigger_run": "true"},
+                "job_cluster_key": job_cluster_key,
+            }])
+            for task_key, test_notebook in notebooks.items()
+        ]
+        submissions = _pack_submissions(
+            "define_tests", plans, self.cluster_id, self.global_config.snapshot_parameters(), _job_clusters(self.job_cluster)
+        )
+        runs = []
+        for submission in submissions:
+            self.submissions.append(submission)
+            runs.append(submission.run(priority=-1).run_id)
+        
+        results = RunRetrier(RetryPolicy(max_attempts=1)).watch(runs, timeout=self._remaining())
+        for run_id, result in results.items():
+            if result == "SUCCESS":
+                continue
+            tasks = get_run(run_id).tasks or []
+            self.failed_definitions.extend(
+                notebooks[task.task_key] for task in tasks 
+                if task.task_key in notebooks and (result == "TIMEDOUT" or task_failed(task))
+            )
+        if self.failed_definitions:
+            logger.error(f"Test notebooks failed to define their tests: {self.failed_definitions}")
+
+    @traced("runner.wait")
+    def _retry_failed_runs(
+        self, 
+        runs: List[Any], 
+        planned: Optional[List[str]] = None, 
+        skipped: Optional[List[NotebookTestOutcome]] = None
+    ) -> None:
+        """Wait for the runs, repairing failed tasks as the retry policy allows.
+        
+        Without a retry policy every run is watched once and never repaired.
+        The outcomes of a run are collected on a thread pool as soon as it
+        finishes, so reporters see every test as it completes.
+        
+        Args:
+            runs: Submitted runs of cached tests.
+            planned: Test ID of every outcome to expect from the runs.
+            skipped: Outcomes of tests that were not submitted.
+        """
+        skipped = skipped or []
+        self.reporter.start((planned or []) + [outcome.test_id for outcome in skipped])
+        for outcome in skipped:
+            self.reporter.test_finished(outcome)
+        
+        self.retrier = RunRetrier(self.retry_policy or RetryPolicy(max_attempts=1))
+        try:
+            with ThreadPoolExecutor(max_workers=OUTCOME_WORKERS) as pool:
+                self.results = self.retrier.watch(
+                    (run.run_id for run in runs), 
+                    timeout=self._remaining(),
+                    on_result=lambda run_id, result: pool.submit(self._report_run, run_id)
+                )
+        finally:
+            # Reports of the finished tests stay complete if watching is interrupted
+            self.reporter.finish()
+            # Runs are final or abandoned, so transient job-cluster jobs are no longer needed
+            for submission in self.submissions:
+                try:
+                    submission.cleanup()
+                except Exception as e:
+                    logger.warning(f"Unable to delete the transient job of {submission.name}: {e}")
+        if self.retrier.flaky:
+            logger.warning(f"Flaky tests (passed after retry): {self.retrier.flaky}")
+
+    def _is_main_task(self, run_id: int, task_key: str) -> bool:
+        test_name = self.run_tests[run_id].name.split(".")[0]
+        return task_key == f"{test_name}_task" or task_key.startswith(f"{test_name}_task__p")
+
+    def _report_run(self, run_id: int) -> None:
+        """Pass the outcomes of a finished run to the reporters."""
+        test_id = self.test_id(self.run_tests[run_id])
+        try:
+            outcomes = run_outcomes(run_id, test_id, self._is_main_task)
+        except Exception as e:
+            logger.warning(f"Unable to collect the outcomes of run {run_id}: {e}")
+            outcomes = [NotebookTestOutcome(ERROR, message=f"Outcomes not collected: {e}", test_id=test_id, run_id=run_id)]
+        for outcome in outcomes:
+            self.reporter.test_finished(outcome)
+
+    @traced("runner.retention")
+    def _apply_retention(self) -> None:
+        """Roll up and compact old result history if a policy is set."""
+        if self.retention is None:
+            return
+        try:
+            run_retention_if_due(self.retention)
+        except Exception as e:
+            logger.warning(f"Result history retention failed: {e}")
+
+    def _load_setup(self, cached_test: Path) -> List[Dict[str, Any]]:
+        """Setup groups saved for a cached test."""
+        return self._read_json(cached_test.parent / f"{cached_test.name.split('.')[0]}{SETUP_SUFFIX}", [])
+
+    @staticmethod
+    def _setup_id(cached_test: Path, group: Dict[str, Any]) -> str:
+        """Identity of a setup group within one runner invocation."""
+        if group["scope"] == "session":
+            return group["key"]
+        # <test cache>/<test notebook>/test_type=notebook/<test function>/<test>
+        return f"{cached_test.parents[2].as_posix()}:{group['key']}"
+
+    def _add_setup_tasks(self, submission: submit_run, group: Dict[str, Any]) -> None:
+        """Add the tasks of a setup group to a submission."""
+        job_cluster_key = self.job_cluster.key if self.job_cluster else None
+        for task, spec in group["tasks"].items():
             submission.add_task(
-                task_name,
-                task_path.as_posix().split(".")[0],
-                params={"trigger_run": "true"}
+                task,
+                spec["path"],
+                params={"trigger_run": "true", **spec["params"]},
+                depend_on=spec["depends_on"] or None,
+                cluster_id=spec["cluster"],
+                job_cluster_key=job_cluster_key if not spec["cluster"] else None
+            )
+
+    @traced("runner.setup")
+    def _run_setups(self, cached_tests: Optional[List[Path]] = None) -> Dict[str, str]:
+        """Run every module and session scoped setup group once and wait for it.
+        
+        Args:
+            cached_tests: Tests whose setup is needed, all discovered tests by
+                default. Groups that already ran in this runner are skipped.
+        
+        Returns:
+            Dictionary mapping setup IDs to "SUCCESS" or "FAILED".
+        """
+        setups = {}
+        for cached_test in self.test_cache if cached_tests is None else cached_tests:
+            for group in self._load_setup(cached_test):
+                setup_id = self._setup_id(cached_test, group)
+                if group["scope"] != "function" and setup_id not in self.setup_results:
+                    setups.setdefault(setup_id, group)
+        if not setups:
+            return self.setup_results
+        
+        logger.info(f"Running {len(setups)} shared setup groups")
+        runs = {}
+        for setup_id, group in setups.items():
+            submission = submit_run(
+                f"setup_{group['task']}", 
+                self.cluster_id, 
+                base_parameters=self.global_config.snapshot_parameters(),
+                job_clusters=_job_clusters(self.job_cluster)
             )
+            self._add_setup_tasks(submission, group)
+            self.submissions.append(submission)
+            runs[submission.run(priority=-1).run_id] = setup_id
         
-        # Add main task
-        submission.add_task(
-            f"{test_name}_task",
-            cached_test.as_posix().split(".")[0],
-            params={"trigger_run": "true"}
-        )
+        results = RunRetrier(self.retry_policy or RetryPolicy(max_attempts=1)).watch(runs, timeout=self._remaining())
+        self.setup_results.update((runs[run_id], result) for run_id, result in results.items())
+        return self.setup_results
+
+    def _failed_setups(self, cached_test: Path, setup: List[Dict[str, Any]]) -> List[str]:
+        """Module and session scoped setup groups of a test that did not succeed."""
+        return [
+            group["task"] for group in setup
+            if group["scope"] != "function" and self.setup_results.get(self._setup_id(cached_test, group)) != "SUCCESS"
+        ]
+
+    def _create_cached_test_submissions(
+        self, 
+        cached_test: Path, 
+        setup: Optional[List[Dict[str, Any]]] = None
+    ) -> List[submit_run]:
+        """Create submissions for a cached test, one per parameter matrix chunk.
+        
+        Function scoped setup groups run inside every submission; module and
+        session scoped groups have already finished in their own runs.
+        """
+        test_name = cached_test.name.split(".")[0]
+        job_cluster_key = self.job_cluster.key if self.job_cluster else None
+        task_values = self._read_json(cached_test.parent / f"{test_name}{TASKS_SUFFIX}", {})
+        stub_path = _task_value_stub_path(self.global_config).as_posix() if task_values else None
+        
+        matrix = self._read_json(cached_test.parent / f"{test_name}{MATRIX_SUFFIX}", None)
+        parametrized = matrix is not None
+        matrix = matrix if parametrized else [{}]
+        function_setup = [group for group in setup or [] if group["scope"] == "function"]
+        upstream = list(task_values) + [group["task"] for group in function_setup]
+        chunks = _matrix_chunks(matrix, len(task_values) + sum(len(group["tasks"]) for group in function_setup))
+        
+        submissions = []
+        start = 0
+        for index, chunk in enumerate(chunks):
+            submission = submit_run(
+                test_name if len(chunks) == 1 else f"{test_name}_{index}", 
+                self.cluster_id, 
+                base_parameters=self.global_config.snapshot_parameters(),
+                job_clusters=_job_clusters(self.job_cluster)
+            )
+            
+            # Add task value tasks, all running the shared stub notebook
+            for task_name, params in task_values.items():
+                submission.add_task(
+                    task_name,
+                    stub_path,
+                    params=params,
+                    job_cluster_key=job_cluster_key
+                )
+            for group in function_setup:
+                self._add_setup_tasks(submission, group)
+            
+            # Add main task, once per widget combination
+            for offset, params in enumerate(chunk):
+                submission.add_task(
+                    f"{test_name}_task__p{start + offset}" if parametrized else f"{test_name}_task",
+                    cached_test.as_posix().split(".")[0],
+                    params={"trigger_run": "true", **params},
+                    depend_on=upstream or None,
+                    job_cluster_key=job_cluster_key
+                )
+            start += len(chunk)
+            submissions.append(submission)
         
-        return submission
\ No newline at end of file
+        return submissions
@@ -0,0 +1,215 @@
+"""Structured outcomes of notebook tests.
+
+A cached test reports how it went as a compact JSON document: a passing test
+ends its notebook with the outcome as exit value and a failing test raises
+``NotebookTestFailed`` with the outcome as message, so its task still fails
+and can be repaired. The runner reads the outputs of the main tasks back with
+``run_outcomes`` or ``collect_outcomes`` and hands them to its reporters.
+"""
+from dbx_tester.retry import latest_tasks
+from dbx_tester.utils.databricks_api import get_run, get_run_output
+from dbx_tester.utils.tracing import span
+
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+PASSED = "SUCCESS"
+FAILED = "FAILED"
+ERROR = "ERROR"
+# Reported by the runner for tests held back by a failed shared setup
+SKIPPED = "SKIPPED"
+
+# First key of every outcome document, found again in exit values and error messages
+OUTCOME_MARKER = "dbx_tester_outcome"
+OUTCOME_VERSION = 1
+# Exit values and error messages are truncated by the Jobs API well above these
+MAX_MESSAGE_CHARS = 2000
+MAX_TRACE_CHARS = 6000
+# Task results of tasks that never started, so have no output
+NOT_STARTED_RESULTS = {"UPSTREAM_FAILED", "UPSTREAM_CANCELED", "EXCLUDED"}
+
+_metrics: Dict[str, Any] = {}
+
+
+class NotebookTestFailed(Exception):
+    """Fails the task of a cached test; the message is the outcome document."""
+
+
+@dataclass
+class NotebookTestOutcome:
+    """Outcome of one main task of a cached test.
+
+    Attributes:
+        status: "SUCCESS", "FAILED" for a failed assertion, "ERROR" for any
+            other exception and for tasks that did not report an outcome, or
+            "SKIPPED".
+        message: Assertion or exception message.
+        started_at: Start of the test function, seconds since the epoch.
+        duration_seconds: Wall time of the test function.
+        metrics: Values recorded with ``record_metric``.
+        trace: End of the traceback of a failure.
+        test_id: Test ID of the cached test, set by the runner.
+        task_key: Main task reporting the outcome, set by the runner.
+        run_id: Submitted run holding the task, set by the runner.
+    """
+    status: str
+    message: Optional[str] = None
+    started_at: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    trace: Optional[str] = None
+    test_id: Optional[str] = None
+    task_key: Optional[str] = None
+    run_id: Optional[int] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.status == PASSED
+
+    def to_json(self) -> str:
+        """Compact document reported by the notebook, without runner fields."""
+        document = {
+            OUTCOME_MARKER: OUTCOME_VERSION,
+            "status": self.status,
+            "message": self.message,
+            "started_at": self.started_at,
+            "duration_seconds": self.duration_seconds,
+            "metrics": self.metrics or None,
+            "trace": self.trace,
+        }
+        return json.dumps({key: value for key, value in document.items() if value is not None}, separators=(",", ":"), default=str)
+
+    @classmethod
+    def from_text(cls, text: Optional[str]) -> Optional["NotebookTestOutcome"]:
+        """Outcome document within an exit value or error message, None if there is none."""
+        start = text.find(f'{{"{OUTCOME_MARKER}"') if text else -1
+        if start < 0:
+            return None
+        try:
+            document, _ = json.JSONDecoder().raw_decode(text, start)
+        except ValueError:
+            return None
+        return cls(
+            status=document.get("status", ERROR),
+            message=document.get("message"),
+            started_at=document.get("started_at"),
+            duration_seconds=document.get("duration_seconds"),
+            metrics=document.get("metrics") or {},
+            trace=document.get("trace")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def record_metric(name: str, value: Any) -> None:
+    """Attach a value to the outcome of the running test, e.g. rows processed."""
+    _metrics[name] = value
+
+
+def _truncate(text: Optional[str], limit: int, keep_end: bool = False) -> Optional[str]:
+    if text is None or len(text) <= limit:
+        return text
+    return "..." + text[-limit:] if keep_end else text[:limit] + "..."
+
+
+def run_test_function(fn: Callable[[], Any]) -> NotebookTestOutcome:
+    """Call a test function and describe how it went."""
+    _metrics.clear()
+    started_at = time.time()
+    start = time.perf_counter()
+    status, message, trace = PASSED, None, None
+    try:
+        fn()
+    except AssertionError as e:
+        status, message, trace = FAILED, str(e) or "AssertionError", traceback.format_exc()
+    except Exception as e:
+        status, message, trace = ERROR, f"{type(e).__name__}: {e}", traceback.format_exc()
+    return NotebookTestOutcome(
+        status,
+        message=_truncate(message, MAX_MESSAGE_CHARS),
+        started_at=started_at,
+        duration_seconds=round(time.perf_counter() - start, 3),
+        metrics=dict(_metrics),
+        trace=_truncate(trace, MAX_TRACE_CHARS, keep_end=True)
+    )
+
+
+def _value(state: Any) -> Optional[str]:
+    return getattr(state, "value", state)
+
+
+def _state_outcome(task: Any, error: Optional[str]) -> NotebookTestOutcome:
+    """Outcome of a task that did not report one, from its state."""
+    result = _value(task.state.result_state) if task.state else None
+    message = None
+    if result != PASSED:
+        message = error or (task.state.state_message if task.state else None) or f"Task {result or 'did not finish'}"
+    start, end = getattr(task, "start_time", None), getattr(task, "end_time", None)
+    return NotebookTestOutcome(
+        PASSED if result == PASSED else ERROR,
+        message=_truncate(message, MAX_MESSAGE_CHARS),
+        started_at=start / 1000 if start else None,
+        duration_seconds=(end - start) / 1000 if start and end else None
+    )
+
+
+def _task_outcome(run_id: int, task: Any, test_id: str) -> NotebookTestOutcome:
+    outcome, error = None, None
+    result = _value(task.state.result_state) if task.state else None
+    if getattr(task, "run_id", None) is not None and result not in NOT_STARTED_RESULTS:
+        try:
+            output = get_run_output(task.run_id)
+            exit_value = output.notebook_output.result if output.notebook_output else None
+            error = output.error
+            outcome = NotebookTestOutcome.from_text(exit_value) or NotebookTestOutcome.from_text(error)
+        except Exception as e:
+            logger.warning(f"Unable to read the output of task {task.task_key} in run {run_id}: {e}")
+    if outcome is None:
+        outcome = _state_outcome(task, error)
+    outcome.test_id, outcome.task_key, outcome.run_id = test_id, task.task_key, run_id
+    return outcome
+
+
+def run_outcomes(run_id: int, test_id: str, is_main_task: Callable[[int, str], bool]) -> List[NotebookTestOutcome]:
+    """Outcomes reported by the main tasks of one finished run."""
+    return [
+        _task_outcome(run_id, task, test_id)
+        for task in latest_tasks(get_run(run_id)) if is_main_task(run_id, task.task_key)
+    ]
+
+
+def collect_outcomes(
+    runs: Dict[int, str],
+    is_main_task: Callable[[int, str], bool],
+    max_workers: int = 16
+) -> List[NotebookTestOutcome]:
+    """Outcomes reported by the main tasks of finished runs.
+
+    Runs, then the outputs of their main tasks, are fetched concurrently; the
+    admission controller keeps the calls within the jobs API rate limit.
+
+    Args:
+        runs: Test ID of every run to collect.
+        is_main_task: Whether a task key of a run is a main task.
+        max_workers: Concurrent API calls.
+    """
+    if not runs:
+        return []
+    with span("outcomes.collect", runs=len(runs)):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            details = dict(zip(runs, pool.map(get_run, runs)))
+            tasks = [
+                (run_id, task) for run_id, run in details.items()
+                for task in latest_tasks(run) if is_main_task(run_id, task.task_key)
+            ]
+            return list(pool.map(lambda item: _task_outcome(item[0], item[1], runs[item[0]]), tasks))
+
@@ -0,0 +1,236 @@
+"""pytest plugin running Databricks notebook tests as pytest items.
+
+Enabled with ``--dbx-test-path`` (or the ``dbx_test_path`` ini option)::
+
+    pytest --dbx-test-path /Workspace/Repos/me/project/tests -n 16 --junitxml=report.xml
+
+Every cached test in the test cache becomes an item named by its test ID,
+``<test notebook>::<test function>`` with the notebook relative to the test
+path, covering ``NotebookTest`` and ``JobTest`` definitions. With
+``--dbx-static`` the items come from parsing the test notebooks instead and
+are matched to the test cache when they run.
+
+An item submits its runs and waits for them when it runs, so under
+pytest-xdist each worker collects the tests and submits and watches the runs
+of the items it is given. Outcomes are reported as each item finishes. JUnit
+XML, ``-k``, ``--lf`` and ``--ff`` work on these items like on any other;
+run IDs and the metrics reported by the tests are recorded as user
+properties, and failures show the assertion message reported by the test.
+
+Module and session scoped setup runs once per process before the first item
+that needs it, the way pytest-xdist runs session fixtures once per worker.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import pytest
+
+logger = logging.getLogger(__name__)
+
+
+class NotebookTestFailure(Exception):
+    pass
+
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup("dbx_tester", "Databricks notebook tests")
+    group.addoption("--dbx-test-path", default=None, help="workspace test path of a configuration entry")
+    group.addoption("--dbx-config", default=None, help="workspace path of the configuration file")
+    group.addoption(
+        "--dbx-define", action="store_true",
+        help="run the test notebooks before collection so the test cache is current"
+    )
+    group.addoption(
+        "--dbx-static", action="store_true",
+        help="collect tests by parsing the test notebooks instead of listing the test cache"
+    )
+    group.addoption("--dbx-retries", type=int, default=0, help="repairs of failed tasks per run")
+    group.addoption("--dbx-timeout", type=float, default=None, help="seconds to wait for the runs of one test")
+    group.addoption("--dbx-poll-interval", type=float, default=10.0, help="seconds between run state checks")
+    parser.addini("dbx_test_path", "workspace test path of a configuration entry", default=None)
+
+
+def pytest_configure(config: Any) -> None:
+    test_path = config.getoption("dbx_test_path") or config.getini("dbx_test_path")
+    if test_path:
+        config.pluginmanager.register(DbxTesterPlugin(config, test_path), "dbx_tester_session")
+
+
+class DbxTesterPlugin:
+    """Session state: the runner holding discovery, sidecars and setup results."""
+
+    def __init__(self, config: Any, test_path: str):
+        self.config = config
+        self.test_path = test_path
+        self._runner_instance = None
+        self._cached_tests: Optional[Dict[str, Path]] = None
+
+    @property
+    def is_worker(self) -> bool:
+        return hasattr(self.config, "workerinput")
+
+    def _runner(self, submit_definitions: bool = False) -> Any:
+        # Imported here so that merely installing the plugin costs nothing
+        from dbx_tester.cli import CommandLineError, resolve_config
+        from dbx_tester.global_config import ConfigurationError
+        from dbx_tester.notebook import NotebookTestRunner, NotebookValidationError
+        from dbx_tester.retry import RetryPolicy
+
+        try:
+            resolve_config(self.test_path, self.config.getoption("dbx_config"))
+            return NotebookTestRunner(
+                self.test_path,
+                retry_policy=RetryPolicy(max_attempts=self.config.getoption("dbx_retries") + 1),
+                submit_definitions=submit_definitions
+            )
+        except (CommandLineError, ConfigurationError, NotebookValidationError) as e:
+            raise pytest.UsageError(str(e))
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionstart(self, session: Any) -> None:
+        # Before pytest-xdist starts its workers, so they all collect the refreshed cache
+        if not self.config.getoption("dbx_define") or self.is_worker:
+            return
+        runner = self._runner(submit_definitions=True)
+        runner._define_tests()
+        if runner.failed_definitions:
+            reporter = self.config.pluginmanager.get_plugin("terminalreporter")
+            for notebook in runner.failed_definitions:
+                message = f"dbx-tester: test notebook failed to define its tests: {notebook}"
+                if reporter is not None:
+                    reporter.write_line(message, red=True)
+                else:
+                    logger.error(message)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, session: Any, config: Any, items: List[Any]) -> None:
+        notebooks: Dict[str, List[Tuple[str, Optional[Path]]]] = {}
+        if config.getoption("dbx_static"):
+            from dbx_tester.scanner import NotebookScanner
+
+            scanner = NotebookScanner(self.test_path)
+            for test in scanner.scan():
+                notebooks.setdefault(test.notebook_id, []).append((test.name, None))
+            # Reported like a test module that fails to import
+            for notebook_id, error in scanner.errors.items():
+                config.hook.pytest_collectreport(report=pytest.CollectReport(notebook_id, "failed", error, []))
+        else:
+            for cached_test in self.runner.test_cache:
+                notebook_id, name = self.runner.test_id(cached_test).split("::")
+                notebooks.setdefault(notebook_id, []).append((name, cached_test))
+
+        for notebook_id, tests in sorted(notebooks.items()):
+            collector = NotebookCollector.from_parent(session, name=notebook_id, nodeid=notebook_id, tests=tests, plugin=self)
+            collected = collector.collect()
+            # Counted by the terminal reporter and --lf like collected files
+            config.hook.pytest_collectreport(report=pytest.CollectReport(collector.nodeid, "passed", None, collected))
+            items.extend(collected)
+
+    @property
+    def runner(self) -> Any:
+        """Runner of the test cache, created on first use."""
+        if self._runner_instance is None:
+            self._runner_instance = self._runner()
+        return self._runner_instance
+
+    def cached_test(self, test_id: str) -> Optional[Path]:
+        """Cached test of a statically collected test."""
+        if self._cached_tests is None:
+            self._cached_tests = {self.runner.test_id(cached_test): cached_test for cached_test in self.runner.test_cache}
+        return self._cached_tests.get(test_id)
+
+
+class NotebookCollector(pytest.Collector):
+    """Tests of one test notebook."""
+
+    def __init__(self, *, tests: List[Tuple[str, Optional[Path]]], plugin: DbxTesterPlugin, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.tests = tests
+        self.plugin = plugin
+
+    def collect(self) -> List["NotebookTestItem"]:
+        names = [name for name, _ in self.tests]
+        return [
+            NotebookTestItem.from_parent(
+                self,
+                # A test function caches one test unless it has several main notebooks
+                name=name if names.count(name) == 1 or cached_test is None else f"{name}[{cached_test.name.split('.')[0]}]",
+                cached_test=cached_test
+            )
+            for name, cached_test in sorted(self.tests, key=lambda test: (test[0], str(test[1])))
+        ]
+
+
+class NotebookTestItem(pytest.Item):
+    """One cached test, run as submitted runs."""
+
+    def __init__(self, *, cached_test: Optional[Path], **kwargs: Any):
+        super().__init__(**kwargs)
+        self.cached_test = cached_test
+        self.setup_groups: List[Dict[str, Any]] = []
+
+    @property
+    def runner(self) -> Any:
+        return self.parent.plugin.runner
+
+    def setup(self) -> None:
+        if self.cached_test is None:
+            self.cached_test = self.parent.plugin.cached_test(self.nodeid)
+            if self.cached_test is None:
+                raise NotebookTestFailure(
+                    f"{self.nodeid} is not in the test cache; run its test notebook or pass --dbx-define"
+                )
+        self.setup_groups = self.runner._load_setup(self.cached_test)
+        self.runner._run_setups([self.cached_test])
+        failed = self.runner._failed_setups(self.cached_test, self.setup_groups)
+        if failed:
+            raise NotebookTestFailure(f"Shared setup failed: {failed}")
+
+    def runtest(self) -> None:
+        from dbx_tester.outcome import collect_outcomes
+        from dbx_tester.retry import RunRetrier
+        from dbx_tester.utils.databricks_api import get_run
+
+        submissions = self.runner._create_cached_test_submissions(self.cached_test, self.setup_groups)
+        run_ids = []
+        for submission in submissions:
+            run_id = submission.run().run_id
+            run_ids.append(run_id)
+            self.runner.run_tests[run_id] = self.cached_test
+            self.user_properties.append(("run_id", run_id))
+
+        retrier = RunRetrier(self.runner.retry_policy, poll_interval=self.config.getoption("dbx_poll_interval"))
+        try:
+            results = retrier.watch(run_ids, timeout=self.config.getoption("dbx_timeout"))
+        finally:
+            for submission in submissions:
+                submission.cleanup()
+        for run_id, tasks in retrier.flaky.items():
+            self.user_properties.append(("flaky", f"{run_id}: {', '.join(tasks)}"))
+
+        test_id = self.runner.test_id(self.cached_test)
+        outcomes = collect_outcomes({run_id: test_id for run_id in results}, self.runner._is_main_task)
+        for outcome in outcomes:
+            self.user_properties.extend(sorted(outcome.metrics.items()))
+
+        failed = [(run_id, result) for run_id, result in results.items() if result != "SUCCESS"]
+        if failed:
+            lines = []
+            for outcome in outcomes:
+                if not outcome.passed:
+                    lines.append(f"{outcome.task_key} {outcome.status}: {outcome.message}")
+                    if outcome.trace:
+                        lines.append(outcome.trace)
+            for run_id, result in failed:
+                url = getattr(get_run(run_id), "run_page_url", None)
+                lines.append(f"Run {run_id} {result}" + (f": {url}" if url else ""))
+            raise NotebookTestFailure("\n".join(lines))
+
+    def repr_failure(self, excinfo: Any, style: Optional[str] = None) -> Any:
+        if isinstance(excinfo.value, NotebookTestFailure):
+            return str(excinfo.value)
+        return super().repr_failure(excinfo, style=style)
+
+    def reportinfo(self) -> Any:
+        return self.parent.name, None, self.name
@@ -0,0 +1,318 @@
+"""Streaming reporters of test outcomes.
+
+``NotebookTestRunner`` calls its reporters as the run goes: ``start`` with
+the test ID of every outcome to expect, ``test_finished`` as soon as the
+outcome of a main task is known and ``finish`` once every run is done.
+Reporters write as they receive outcomes and keep only counters, so memory
+does not grow with the suite and an interrupted run leaves its reports of
+the tests that finished.
+"""
+from dbx_tester.db.history import HistoryError, median_durations
+from dbx_tester.db.notebook import add_notebook_tests, log_events, log_notebook_test
+from dbx_tester.outcome import ERROR, FAILED, PASSED, SKIPPED, NotebookTestOutcome
+
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, TextIO, Tuple
+from xml.sax.saxutils import quoteattr
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+
+def case_name(outcome: NotebookTestOutcome) -> str:
+    """Test function of an outcome, with the task key of a parametrized task."""
+    name = (outcome.test_id or "").partition("::")[2]
+    return f"{name}[{outcome.task_key}]" if outcome.task_key and "__p" in outcome.task_key else name
+
+
+def expected_durations(test_dir: str) -> Dict[str, float]:
+    """Median duration in seconds of every test recorded for a test path, by test ID.
+
+    Empty when the results database has no history for it.
+    """
+    try:
+        medians = median_durations("notebook", test_dir)
+    except HistoryError as e:
+        logger.warning(f"No duration history for ETA: {e}")
+        return {}
+    return {f"{test_path}::{test_name}": duration / 1000 for (test_path, test_name), duration in medians.items()}
+
+
+class Reporter:
+    """Receives runner events; every method is optional."""
+
+    def start(self, tests: Sequence[str]) -> None:
+        pass
+
+    def test_finished(self, outcome: NotebookTestOutcome) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+class ReporterGroup(Reporter):
+    """Forwards events to several reporters, one event at a time.
+
+    Runs finish on the runner's collection threads, so events are serialized
+    here; a reporter that fails is logged and left out of later events.
+    """
+
+    def __init__(self, reporters: Sequence[Reporter]):
+        self.reporters = list(reporters)
+        self._lock = threading.Lock()
+
+    def _call(self, method: str, *args: Any) -> None:
+        with self._lock:
+            for reporter in list(self.reporters):
+                try:
+                    getattr(reporter, method)(*args)
+                except Exception as e:
+                    logger.warning(f"Reporter {type(reporter).__name__} failed, disabling it: {e}")
+                    self.reporters.remove(reporter)
+
+    def start(self, tests: Sequence[str]) -> None:
+        self._call("start", tests)
+
+    def test_finished(self, outcome: NotebookTestOutcome) -> None:
+        self._call("test_finished", outcome)
+
+    def finish(self) -> None:
+        self._call("finish")
+
+
+class JsonLinesReporter(Reporter):
+    """Appends one JSON object per outcome to a file, flushed line by line."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file: Optional[TextIO] = None
+
+    def start(self, tests: Sequence[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def test_finished(self, outcome: NotebookTestOutcome) -> None:
+        self._file.write(json.dumps(outcome.to_dict(), default=str) + "\n")
+        self._file.flush()
+
+    def finish(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JUnitXmlReporter(Reporter):
+    """Writes a JUnit XML report that is complete after every test.
+
+    Test cases are appended as tests finish and the closing tags rewritten
+    after them; the suite counts are fixed width and updated in place, so
+    the file is valid XML at any time.
+    """
+
+    FOOTER = b"</testsuite>\n</testsuites>\n"
+
+    def __init__(self, path: str, suite_name: str = "dbx_tester"):
+        self.path = Path(path)
+        self.suite_name = suite_name
+        self.counts: Counter = Counter()
+        self.duration = 0.0
+        self._file = None
+        self._counts_at = 0
+        self._end = 0
+
+    def _counts(self) -> bytes:
+        return (
+            f'tests="{sum(self.counts.values()):08d}" failures="{self.counts[FAILED]:08d}" '
+            f'errors="{self.counts[ERROR]:08d}" skipped="{self.counts[SKIPPED]:08d}" time="{self.duration:014.3f}"'
+        ).encode("utf-8")
+
+    def start(self, tests: Sequence[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb+")
+        header = f'<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n<testsuite name={quoteattr(self.suite_name)} '
+        self._file.write(header.encode("utf-8"))
+        self._counts_at = self._file.tell()
+        self._file.write(self._counts() + b">\n")
+        self._end = self._file.tell()
+        self._file.write(self.FOOTER)
+        self._file.flush()
+
+    def _case(self, outcome: NotebookTestOutcome) -> ET.Element:
+        case = ET.Element(
+            "testcase",
+            classname=(outcome.test_id or "").partition("::")[0].replace("/", "."),
+            name=case_name(outcome),
+            time=f"{outcome.duration_seconds or 0:.3f}"
+        )
+        properties = ET.SubElement(case, "properties")
+        for key, value in [("run_id", outcome.run_id), ("task_key", outcome.task_key), *sorted(outcome.metrics.items())]:
+            if value is not None:
+                ET.SubElement(properties, "property", name=str(key), value=str(value))
+        if outcome.status == SKIPPED:
+            ET.SubElement(case, "skipped", message=outcome.message or "")
+        elif not outcome.passed:
+            element = ET.SubElement(case, "failure" if outcome.status == FAILED else "error", message=outcome.message or "")
+            element.text = outcome.trace
+        return case
+
+    def test_finished(self, outcome: NotebookTestOutcome) -> None:
+        self.counts[outcome.status] += 1
+        self.duration += outcome.duration_seconds or 0
+        self._file.seek(self._end)
+        self._file.write(ET.tostring(self._case(outcome), encoding="utf-8", xml_declaration=False) + b"\n")
+        self._end = self._file.tell()
+        self._file.write(self.FOOTER)
+        self._file.truncate()
+        self._file.seek(self._counts_at)
+        self._file.write(self._counts())
+        self._file.flush()
+
+    def finish(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SummaryReporter(Reporter):
+    """Logs the counts and the tests that did not pass once the run finishes."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.duration = 0.0
+        self.problems: List[str] = []
+
+    def test_finished(self, outcome: NotebookTestOutcome) -> None:
+        self.counts[outcome.status] += 1
+        self.duration += outcome.duration_seconds or 0
+        if not outcome.passed:
+            message = (outcome.message or "").strip().splitlines()
+            test = f"{outcome.test_id.partition('::')[0]}::{case_name(outcome)}"
+            self.problems.append(f"{outcome.status} {test}: {message[0] if message else ''}")
+
+    def summary(self) -> str:
+        lines = [
+            f"{sum(self.counts.values())} tests: {self.counts[PASSED]} passed, {self.counts[FAILED]} failed, "
+            f"{self.counts[ERROR]} errors, {self.counts[SKIPPED]} skipped, {self.duration:.1f}s of test time"
+        ]
+        return "\n".join(lines + self.problems)
+
+    def finish(self) -> None:
+        if self.counts:
+            logger.info(self.summary())
+
+
+class ResultsDatabaseReporter(Reporter):
+    """Adds a status row per outcome, by test function, to the results database."""
+
+    def __init__(self, test_dir: str):
+        self.test_dir = test_dir
+        self._test_ids: Dict[Tuple[str, str], int] = {}
+
+    def test_finished(self, outcome: NotebookTestOutcome) -> None:
+        if outcome.status == SKIPPED:
+            return
+        key = tuple(outcome.test_id.split("::", 1))
+        if key not in self._test_ids:
+            self._test_ids.update(add_notebook_tests(self.test_dir, [(*key, {})]))
+        test_id = self._test_ids[key]
+        timed = outcome.started_at is not None and outcome.duration_seconds is not None
+        log_notebook_test(
+            test_id,
+            [{"run_id": outcome.run_id, "task_key": outcome.task_key}],
+            PASSED if outcome.passed else FAILED,
+            outcome.message,
+            started_at=outcome.started_at if timed else None,
+            ended_at=outcome.started_at + outcome.duration_seconds if timed else None
+        )
+        if outcome.metrics:
+            log_events(test_id, "metrics", {"task_key": outcome.task_key, "run_id": outcome.run_id, **outcome.metrics})
+
+
+def _clock(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class ProgressReporter(Reporter):
+    """Live progress line with throughput and ETA.
+
+    The ETA scales the historical duration of the tests still to finish by
+    the pace observed so far, which accounts for concurrency; tests without
+    history count with the median of the known durations. Without any
+    history it extrapolates the observed throughput.
+
+    Args:
+        expected: Historical duration in seconds by test ID, see
+            ``expected_durations``.
+        stream: Output, redrawn in place when it is a terminal.
+        interval: Minimum seconds between two lines.
+    """
+
+    def __init__(self, expected: Optional[Dict[str, float]] = None, stream: Optional[TextIO] = None, interval: float = 1.0):
+        self.expected = expected or {}
+        self.default = statistics.median(self.expected.values()) if self.expected else None
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.total = 0
+        self.expected_total = 0.0
+        self.expected_done = 0.0
+        self._started = 0.0
+        self._printed = 0.0
+
+    def _expected(self, test_id: Optional[str]) -> float:
+        return self.expected.get(test_id, self.default) or 0.0
+
+    def start(self, tests: Sequence[str]) -> None:
+        self.total = len(tests)
+        self.expected_total = sum(self._expected(test_id) for test_id in tests)
+        self._started = time.monotonic()
+
+    def eta(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the last test finishes, None until one finished."""
+        finished = sum(self.counts.values())
+        elapsed = (now or time.monotonic()) - self._started
+        if not finished or elapsed <= 0:
+            return None
+        if self.expected_done > 0:
+            return max(0.0, self.expected_total - self.expected_done) * elapsed / self.expected_done
+        return (self.total - finished) * elapsed / finished
+
+    def line(self, now: Optional[float] = None) -> str:
+        now = now or time.monotonic()
+        finished = sum(self.counts.values())
+        elapsed = max(now - self._started, 1e-9)
+        eta = self.eta(now)
+        return (
+            f"[{finished:>{len(str(self.total))}}/{self.total}] {self.counts[PASSED]} passed, "
+            f"{finished - self.counts[PASSED]} not passed | {finished * 60 / elapsed:.1f} tests/min | "
+            f"ETA {_clock(eta) if eta is not None else '--'}"
+        )
+
+    def _print(self, final: bool = False) -> None:
+        if self.stream.isatty():
+            self.stream.write("\r\033[K" + self.line() + ("\n" if final else ""))
+        else:
+            self.stream.write(self.line() + "\n")
+        self.stream.flush()
+
+    def test_finished(self, outcome: NotebookTestOutcome) -> None:
+        self.counts[outcome.status] += 1
+        self.expected_done += self._expected(outcome.test_id)
+        now = time.monotonic()
+        if now - self._printed >= self.interval:
+            self._printed = now
+            self._print()
+
+    def finish(self) -> None:
+        if self.total:
+            self._print(final=True)
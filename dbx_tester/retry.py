@@ -0,0 +1,223 @@
+from dbx_tester.utils.databricks_api import cancel_run, get_run, repair_run
+from dbx_tester.utils.admission import get_admission_controller
+from dbx_tester.utils.tracing import span
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+import logging
+import re
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+TERMINAL_LIFE_CYCLE_STATES = {"TERMINATED", "SKIPPED", "INTERNAL_ERROR"}
+FAILED_RESULT_STATES = {"FAILED", "TIMEDOUT", "MAXIMUM_CONCURRENT_RUNS_REACHED"}
+
+
+def _value(state: Any) -> Optional[str]:
+    return getattr(state, "value", state)
+
+
+def task_failed(task: Any) -> bool:
+    """Whether a run task failed itself, as opposed to being skipped by an upstream failure."""
+    if task.state is None:
+        return False
+    return (
+        _value(task.state.result_state) in FAILED_RESULT_STATES
+        or _value(task.state.life_cycle_state) == "INTERNAL_ERROR"
+    )
+
+
+def latest_tasks(run: Any) -> List[Any]:
+    """Latest attempt of every task in a run."""
+    latest: Dict[str, Any] = {}
+    for task in run.tasks or []:
+        current = latest.get(task.task_key)
+        if current is None or (task.attempt_number or 0) >= (current.attempt_number or 0):
+            latest[task.task_key] = task
+    return list(latest.values())
+
+
+def retry_on_failure(task: Any) -> bool:
+    """Default predicate: retry every failed task."""
+    return True
+
+
+def retry_on_message(*patterns: str) -> Callable[[Any], bool]:
+    """Predicate retrying only tasks whose state message matches a pattern.
+
+    Args:
+        patterns: Regular expressions searched in the task state message.
+    """
+    compiled = [re.compile(pattern) for pattern in patterns]
+
+    def predicate(task: Any) -> bool:
+        message = (task.state.state_message if task.state else None) or ""
+        return any(pattern.search(message) for pattern in compiled)
+
+    return predicate
+
+
+@dataclass
+class RetryPolicy:
+    """Retry policy for failed tasks of submitted test runs.
+
+    Attributes:
+        max_attempts: Total attempts per run, including the first one.
+        backoff_seconds: Delay before the first repair.
+        backoff_multiplier: Factor applied to the delay after every repair.
+        max_backoff_seconds: Upper bound for the delay.
+        retry_on: Predicate deciding whether a failed task may be retried.
+    """
+    max_attempts: int = 3
+    backoff_seconds: float = 30.0
+    backoff_multiplier: float = 2.0
+    max_backoff_seconds: float = 600.0
+    retry_on: Callable[[Any], bool] = retry_on_failure
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before the repair that follows the given attempt."""
+        return min(
+            self.backoff_seconds * self.backoff_multiplier ** (attempt - 1),
+            self.max_backoff_seconds
+        )
+
+
+@dataclass
+class _RunAttempt:
+    attempts: int = 1
+    repair_id: Optional[int] = None
+    rerun_tasks: List[str] = field(default_factory=list)
+    retried_tasks: Set[str] = field(default_factory=set)
+    repair_at: Optional[float] = None
+
+
+class RunRetrier:
+    """Watches submitted runs and repairs failed tasks according to a policy.
+
+    Repairs rerun only the failed tasks and their descendants, so task value
+    stubs and upstream notebooks that already succeeded are not executed
+    again. Runs that succeed only after a repair are recorded as flaky.
+    """
+
+    def __init__(self, policy: RetryPolicy, poll_interval: float = 10.0):
+        self.policy = policy
+        self.poll_interval = poll_interval
+        self.flaky: Dict[int, List[str]] = {}
+
+    def watch(
+        self, 
+        run_ids: Iterable[int], 
+        timeout: Optional[float] = None,
+        on_result: Optional[Callable[[int, str], None]] = None
+    ) -> Dict[int, str]:
+        """Wait for runs to finish, repairing them as allowed by the policy.
+
+        Args:
+            run_ids: IDs of the submitted runs to watch.
+            timeout: Seconds to wait before cancelling the unfinished runs.
+            on_result: Called with the run ID and result as each run finishes.
+
+        Returns:
+            Dictionary mapping each run ID to "SUCCESS", "FAILED" or
+            "TIMEDOUT".
+        """
+        pending = {run_id: _RunAttempt() for run_id in run_ids}
+        results: Dict[int, str] = {}
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with span("runs.wait", runs=len(pending)):
+            while pending:
+                for run_id, attempt in list(pending.items()):
+                    result = self._step(run_id, attempt)
+                    if result is not None:
+                        results[run_id] = result
+                        del pending[run_id]
+                        get_admission_controller().release_run(run_id)
+                        if on_result is not None:
+                            on_result(run_id, result)
+                if pending and deadline is not None and time.monotonic() >= deadline:
+                    self._cancel(pending, results, on_result)
+                if pending:
+                    time.sleep(self.poll_interval)
+
+        return results
+
+    def _cancel(
+        self, 
+        pending: Dict[int, _RunAttempt], 
+        results: Dict[int, str], 
+        on_result: Optional[Callable[[int, str], None]] = None
+    ) -> None:
+        """Cancel the unfinished runs, recording them as timed out."""
+        logger.error(f"Timed out waiting for runs, cancelling: {sorted(pending)}")
+        for run_id in list(pending):
+            try:
+                cancel_run(run_id)
+            except Exception as e:
+                logger.warning(f"Unable to cancel run {run_id}: {e}")
+            results[run_id] = "TIMEDOUT"
+            del pending[run_id]
+            get_admission_controller().release_run(run_id)
+            if on_result is not None:
+                on_result(run_id, "TIMEDOUT")
+
+    def _step(self, run_id: int, attempt: _RunAttempt) -> Optional[str]:
+        """Advance one run, returning its final result once known."""
+        if attempt.repair_at is not None:
+            if time.monotonic() < attempt.repair_at:
+                return None
+            self._repair(run_id, attempt)
+            return None
+
+        run = get_run(run_id)
+        if _value(run.state.life_cycle_state) not in TERMINAL_LIFE_CYCLE_STATES:
+            return None
+        if attempt.repair_id is not None and not self._repair_finished(run, attempt.repair_id):
+            return None
+
+        failed = [task for task in latest_tasks(run) if task_failed(task)]
+        if not failed:
+            if self._result_state(run, attempt.repair_id) != "SUCCESS":
+                return "FAILED"
+            if attempt.retried_tasks:
+                self.flaky[run_id] = sorted(attempt.retried_tasks)
+                logger.warning(
+                    f"Run {run_id} passed after {attempt.attempts} attempts; "
+                    f"flaky tasks: {self.flaky[run_id]}"
+                )
+            return "SUCCESS"
+
+        if attempt.attempts >= self.policy.max_attempts or not all(self.policy.retry_on(task) for task in failed):
+            return "FAILED"
+
+        attempt.rerun_tasks = [task.task_key for task in failed]
+        attempt.repair_at = time.monotonic() + self.policy.delay(attempt.attempts)
+        return None
+
+    def _repair(self, run_id: int, attempt: _RunAttempt) -> None:
+        logger.info(f"Repairing run {run_id} (attempt {attempt.attempts + 1}): {attempt.rerun_tasks}")
+        attempt.repair_id = repair_run(run_id, attempt.rerun_tasks, attempt.repair_id)
+        attempt.retried_tasks.update(attempt.rerun_tasks)
+        attempt.attempts += 1
+        attempt.repair_at = None
+
+    @staticmethod
+    def _result_state(run: Any, repair_id: Optional[int]) -> Optional[str]:
+        """Result of the run, or of its latest repair once it was repaired."""
+        for repair in run.repair_history or []:
+            if repair_id is not None and repair.id == repair_id:
+                return _value(repair.state.result_state)
+        return _value(run.state.result_state)
+
+    @staticmethod
+    def _repair_finished(run: Any, repair_id: int) -> bool:
+        """Whether the given repair is visible on the run and has finished."""
+        for repair in run.repair_history or []:
+            if repair.id == repair_id:
+                return repair.state is not None and _value(repair.state.life_cycle_state) in TERMINAL_LIFE_CYCLE_STATES
+        return False
@@ -0,0 +1,307 @@
+"""Static discovery of notebook tests.
+
+Test notebook sources are exported (or read from the /Workspace mount)
+concurrently and parsed with ``ast``; nothing is executed, so an inventory
+of every ``NotebookTest`` and ``JobTest`` with its ``Notebook(...)`` and
+``Job(...)`` arguments needs no cluster and no notebook run. Arguments that
+are only known at run time, e.g. a path built from a variable, are kept as
+their source text and listed in ``StaticTest.unresolved``.
+"""
+from dbx_tester.utils.databricks_api import list_workspace, read_workspace_file
+from dbx_tester.utils.notebook_source import parse_cells
+from dbx_tester.utils.tracing import span, traced
+
+from databricks.sdk.service.workspace import ObjectType
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from collections.abc import Callable
+from typing import Any, Dict, List, Optional, Tuple, Union
+import ast
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Positional parameters of the calls the scanner understands
+NOTEBOOK_PARAMS = ("notebook_path", "task_name", "config", "cluster", "depends_on", "scope")
+JOB_PARAMS = ("name", "job_id", "config", "depends_on", "trigger")
+NOTEBOOK_TEST_PARAMS = ("notebook", "cluster_id", "job_cluster", "parametrize")
+JOB_TEST_PARAMS = ("fn", "job")
+# Limit when following a name to its assignment, e.g. ``upstream = Notebook(...)``
+MAX_RESOLVE_DEPTH = 10
+
+
+class ScanError(Exception):
+    pass
+
+
+class Unresolved(str):
+    """Source text of an argument whose value is only known at run time."""
+
+
+@dataclass
+class StaticNotebook:
+    """A ``Notebook(...)`` call."""
+    notebook_path: Union[str, Unresolved, None]
+    task_name: Union[str, Unresolved, None] = None
+    cluster: Union[str, Unresolved, None] = None
+    scope: Union[str, Unresolved] = "function"
+    depends_on: List[Union["StaticNotebook", Unresolved]] = field(default_factory=list)
+    # Source of the config argument, e.g. "NotebookConfigManager()"
+    config: Optional[str] = None
+
+
+@dataclass
+class StaticJob:
+    """A ``Job(...)`` call."""
+    name: Union[str, Unresolved, None] = None
+    job_id: Union[int, Unresolved, None] = None
+    depends_on: List[Union["StaticJob", Unresolved]] = field(default_factory=list)
+    trigger: Optional[str] = None
+
+
+@dataclass
+class StaticTest:
+    """A test definition found in a test notebook.
+
+    Attributes:
+        notebook_id: Test notebook path relative to the test path.
+        name: Name of the decorated function or class.
+        kind: "notebook" for ``NotebookTest``, "job" for ``JobTest``.
+        cell: Index of the code cell holding the definition.
+        line: Line of the definition within its cell.
+        unresolved: Source of every argument not known statically.
+    """
+    notebook_id: str
+    name: str
+    kind: str
+    cell: int
+    line: int
+    notebook: Union[StaticNotebook, Unresolved, None] = None
+    job: Union[StaticJob, Unresolved, None] = None
+    cluster_id: Union[str, Unresolved, None] = None
+    parametrize: Union[Dict[str, List[Any]], Unresolved] = field(default_factory=dict)
+    unresolved: List[str] = field(default_factory=list)
+
+    @property
+    def test_id(self) -> str:
+        """Same ID as ``NotebookTestRunner.test_id`` gives the cached test."""
+        return f"{self.notebook_id}::{self.name}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"test_id": self.test_id, **asdict(self)}
+
+
+class _Evaluator:
+    """Evaluates call arguments against the top-level names of a notebook."""
+
+    def __init__(self):
+        self.aliases: Dict[str, str] = {}
+        self.names: Dict[str, ast.expr] = {}
+        self.unresolved: List[str] = []
+
+    def callee(self, node: ast.AST) -> Optional[str]:
+        """Name of the called class, following import aliases."""
+        if not isinstance(node, ast.Call):
+            return None
+        if isinstance(node.func, ast.Name):
+            return self.aliases.get(node.func.id, node.func.id)
+        if isinstance(node.func, ast.Attribute):
+            return node.func.attr
+        return None
+
+    def arguments(self, call: ast.Call, params: Tuple[str, ...]) -> Dict[str, ast.expr]:
+        arguments = dict(zip(params, call.args))
+        for keyword in call.keywords:
+            if keyword.arg is None:
+                self._unresolved(keyword.value, prefix="**")
+            else:
+                arguments[keyword.arg] = keyword.value
+        return arguments
+
+    def value(self, node: Optional[ast.expr], depth: int = 0) -> Any:
+        if node is None:
+            return None
+        if isinstance(node, ast.Name) and node.id in self.names and depth < MAX_RESOLVE_DEPTH:
+            return self.value(self.names[node.id], depth + 1)
+        callee = self.callee(node)
+        if callee == "Notebook":
+            return self.notebook(node, depth)
+        if callee == "Job":
+            return self.job(node, depth)
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [self.value(element, depth) for element in node.elts]
+        if isinstance(node, ast.Dict) and None not in node.keys:
+            return {self.value(key, depth): self.value(value, depth) for key, value in zip(node.keys, node.values)}
+        try:
+            return ast.literal_eval(node)
+        except (ValueError, TypeError, SyntaxError):
+            return self._unresolved(node)
+
+    def _unresolved(self, node: ast.expr, prefix: str = "") -> Unresolved:
+        source = Unresolved(prefix + ast.unparse(node))
+        self.unresolved.append(source)
+        return source
+
+    def _dependencies(self, node: Optional[ast.expr], depth: int) -> List[Any]:
+        value = self.value(node, depth)
+        if value is None:
+            return []
+        return value if isinstance(value, list) else [value]
+
+    def notebook(self, call: ast.Call, depth: int = 0) -> StaticNotebook:
+        arguments = self.arguments(call, NOTEBOOK_PARAMS)
+        config = arguments.get("config")
+        return StaticNotebook(
+            notebook_path=self.value(arguments.get("notebook_path"), depth),
+            task_name=self.value(arguments.get("task_name"), depth),
+            cluster=self.value(arguments.get("cluster"), depth),
+            scope=self.value(arguments["scope"], depth) if "scope" in arguments else "function",
+            depends_on=self._dependencies(arguments.get("depends_on"), depth),
+            config=ast.unparse(config) if config is not None else None
+        )
+
+    def job(self, call: ast.Call, depth: int = 0) -> StaticJob:
+        arguments = self.arguments(call, JOB_PARAMS)
+        trigger = arguments.get("trigger")
+        return StaticJob(
+            name=self.value(arguments.get("name"), depth),
+            job_id=self.value(arguments.get("job_id"), depth),
+            depends_on=self._dependencies(arguments.get("depends_on"), depth),
+            trigger=ast.unparse(trigger) if trigger is not None else None
+        )
+
+
+def _cell_source(cell: str) -> Optional[str]:
+    """Python source of a cell, None for other magics such as %md or %run."""
+    source = cell.strip()
+    if not source.startswith("%"):
+        return cell
+    first_line, _, body = source.partition("\n")
+    magic, _, argument = first_line.partition(" ")
+    return f"{argument}\n{body}" if magic == "%python" else None
+
+
+def scan_source(text: str, notebook_id: str, jupyter: bool = False) -> List[StaticTest]:
+    """Tests defined in the source of one test notebook.
+
+    Raises:
+        ScanError: If a cell is not valid Python.
+    """
+    evaluator = _Evaluator()
+    tests: List[StaticTest] = []
+
+    def add(kind: str, name: str, call: ast.Call, cell: int, line: int) -> None:
+        evaluator.unresolved = []
+        if kind == "notebook":
+            arguments = evaluator.arguments(call, NOTEBOOK_TEST_PARAMS)
+            test = StaticTest(
+                notebook_id, name, kind, cell, line,
+                notebook=evaluator.value(arguments.get("notebook")),
+                cluster_id=evaluator.value(arguments.get("cluster_id")),
+                parametrize=evaluator.value(arguments.get("parametrize")) or {}
+            )
+        else:
+            arguments = evaluator.arguments(call, JOB_TEST_PARAMS)
+            test = StaticTest(notebook_id, name, kind, cell, line, job=evaluator.value(arguments.get("job")))
+        test.unresolved = evaluator.unresolved
+        tests.append(test)
+
+    def call_form(node: ast.AST, cell: int) -> None:
+        # NotebookTest(...)(fn) and JobTest(fn, job)
+        if not isinstance(node, ast.Call):
+            return
+        if evaluator.callee(node.func) == "NotebookTest" and node.args and isinstance(node.args[0], ast.Name):
+            add("notebook", node.args[0].id, node.func, cell, node.lineno)
+        elif evaluator.callee(node) == "JobTest":
+            fn = evaluator.arguments(node, JOB_TEST_PARAMS).get("fn")
+            if isinstance(fn, ast.Name):
+                add("job", fn.id, node, cell, node.lineno)
+
+    for index, cell in enumerate(parse_cells(text, jupyter=jupyter)):
+        source = _cell_source(cell)
+        if source is None:
+            continue
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as e:
+            raise ScanError(f"{notebook_id} cell {index}: {e}")
+
+        for node in tree.body:
+            if isinstance(node, ast.ImportFrom):
+                evaluator.aliases.update((alias.asname, alias.name) for alias in node.names if alias.asname)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                evaluator.names.pop(node.name, None)
+                for decorator in node.decorator_list:
+                    kind = {"NotebookTest": "notebook", "JobTest": "job"}.get(evaluator.callee(decorator))
+                    if kind is not None:
+                        add(kind, node.name, decorator, index, decorator.lineno)
+            elif isinstance(node, ast.Assign):
+                call_form(node.value, index)
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        evaluator.names[target.id] = node.value
+            elif isinstance(node, ast.Expr):
+                call_form(node.value, index)
+    return tests
+
+
+class NotebookScanner:
+    """Inventory of the tests below a test path, from notebook sources only.
+
+    Args:
+        test_path: Workspace directory holding the test notebooks.
+        max_workers: Notebook sources read concurrently.
+    """
+
+    def __init__(self, test_path: str, max_workers: int = 16):
+        self.test_path = Path(test_path)
+        self.max_workers = max_workers
+        self.errors: Dict[str, str] = {}
+
+    def notebook_id(self, test_notebook: Path) -> str:
+        """Path of a test notebook relative to the test path."""
+        return test_notebook.relative_to(self.test_path).as_posix().split(".")[0]
+
+    def notebooks(self) -> List[Path]:
+        """Test notebooks, without descending into test caches."""
+        objects = list_workspace(self.test_path.as_posix(), exclude=("_test_cache",))
+        return sorted(
+            Path(path) for path, object_type in objects.items()
+            if object_type == ObjectType.NOTEBOOK and "_test_cache" not in Path(path).parts
+        )
+
+    @traced("scanner.scan")
+    def scan(self, notebook_filter: Optional[Callable[[str], bool]] = None) -> List[StaticTest]:
+        """Tests of every test notebook accepted by the filter.
+
+        Notebooks that cannot be read or parsed are left out and recorded in
+        ``errors`` by notebook ID.
+        """
+        notebooks = [
+            notebook for notebook in self.notebooks()
+            if notebook_filter is None or notebook_filter(self.notebook_id(notebook))
+        ]
+        with span("scanner.read", notebooks=len(notebooks)):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                sources = list(pool.map(self._read, notebooks))
+
+        tests = []
+        for notebook, source in zip(notebooks, sources):
+            notebook_id = self.notebook_id(notebook)
+            try:
+                if isinstance(source, Exception):
+                    raise ScanError(f"{notebook_id}: {source}")
+                tests.extend(scan_source(source, notebook_id, jupyter=notebook.suffix == ".ipynb"))
+            except (ScanError, ValueError) as e:
+                logger.warning(f"Unable to scan {notebook}: {e}")
+                self.errors[notebook_id] = str(e)
+        return tests
+
+    @staticmethod
+    def _read(notebook: Path) -> Union[str, Exception]:
+        try:
+            return read_workspace_file(notebook.as_posix())
+        except Exception as e:
+            return e
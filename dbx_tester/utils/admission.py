@@ -0,0 +1,233 @@
+from contextlib import contextmanager
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Requests per second and burst size per API family
+DEFAULT_RATES = {
+    "workspace": (10.0, 20),
+    "jobs": (5.0, 10),
+}
+DEFAULT_MAX_ACTIVE_RUNS = 100
+
+TERMINAL_LIFE_CYCLE_STATES = {"TERMINATED", "SKIPPED", "INTERNAL_ERROR"}
+THROTTLE_ERROR_CODES = {"RESOURCE_EXHAUSTED", "TOO_MANY_REQUESTS", "REQUEST_LIMIT_EXCEEDED"}
+THROTTLE_MESSAGES = ("429", "too many requests", "too many active runs", "maximum number of concurrent runs")
+
+
+class AdmissionRejectedError(Exception):
+    pass
+
+
+def is_throttled(error):
+    """Whether an API error means "slow down" rather than a real failure."""
+    if getattr(error, "error_code", None) in THROTTLE_ERROR_CODES:
+        return True
+    message = str(error).lower()
+    return any(text in message for text in THROTTLE_MESSAGES)
+
+def _is_run_active(run_id):
+    from dbx_tester.utils.databricks_api import get_run
+    state = get_run(run_id).state.life_cycle_state
+    return getattr(state, "value", state) not in TERMINAL_LIFE_CYCLE_STATES
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token, returning 0 on success or the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class AdmissionController:
+    """Shared gate for workspace API calls and run submissions.
+
+    Every API family has a token bucket. Run submissions also need a slot of
+    the global active-run limit; submissions over the limit wait in a queue
+    ordered by priority (lower first, FIFO within a priority) and are
+    rejected after ``max_wait`` seconds. Slots are released explicitly with
+    ``release_run`` or reclaimed by checking tracked runs that have finished.
+    Throttling responses from the API are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        rates=None,
+        max_active_runs=DEFAULT_MAX_ACTIVE_RUNS,
+        max_wait=None,
+        max_retries=5,
+        backoff_seconds=1.0,
+        reap_interval=10.0,
+        is_run_active=_is_run_active,
+    ):
+        self.buckets = {family: TokenBucket(rate, capacity) for family, (rate, capacity) in (rates or DEFAULT_RATES).items()}
+        self.max_active_runs = max_active_runs
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.reap_interval = reap_interval
+        self.is_run_active = is_run_active
+        self.stats = {"admitted": 0, "queued": 0, "throttled": 0, "rejected": 0}
+
+        self._active_runs = set()
+        self._reserved = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._last_reap = 0.0
+
+    def _count(self, name):
+        with self._condition:
+            self.stats[name] += 1
+
+    def _wait_for_token(self, family):
+        bucket = self.buckets.get(family)
+        if bucket is None:
+            return
+        while True:
+            delay = bucket.try_acquire()
+            if not delay:
+                return
+            time.sleep(delay)
+
+    def call(self, family, fn, *args, **kwargs):
+        """Call an API function under the family's rate limit."""
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_token(family)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_throttled(e) or attempt == self.max_retries:
+                    raise
+                self._count("throttled")
+                delay = self.backoff_seconds * 2 ** attempt
+                logger.warning(f"API throttled ({family}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def _slots_in_use(self):
+        return len(self._active_runs) + self._reserved
+
+    def _reap(self):
+        """Free slots of tracked runs that have finished. Called with the condition held.
+
+        Runs are checked with the condition released, as every check is an
+        API call that may wait for a token or back off on throttling.
+        """
+        now = time.monotonic()
+        if now - self._last_reap < self.reap_interval or not self._active_runs:
+            return
+        self._last_reap = now
+        tracked = list(self._active_runs)
+        finished = []
+        self._condition.release()
+        try:
+            for run_id in tracked:
+                try:
+                    if not self.is_run_active(run_id):
+                        finished.append(run_id)
+                except Exception as e:
+                    logger.debug(f"Unable to check run {run_id}: {e}")
+        finally:
+            self._condition.acquire()
+        if finished:
+            self._active_runs.difference_update(finished)
+            self._condition.notify_all()
+
+    @contextmanager
+    def run_slot(self, priority=0):
+        """Reserve an active-run slot around a submission.
+
+        The submitting code must pass the new run ID to ``track_run``;
+        otherwise the slot is released when the block exits.
+
+        Raises:
+            AdmissionRejectedError: If no slot frees up within max_wait.
+        """
+        entry = (priority, next(self._sequence))
+        deadline = None if self.max_wait is None else time.monotonic() + self.max_wait
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            queued = False
+            while self._waiters[0] != entry or self._slots_in_use() >= self.max_active_runs:
+                if not queued:
+                    queued = True
+                    self.stats["queued"] += 1
+                if self._waiters[0] == entry:
+                    self._reap()
+                    if self._slots_in_use() < self.max_active_runs:
+                        break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self.stats["rejected"] += 1
+                    self._condition.notify_all()
+                    raise AdmissionRejectedError(
+                        f"No run slot available within {self.max_wait}s ({self.max_active_runs} active runs)"
+                    )
+                wait = self.reap_interval if remaining is None else min(self.reap_interval, remaining)
+                self._condition.wait(wait)
+            heapq.heappop(self._waiters)
+            self._reserved += 1
+            self.stats["admitted"] += 1
+            self._condition.notify_all()
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self._reserved -= 1
+                self._condition.notify_all()
+
+    def track_run(self, run_id):
+        """Count a submitted run against the active-run limit until released."""
+        with self._condition:
+            self._active_runs.add(run_id)
+
+    def release_run(self, run_id):
+        with self._condition:
+            self._active_runs.discard(run_id)
+            self._condition.notify_all()
+
+    def submit(self, fn, *args, priority=0, **kwargs):
+        """Start a run through ``fn`` once a run slot and a jobs token are available."""
+        with self.run_slot(priority):
+            run = self.call("jobs", fn, *args, **kwargs)
+            self.track_run(run.run_id)
+            return run
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
+
+
+def configure_admission(**kwargs):
+    """Replace the shared admission controller."""
+    global _controller
+    with _controller_lock:
+        _controller = AdmissionController(**kwargs)
+        return _controller
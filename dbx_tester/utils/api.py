@@ -1,5 +1,6 @@
-from databricks.sdk import WorkspaceClient
+from dbx_tester.utils.backend import get_backend
+from dbx_tester.utils.profiler import get_api_profiler
 
 def get_workspace_client():
-    w = WorkspaceClient()
-    return w
\ No newline at end of file
+    w = get_backend().workspace_client()
+    return get_api_profiler().wrap(w)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import threading
+
+
+class Backend:
+    """Everything the framework needs from a Databricks workspace.
+
+    The workspace client exposes the SDK services used by the helpers
+    (``workspace``, ``jobs``, ``clusters``); the remaining methods cover the
+    notebook context that only exists inside a Databricks runtime.
+    """
+
+    def workspace_client(self):
+        raise NotImplementedError
+
+    def notebook_path(self):
+        """Workspace path of the notebook currently executing."""
+        raise NotImplementedError
+
+    def run_notebook(self, path, params):
+        raise NotImplementedError
+
+    def get_param(self, param):
+        """Widget value of the current notebook, None if not set."""
+        raise NotImplementedError
+
+    def exit_notebook(self, value):
+        """End the current notebook with the given exit value."""
+        raise NotImplementedError
+
+
+class DatabricksBackend(Backend):
+    """Live workspace through the Databricks SDK and the runtime's dbutils."""
+
+    def workspace_client(self):
+        from databricks.sdk import WorkspaceClient
+        return WorkspaceClient()
+
+    def dbutils(self):
+        from pyspark.dbutils import DBUtils
+        from pyspark.sql import SparkSession
+        return DBUtils(SparkSession.builder.getOrCreate())
+
+    def notebook_path(self):
+        context = self.dbutils().notebook.entry_point.getDbutils().notebook().getContext()
+        return "/Workspace" + context.notebookPath().get()
+
+    def run_notebook(self, path, params):
+        self.dbutils().notebook.run(path=path, timeout_seconds=0, arguments=params)
+
+    def get_param(self, param):
+        try:
+            return self.dbutils().widgets.get(param)
+        except Exception:
+            return None
+
+    def exit_notebook(self, value):
+        self.dbutils().notebook.exit(value)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = DatabricksBackend()
+        return _backend
+
+def set_backend(backend):
+    """Replace the shared backend, returning the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+        return previous
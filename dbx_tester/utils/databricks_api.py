@@ -1,18 +1,20 @@
-from databricks.sdk import WorkspaceClient
-from databricks.sdk.service import workspace, jobs
+from databricks.sdk.service import workspace, jobs, compute
 from databricks.sdk.service.workspace import ObjectType
 
-from pyspark.dbutils import DBUtils
-from pyspark.sql import SparkSession
 from pathlib import Path
 import base64
 import json
 import uuid
 
+from dbx_tester.utils.admission import get_admission_controller
+from dbx_tester.utils.backend import get_backend
+from dbx_tester.utils.tracing import span
+from dbx_tester.utils.profiler import get_api_profiler
+
 
 def get_workspace_client():
-    w = WorkspaceClient()
-    return w
+    w = get_backend().workspace_client()
+    return get_api_profiler().wrap(w)
 
 class notebook_builder:
     def __init__(self, name:str):
@@ -43,8 +45,11 @@ class notebook_builder:
             "nbformat": 4,
             "nbformat_minor": 0
         }
-    def add_cell(self, cell):
-        self._notebook_dict['cells'].append(self.create_cell(cell))
+    def add_cell(self, cell, index = None):
+        if index is None:
+            self._notebook_dict['cells'].append(self.create_cell(cell))
+        else:
+            self._notebook_dict['cells'].insert(index, self.create_cell(cell))
 
     def save_notebook(self, path):
 
@@ -54,12 +59,15 @@ class notebook_builder:
 
         encoded_bytes = base64.b64encode(out_utf8).decode('utf-8')
 
-        self.workspace_client.workspace.import_(
-            path=path
-            , content=encoded_bytes,
-            overwrite=True,
-            format=workspace.ExportFormat.JUPYTER
-        )
+        with span("api.save_notebook", path=path, bytes=len(encoded_bytes)):
+            get_admission_controller().call(
+                "workspace",
+                self.workspace_client.workspace.import_,
+                path=path
+                , content=encoded_bytes,
+                overwrite=True,
+                format=workspace.ExportFormat.JUPYTER
+            )
 
     def create_cell(self, code:str):
         return {
@@ -81,35 +89,99 @@ class notebook_builder:
 
 
 class JobRunner():
-    def __init__(self, job_id, params = {}):
+    def __init__(self, job_id, params = {}, run_id = None):
         self.job_id = job_id
-        self.run_id = None
+        self.params = params
+        self.run_id = run_id
 
     def run(self):
         w = get_workspace_client()
-        run_id = w.jobs.run_now(job_id=self.job_id, params = {}).run_id
-        return run_id
+        with span("api.run_now", job_id=self.job_id) as s:
+            self.run_id = get_admission_controller().submit(
+                w.jobs.run_now, job_id=self.job_id, job_parameters=self.params
+            ).run_id
+            s.set(run_id=self.run_id)
+        return self.run_id
     
     def get_run_status(self):
         w = get_workspace_client()
-        run = w.jobs.get_run(run_id=self.run_id)
+        run = get_admission_controller().call("jobs", w.jobs.get_run, run_id=self.run_id)
         return run.state.life_cycle_state, run.state.result_state
 
+    def cancel_run(self):
+        w = get_workspace_client()
+        w.jobs.cancel_run(run_id=self.run_id)
+
     
 def get_notebook_path():
-    dbutils = DBUtils(SparkSession.builder.getOrCreate())
-    return "/Workspace"+dbutils.notebook.entry_point.getDbutils().notebook().getContext().notebookPath().get()
+    return get_backend().notebook_path()
 
 def is_notebook(path):
     try:
         w = get_workspace_client()
         if path.endswith(".ipynb"):
             path = path.split(".")[0]
-        return w.workspace.get_status(path=path).object_type == ObjectType.NOTEBOOK
+        with span("api.get_status", path=path):
+            return get_admission_controller().call("workspace", w.workspace.get_status, path=path).object_type == ObjectType.NOTEBOOK
     except:
         return False
     
-def get_job_id(name):
+def is_directory(path):
+    try:
+        w = get_workspace_client()
+        with span("api.get_status", path=path):
+            return get_admission_controller().call("workspace", w.workspace.get_status, path=path).object_type == ObjectType.DIRECTORY
+    except:
+        return False
+
+def list_workspace(path, exclude=()):
+    """Every object below a workspace directory, by path, in one recursive listing.
+
+    Directories named in ``exclude`` are listed themselves but not descended
+    into. Returned paths keep the /Workspace prefix if the given path has it.
+    """
+    w = get_workspace_client()
+    mount = "/Workspace" if path.startswith("/Workspace/") else ""
+    with span("api.list_workspace", path=path) as s:
+        if not exclude:
+            objects = get_admission_controller().call("workspace", lambda: list(w.workspace.list(path, recursive=True)))
+        else:
+            objects, directories = [], [path]
+            while directories:
+                directory = directories.pop()
+                children = get_admission_controller().call("workspace", lambda: list(w.workspace.list(directory)))
+                objects.extend(children)
+                directories.extend(
+                    obj.path for obj in children
+                    if obj.object_type == ObjectType.DIRECTORY and Path(obj.path).name not in exclude
+                )
+        s.set(objects=len(objects))
+    return {
+        (obj.path if obj.path.startswith(mount) else mount + obj.path): obj.object_type
+        for obj in objects
+    }
+
+def read_workspace_file(path):
+    """Text of a workspace file, from the /Workspace mount when available."""
+    local = Path(path)
+    if local.exists():
+        return local.read_text()
+    w = get_workspace_client()
+    with span("api.export", path=path):
+        content = get_admission_controller().call("workspace", w.workspace.export, path=path, format=workspace.ExportFormat.AUTO).content
+    return base64.b64decode(content).decode("utf-8")
+
+def make_workspace_dirs(path):
+    w = get_workspace_client()
+    get_admission_controller().call("workspace", w.workspace.mkdirs, path=path)
+
+def delete_workspace_path(path, recursive=False):
+    w = get_workspace_client()
+    get_admission_controller().call("workspace", w.workspace.delete, path=path, recursive=recursive)
+    
+def get_job_id(name = None, job_id = None):
+    if job_id is not None:
+        return job_id
     w = get_workspace_client()
     for job in w.jobs.list():
         if job.settings.name == name:
@@ -134,9 +206,71 @@ def is_job(name = None, job_id = None):
     else:
         raise ValueError("Either job name or job id must be provided")
     
+def find_job_run(job_id, start_time_from=None):
+    """Most recent run of a job started at or after start_time_from (epoch ms)."""
+    w = get_workspace_client()
+    for run in w.jobs.list_runs(job_id=job_id, start_time_from=start_time_from):
+        return run.run_id
+    return None
+    
+def list_tagged_jobs(tag, created_before=None):
+    """IDs of the jobs carrying the given tag.
+
+    With ``created_before`` (epoch milliseconds) only jobs known to be
+    created before then are listed.
+    """
+    w = get_workspace_client()
+    return [
+        job.job_id for job in w.jobs.list()
+        if tag in ((job.settings.tags if job.settings else None) or {})
+        and (created_before is None or (job.created_time is not None and job.created_time < created_before))
+    ]
+
+def has_active_runs(job_id):
+    w = get_workspace_client()
+    for _ in w.jobs.list_runs(job_id=job_id, active_only=True):
+        return True
+    return False
+
+def delete_job(job_id):
+    w = get_workspace_client()
+    get_admission_controller().call("jobs", w.jobs.delete, job_id=job_id)
+
+def get_run(run_id):
+    w = get_workspace_client()
+    with span("api.get_run", run_id=run_id):
+        return get_admission_controller().call("jobs", w.jobs.get_run, run_id=run_id)
+
+def get_run_output(run_id):
+    """Output of a task run: the notebook exit value, or the error of a failed task."""
+    w = get_workspace_client()
+    with span("api.get_run_output", run_id=run_id):
+        return get_admission_controller().call("jobs", w.jobs.get_run_output, run_id=run_id)
+
+def repair_run(run_id, rerun_tasks, latest_repair_id=None):
+    """Rerun the given tasks of a run and everything downstream of them.
+
+    Returns:
+        The repair ID, required as latest_repair_id by the next repair.
+    """
+    w = get_workspace_client()
+    with span("api.repair_run", run_id=run_id, tasks=len(rerun_tasks)):
+        return get_admission_controller().call(
+            "jobs",
+            w.jobs.repair_run,
+            run_id=run_id,
+            rerun_tasks=rerun_tasks,
+            rerun_dependent_tasks=True,
+            latest_repair_id=latest_repair_id
+        ).response.repair_id
+    
+def cancel_run(run_id):
+    w = get_workspace_client()
+    with span("api.cancel_run", run_id=run_id):
+        get_admission_controller().call("jobs", w.jobs.cancel_run, run_id=run_id)
+    
 def run_notebook(path, params={}):
-    dbutils = DBUtils(SparkSession.builder.getOrCreate())
-    dbutils.notebook.run(path=path, timeout_seconds=0, arguments=params)
+    get_backend().run_notebook(path, params)
 
 def validate_cluster(cluster_name):
     w = get_workspace_client()
@@ -149,31 +283,88 @@ def validate_cluster(cluster_name):
         raise ValueError(f"CLUSTER NOT FOUND: Cluster name {cluster_name} not found")
 
 class submit_run:
-    def __init__(self, name, cluster_id = None):
+    # Tag marking jobs created only to run a submission on job clusters
+    TRANSIENT_JOB_TAG = "dbx_tester_transient"
+
+    def __init__(self, name, cluster_id = None, base_parameters = None, job_clusters = None):
         self.name = name
         self.tasks = []
         self.cluster_id = cluster_id
+        # Parameters shared by every task, e.g. the resolved config snapshot
+        self.base_parameters = base_parameters or {}
+        # job_cluster_key -> cluster spec dict shared by the tasks of this submission
+        self.job_clusters = job_clusters or {}
+        # task_key -> job_cluster_key; SubmitTask has no such field, so it is
+        # only set on the jobs.Task built for a transient job
+        self.job_cluster_keys = {}
+        self.transient_job_id = None
         self.workspace_client = get_workspace_client()
     
-    def add_task(self, task_key, notebook_path:Path, params = {}, depend_on = None, cluster_id = None):
+    def add_task(self, task_key, notebook_path:Path, params = {}, depend_on = None, cluster_id = None, job_cluster_key = None):
+        if job_cluster_key is not None and job_cluster_key not in self.job_clusters:
+            raise ValueError(f"JOB CLUSTER NOT FOUND: Job cluster key {job_cluster_key} not declared")
+        if job_cluster_key is not None:
+            self.job_cluster_keys[task_key] = job_cluster_key
         self.tasks.append(
             jobs.SubmitTask(
-                existing_cluster_id=cluster_id if cluster_id else self.cluster_id,
-                notebook_task=jobs.NotebookTask(notebook_path=notebook_path, base_parameters=params),
+                existing_cluster_id=None if job_cluster_key else (cluster_id if cluster_id else self.cluster_id),
+                notebook_task=jobs.NotebookTask(notebook_path=notebook_path, base_parameters={**self.base_parameters, **params}),
                 task_key=task_key,
                 depends_on=[jobs.TaskDependency(task_key=i) for i in depend_on] if depend_on is not None else None
             )
         )
 
-    def run(self):
-        return self.workspace_client.jobs.submit(
-            run_name = self.name,
-            tasks = self.tasks
+    def uses_job_clusters(self):
+        return bool(self.job_cluster_keys)
+
+    def run(self, priority = 0):
+        with span("api.submit", run_name=self.name, tasks=len(self.tasks)) as s:
+            if self.uses_job_clusters():
+                run = self._run_on_job_clusters(priority)
+            else:
+                run = get_admission_controller().submit(
+                    self.workspace_client.jobs.submit,
+                    run_name = self.name,
+                    tasks = self.tasks,
+                    priority = priority
+                )
+            s.set(run_id=run.run_id)
+        return run
+
+    def _run_on_job_clusters(self, priority = 0):
+        # One-time submissions cannot declare shared job clusters, so the
+        # tasks run through a transient job that is removed by cleanup()
+        job = get_admission_controller().call(
+            "jobs",
+            self.workspace_client.jobs.create,
+            name=self.name,
+            tasks=[self._job_task(task) for task in self.tasks],
+            job_clusters=[
+                jobs.JobCluster(job_cluster_key=key, new_cluster=compute.ClusterSpec.from_dict(spec))
+                for key, spec in self.job_clusters.items()
+            ],
+            tags={self.TRANSIENT_JOB_TAG: "true"}
+        )
+        self.transient_job_id = job.job_id
+        return get_admission_controller().submit(
+            self.workspace_client.jobs.run_now, job_id=job.job_id, priority=priority
         )
+
+    def _job_task(self, task):
+        job_task = jobs.Task.from_dict(task.as_dict())
+        job_task.job_cluster_key = self.job_cluster_keys.get(task.task_key)
+        return job_task
+
+    def cleanup(self):
+        """Delete the transient job once its run is no longer needed."""
+        if self.transient_job_id is not None:
+            self.workspace_client.jobs.delete(job_id=self.transient_job_id)
+            self.transient_job_id = None
     
     def as_dict(self):
         return {
             "run_name": self.name,
             "cluster_id": self.cluster_id,
-            "tasks": [task.as_dict() for task in self.tasks]
+            "job_clusters": self.job_clusters,
+            "tasks": [self._job_task(task).as_dict() for task in self.tasks]
         }
\ No newline at end of file
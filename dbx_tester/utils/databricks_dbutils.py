@@ -1,13 +1,10 @@
-from pyspark.dbutils import DBUtils
-from pyspark.sql import SparkSession
+from dbx_tester.utils.backend import get_backend
 
 def run_notebook(path, params={}):
-    dbutils = DBUtils(SparkSession.builder.getOrCreate())
-    dbutils.notebook.run(path=path, timeout_seconds=0, arguments=params)
+    get_backend().run_notebook(path, params)
 
 def get_param(param):
-    try:
-        dbutils = DBUtils(SparkSession.builder.getOrCreate())
-        return dbutils.widgets.get(param)
-    except Exception as e:
-        return None
\ No newline at end of file
+    return get_backend().get_param(param)
+
+def exit_notebook(value):
+    get_backend().exit_notebook(value)
@@ -0,0 +1,627 @@
+from collections import Counter
+from pathlib import Path, PurePosixPath
+from types import SimpleNamespace
+import base64
+import itertools
+import threading
+import time
+
+from databricks.sdk.service import jobs
+from databricks.sdk.service.workspace import ObjectType
+
+from dbx_tester.utils.admission import TokenBucket
+from dbx_tester.utils.backend import Backend
+
+
+class FakeApiError(Exception):
+    def __init__(self, message, error_code=None):
+        super().__init__(message)
+        self.error_code = error_code
+
+
+def _dependency_keys(task):
+    return [dep.task_key for dep in getattr(task, "depends_on", None) or []]
+
+
+def _request_tasks(tasks, task_type, job_clusters=None):
+    """Tasks of a request as the SDK serializes them, checked like the Jobs API.
+
+    Tasks must be SDK request objects; duplicate task keys and dependencies
+    or job clusters that the request does not declare are rejected.
+    """
+    tasks = [task_type.from_dict(task.as_dict()) for task in tasks or []]
+    keys = [task.task_key for task in tasks]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise FakeApiError(f"Task keys must be unique: {duplicates}", "INVALID_PARAMETER_VALUE")
+    cluster_keys = {cluster.job_cluster_key for cluster in job_clusters or []}
+    for task in tasks:
+        unknown = [key for key in _dependency_keys(task) if key not in keys]
+        if unknown:
+            raise FakeApiError(f"Task {task.task_key} depends on unknown tasks {unknown}", "INVALID_PARAMETER_VALUE")
+        job_cluster_key = getattr(task, "job_cluster_key", None)
+        if job_cluster_key is not None and job_cluster_key not in cluster_keys:
+            raise FakeApiError(f"Task {task.task_key} uses undeclared job cluster {job_cluster_key}", "INVALID_PARAMETER_VALUE")
+    return tasks
+
+
+class _TaskSpec:
+    __slots__ = ("task_key", "depends_on", "notebook_path", "params", "cluster_id")
+
+    def __init__(self, task_key, depends_on=(), notebook_path=None, params=None, cluster_id=None):
+        self.task_key = task_key
+        self.depends_on = list(depends_on)
+        self.notebook_path = notebook_path
+        self.params = dict(params or {})
+        self.cluster_id = cluster_id
+
+    @classmethod
+    def from_task(cls, task):
+        notebook_task = getattr(task, "notebook_task", None)
+        return cls(
+            task.task_key,
+            _dependency_keys(task),
+            getattr(notebook_task, "notebook_path", None),
+            getattr(notebook_task, "base_parameters", None),
+            getattr(task, "existing_cluster_id", None),
+        )
+
+
+class _Attempt:
+    __slots__ = ("run_id", "task_key", "attempt_number", "start", "end", "result", "message")
+
+    def __init__(self, run_id, task_key, attempt_number, start, end, result, message=""):
+        self.run_id = run_id
+        self.task_key = task_key
+        self.attempt_number = attempt_number
+        self.start = start
+        self.end = end
+        self.result = result
+        self.message = message
+
+
+class _Run:
+    def __init__(self, run_id, name, job_id, specs, start_epoch_ms):
+        self.run_id = run_id
+        self.name = name
+        self.job_id = job_id
+        self.specs = {spec.task_key: spec for spec in specs}
+        self.start_epoch_ms = start_epoch_ms
+        self.attempts = []
+        self.repairs = []
+
+    def latest(self):
+        latest = {}
+        for attempt in self.attempts:
+            latest[attempt.task_key] = attempt
+        return latest
+
+    def order(self):
+        """Task keys in dependency order."""
+        ordered, seen = [], set()
+
+        def visit(key):
+            if key in seen:
+                return
+            seen.add(key)
+            for dep in self.specs[key].depends_on:
+                if dep in self.specs:
+                    visit(dep)
+            ordered.append(key)
+
+        for key in self.specs:
+            visit(key)
+        return ordered
+
+    def dependents(self, keys):
+        keys = set(keys)
+        changed = True
+        while changed:
+            changed = False
+            for key, spec in self.specs.items():
+                if key not in keys and keys.intersection(spec.depends_on):
+                    keys.add(key)
+                    changed = True
+        return keys
+
+
+def _task_state(attempt, now):
+    if now < attempt.start:
+        return SimpleNamespace(life_cycle_state="PENDING", result_state=None, state_message="")
+    if now < attempt.end:
+        return SimpleNamespace(life_cycle_state="RUNNING", result_state=None, state_message="")
+    return SimpleNamespace(life_cycle_state="TERMINATED", result_state=attempt.result, state_message=attempt.message)
+
+
+def _epoch_ms(monotonic):
+    return int((time.time() - time.monotonic() + monotonic) * 1000)
+
+
+def _run_state(attempts, now):
+    if any(now < attempt.end for attempt in attempts):
+        started = any(now >= attempt.start for attempt in attempts)
+        return SimpleNamespace(life_cycle_state="RUNNING" if started else "PENDING", result_state=None, state_message="")
+    results = {attempt.result for attempt in attempts}
+    if "CANCELED" in results:
+        result = "CANCELED"
+    elif results & {"FAILED", "UPSTREAM_FAILED"}:
+        result = "FAILED"
+    else:
+        result = "SUCCESS"
+    return SimpleNamespace(life_cycle_state="TERMINATED", result_state=result, state_message="")
+
+
+class _Service:
+    family = None
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def _call(self, endpoint):
+        self._backend._api_call(self.family, endpoint)
+
+
+class FakeWorkspaceService(_Service):
+    family = "workspace"
+
+    def get_status(self, path):
+        self._call("workspace.get_status")
+        return self._backend._object_info(path)
+
+    def import_(self, path, content=None, format=None, language=None, overwrite=False):
+        self._call("workspace.import_")
+        self._backend._put_notebook(path, base64.b64decode(content) if content else b"", overwrite)
+
+    def export(self, path, format=None):
+        self._call("workspace.export")
+        self._backend._object_info(path)
+        content = self._backend.objects.get(str(path))
+        if content is None and self._backend.local_files:
+            content = Path(path).read_bytes()
+        return SimpleNamespace(content=base64.b64encode(content or b"").decode("utf-8"))
+
+    def list(self, path, recursive=False, **kwargs):
+        # Like the SDK, a recursive listing requests every directory separately
+        self._call("workspace.list")
+        infos = [self._backend._object_info(child) for child in self._backend._children(str(path))]
+        if recursive:
+            for info in list(infos):
+                if info.object_type == ObjectType.DIRECTORY:
+                    infos.extend(self.list(info.path, recursive=True))
+        return iter(infos)
+
+    def mkdirs(self, path):
+        self._call("workspace.mkdirs")
+        with self._backend._lock:
+            self._backend.directories.update(parent.as_posix() for parent in PurePosixPath(path, "_").parents)
+        if self._backend.local_files:
+            Path(path).mkdir(parents=True, exist_ok=True)
+
+    def delete(self, path, recursive=False):
+        self._call("workspace.delete")
+        path = str(path)
+        with self._backend._lock:
+            for key in [key for key in self._backend.objects if key == path or (recursive and key.startswith(path + "/"))]:
+                del self._backend.objects[key]
+            self._backend.directories = {
+                parent.as_posix() for key in self._backend.objects for parent in PurePosixPath(key).parents
+            }
+
+
+class FakeJobsService(_Service):
+    family = "jobs"
+
+    def create(self, name=None, tasks=None, job_clusters=None, tags=None, **kwargs):
+        self._call("jobs.create")
+        tasks = _request_tasks(tasks, jobs.Task, job_clusters)
+        return SimpleNamespace(job_id=self._backend.add_job(name, tasks=tasks, tags=tags))
+
+    def get(self, job_id):
+        self._call("jobs.get")
+        return self._backend._job(job_id)
+
+    def list(self, name=None, **kwargs):
+        self._call("jobs.list")
+        return iter([job for job in list(self._backend.jobs.values()) if name is None or job.settings.name == name])
+
+    def delete(self, job_id):
+        self._call("jobs.delete")
+        self._backend._job(job_id)
+        del self._backend.jobs[job_id]
+
+    def submit(self, run_name=None, tasks=None, **kwargs):
+        self._call("jobs.submit")
+        specs = [_TaskSpec.from_task(task) for task in _request_tasks(tasks, jobs.SubmitTask)]
+        return SimpleNamespace(run_id=self._backend._start_run(run_name, None, specs))
+
+    def run_now(self, job_id, job_parameters=None, **kwargs):
+        self._call("jobs.run_now")
+        job = self._backend._job(job_id)
+        specs = [_TaskSpec.from_task(task) for task in job.settings.tasks or []]
+        if not specs:
+            specs = [_TaskSpec(job.settings.name, params=job_parameters)]
+        return SimpleNamespace(run_id=self._backend._start_run(job.settings.name, job_id, specs))
+
+    def get_run(self, run_id, **kwargs):
+        self._call("jobs.get_run")
+        return self._backend._run_info(run_id)
+
+    def get_run_output(self, run_id):
+        self._call("jobs.get_run_output")
+        return self._backend._run_output(run_id)
+
+    def list_runs(self, job_id=None, start_time_from=None, active_only=False, **kwargs):
+        self._call("jobs.list_runs")
+        runs = [
+            run for run in reversed(list(self._backend.runs.values()))
+            if (job_id is None or run.job_id == job_id)
+            and (start_time_from is None or run.start_epoch_ms >= start_time_from)
+        ]
+        infos = [self._backend._run_info(run.run_id) for run in runs]
+        if active_only:
+            infos = [info for info in infos if info.state.life_cycle_state != "TERMINATED"]
+        return iter(infos)
+
+    def cancel_run(self, run_id):
+        self._call("jobs.cancel_run")
+        self._backend._cancel_run(run_id)
+
+    def repair_run(self, run_id, rerun_tasks=None, rerun_dependent_tasks=False, latest_repair_id=None, **kwargs):
+        self._call("jobs.repair_run")
+        repair_id = self._backend._repair_run(run_id, rerun_tasks or [], rerun_dependent_tasks)
+        return SimpleNamespace(response=SimpleNamespace(repair_id=repair_id))
+
+
+class FakeClustersService(_Service):
+    family = "clusters"
+
+    def list(self, **kwargs):
+        self._call("clusters.list")
+        return iter(list(self._backend.clusters.values()))
+
+    def get(self, cluster_id):
+        self._call("clusters.get")
+        try:
+            return self._backend.clusters[cluster_id]
+        except KeyError:
+            raise FakeApiError(f"Cluster {cluster_id} does not exist", "INVALID_PARAMETER_VALUE")
+
+    def start(self, cluster_id):
+        self._call("clusters.start")
+        self.get(cluster_id).state = "RUNNING"
+
+
+class FakeWorkspaceClient:
+    def __init__(self, backend):
+        self.workspace = FakeWorkspaceService(backend)
+        self.jobs = FakeJobsService(backend)
+        self.clusters = FakeClustersService(backend)
+
+
+class FakeWidgets:
+    def __init__(self, values=None):
+        self._values = dict(values or {})
+        self._defaults = {}
+
+    def text(self, key, defaultValue="", label=None):
+        self._defaults.setdefault(key, defaultValue)
+
+    def get(self, key):
+        if key in self._values:
+            return self._values[key]
+        if key in self._defaults:
+            return self._defaults[key]
+        raise ValueError(f"No input widget named {key} is defined")
+
+    def removeAll(self):
+        self._defaults.clear()
+
+
+class FakeTaskValues:
+    def __init__(self, store, task_key=None):
+        self._store = store
+        self._task_key = task_key
+
+    def set(self, key, value):
+        self._store[(self._task_key, key)] = value
+
+    def get(self, taskKey, key, default=None, debugValue=None):
+        return self._store.get((taskKey, key), default if default is not None else debugValue)
+
+
+class NotebookExit(Exception):
+    """Raised by ``dbutils.notebook.exit`` to stop the notebook with a value."""
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.value = value
+
+
+def _exit_notebook(value):
+    raise NotebookExit(value)
+
+
+class FakeDBUtils:
+    """The parts of dbutils used by test notebooks: widgets, task values and notebook.run/exit."""
+
+    def __init__(self, widgets=None, task_values=None, task_key=None, run_notebook=None):
+        self.widgets = FakeWidgets(widgets)
+        self.jobs = SimpleNamespace(taskValues=FakeTaskValues({} if task_values is None else task_values, task_key))
+        self.notebook = SimpleNamespace(
+            run=lambda path, timeout_seconds=0, arguments=None: run_notebook(path, arguments or {}) if run_notebook else None,
+            exit=_exit_notebook
+        )
+
+
+class FakeBackend(Backend):
+    """In-process stand-in for a workspace, its jobs and clusters.
+
+    Workspace notebooks are kept in memory and, with ``local_files``, also
+    written to the same path on local disk so that path-based discovery works
+    as on the /Workspace mount. Runs follow their task dependencies in real
+    time: every task takes ``task_duration`` seconds (a number or a callable
+    of the task key) and fails while ``failures`` holds attempts for its task
+    key or run name. ``latency`` delays every API call and ``rates`` maps an
+    API family to a (requests per second, burst) limit; calls over the limit
+    fail with a 429 error, as do submissions beyond ``max_active_runs``.
+    ``outputs`` holds the exit value of a task key or run name, reported as
+    the error of attempts that fail. Submitted and created tasks must be SDK
+    request objects and are checked for duplicate and unknown task keys.
+    """
+
+    def __init__(
+        self,
+        notebook_path=None,
+        params=None,
+        task_duration=0.0,
+        failures=None,
+        latency=0.0,
+        rates=None,
+        max_active_runs=None,
+        local_files=True,
+        outputs=None,
+    ):
+        self.current_notebook = notebook_path
+        self.dbutils = FakeDBUtils(params, run_notebook=self.run_notebook)
+        self.task_duration = task_duration
+        self.failures = dict(failures or {})
+        self.latency = latency
+        self.max_active_runs = max_active_runs
+        self.local_files = local_files
+        self.outputs = dict(outputs or {})
+
+        self.objects = {}
+        self.directories = set()
+        self.jobs = {}
+        self.runs = {}
+        self.task_runs = {}
+        self.clusters = {}
+        self.notebook_runs = []
+        self.notebook_runner = None
+        self.calls = Counter()
+
+        self._buckets = {family: TokenBucket(rate, capacity) for family, (rate, capacity) in (rates or {}).items()}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._client = FakeWorkspaceClient(self)
+
+    # Backend interface
+
+    def workspace_client(self):
+        return self._client
+
+    def notebook_path(self):
+        if self.current_notebook is None:
+            raise FakeApiError("No notebook is executing")
+        return str(self.current_notebook)
+
+    def run_notebook(self, path, params):
+        self.notebook_runs.append((str(path), dict(params)))
+        if self.notebook_runner is not None:
+            self.notebook_runner(path, params)
+
+    def get_param(self, param):
+        try:
+            return self.dbutils.widgets.get(param)
+        except ValueError:
+            return None
+
+    def exit_notebook(self, value):
+        self.dbutils.notebook.exit(value)
+
+    # Seeding
+
+    def add_notebook(self, path, content=b""):
+        self._put_notebook(path, content, overwrite=True)
+
+    def add_job(self, name, tasks=None, tags=None):
+        with self._lock:
+            job_id = next(self._ids)
+            self.jobs[job_id] = SimpleNamespace(
+                job_id=job_id,
+                created_time=int(time.time() * 1000),
+                settings=SimpleNamespace(name=name, tasks=list(tasks or []), tags=tags or {})
+            )
+            return job_id
+
+    def add_cluster(self, name, state="RUNNING", start_seconds=0.0):
+        with self._lock:
+            cluster_id = f"cluster-{next(self._ids)}"
+            self.clusters[cluster_id] = SimpleNamespace(
+                cluster_id=cluster_id, cluster_name=name, state=state, start_seconds=start_seconds
+            )
+            return cluster_id
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    # Internals
+
+    def _api_call(self, family, endpoint):
+        self.calls[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency(endpoint) if callable(self.latency) else self.latency)
+        bucket = self._buckets.get(family)
+        if bucket is not None and bucket.try_acquire():
+            raise FakeApiError("429 Too Many Requests", "TOO_MANY_REQUESTS")
+
+    def _object_info(self, path):
+        path = str(path)
+        if path in self.objects:
+            return SimpleNamespace(path=path, object_type=ObjectType.NOTEBOOK)
+        if path.rstrip("/") in self.directories:
+            return SimpleNamespace(path=path, object_type=ObjectType.DIRECTORY)
+        if self.local_files:
+            local = Path(path)
+            if local.is_file():
+                # Sidecars and other workspace files are not notebooks
+                object_type = ObjectType.NOTEBOOK if local.suffix in ("", ".ipynb") else ObjectType.FILE
+                return SimpleNamespace(path=path, object_type=object_type)
+            if local.is_dir():
+                return SimpleNamespace(path=path, object_type=ObjectType.DIRECTORY)
+        raise FakeApiError(f"Path ({path}) doesn't exist.", "RESOURCE_DOES_NOT_EXIST")
+
+    def _children(self, path):
+        prefix = path.rstrip("/") + "/"
+        children = {prefix + key[len(prefix):].split("/")[0] for key in self.objects if key.startswith(prefix)}
+        children.update(directory for directory in self.directories if directory.startswith(prefix) and "/" not in directory[len(prefix):])
+        if self.local_files and Path(path).is_dir():
+            children.update(child.as_posix() for child in Path(path).iterdir())
+        return sorted(children)
+
+    def _put_notebook(self, path, content, overwrite):
+        path = str(path)
+        with self._lock:
+            if path in self.objects and not overwrite:
+                raise FakeApiError(f"Path ({path}) already exists.", "RESOURCE_ALREADY_EXISTS")
+            self.objects[path] = content
+            self.directories.update(parent.as_posix() for parent in PurePosixPath(path).parents)
+        if self.local_files:
+            local = Path(path)
+            local.parent.mkdir(parents=True, exist_ok=True)
+            local.write_bytes(content)
+
+    def _job(self, job_id):
+        try:
+            return self.jobs[job_id]
+        except KeyError:
+            raise FakeApiError(f"Job {job_id} does not exist.", "INVALID_PARAMETER_VALUE")
+
+    def _run(self, run_id):
+        try:
+            return self.runs[run_id]
+        except KeyError:
+            raise FakeApiError(f"Run {run_id} does not exist.", "INVALID_PARAMETER_VALUE")
+
+    def _active_runs(self, now):
+        return sum(1 for run in self.runs.values() if any(now < attempt.end for attempt in run.attempts))
+
+    def _consume_failure(self, *names):
+        for name in names:
+            remaining = self.failures.get(name)
+            if remaining:
+                if remaining is not True:
+                    self.failures[name] = remaining - 1
+                return True
+        return False
+
+    def _duration(self, task_key):
+        return self.task_duration(task_key) if callable(self.task_duration) else self.task_duration
+
+    def _schedule(self, run, keys, now):
+        """Plan new attempts of the given tasks, starting once their upstream finished."""
+        latest = run.latest()
+        scheduled = []
+        for key in run.order():
+            if key not in keys:
+                continue
+            spec = run.specs[key]
+            upstream = [latest[dep] for dep in spec.depends_on if dep in latest]
+            start = max([now] + [attempt.end for attempt in upstream])
+            attempt_number = sum(1 for attempt in run.attempts if attempt.task_key == key)
+            if any(attempt.result != "SUCCESS" for attempt in upstream):
+                attempt = _Attempt(next(self._ids), key, attempt_number, start, start, "UPSTREAM_FAILED")
+            else:
+                cluster = self.clusters.get(spec.cluster_id)
+                if cluster is not None and cluster.state == "TERMINATED":
+                    start += cluster.start_seconds
+                    cluster.state = "RUNNING"
+                failed = self._consume_failure(key, run.name)
+                attempt = _Attempt(
+                    next(self._ids), key, attempt_number, start, start + self._duration(key),
+                    "FAILED" if failed else "SUCCESS", "Injected failure" if failed else ""
+                )
+            run.attempts.append(attempt)
+            self.task_runs[attempt.run_id] = (run, attempt)
+            scheduled.append(attempt)
+            latest[key] = attempt
+        return scheduled
+
+    def _start_run(self, name, job_id, specs):
+        with self._lock:
+            now = time.monotonic()
+            if self.max_active_runs is not None and self._active_runs(now) >= self.max_active_runs:
+                raise FakeApiError("Too many active runs", "RESOURCE_EXHAUSTED")
+            run = _Run(next(self._ids), name, job_id, specs, int(time.time() * 1000))
+            self.runs[run.run_id] = run
+            self._schedule(run, set(run.specs), now)
+            return run.run_id
+
+    def _repair_run(self, run_id, rerun_tasks, rerun_dependent_tasks):
+        with self._lock:
+            run = self._run(run_id)
+            keys = run.dependents(rerun_tasks) if rerun_dependent_tasks else set(rerun_tasks)
+            repair_id = next(self._ids)
+            run.repairs.append((repair_id, self._schedule(run, keys, time.monotonic())))
+            return repair_id
+
+    def _cancel_run(self, run_id):
+        with self._lock:
+            now = time.monotonic()
+            for attempt in self._run(run_id).attempts:
+                if now < attempt.end:
+                    attempt.start = min(attempt.start, now)
+                    attempt.end = now
+                    attempt.result = "CANCELED"
+
+    def _run_info(self, run_id):
+        with self._lock:
+            run = self._run(run_id)
+            now = time.monotonic()
+            latest = list(run.latest().values())
+            return SimpleNamespace(
+                run_id=run.run_id,
+                job_id=run.job_id,
+                run_name=run.name,
+                start_time=run.start_epoch_ms,
+                state=_run_state(latest, now),
+                tasks=[
+                    SimpleNamespace(
+                        run_id=attempt.run_id,
+                        task_key=attempt.task_key,
+                        attempt_number=attempt.attempt_number,
+                        start_time=_epoch_ms(attempt.start) if now >= attempt.start else 0,
+                        end_time=_epoch_ms(attempt.end) if now >= attempt.end else 0,
+                        state=_task_state(attempt, now)
+                    )
+                    for attempt in run.attempts
+                ],
+                repair_history=[
+                    SimpleNamespace(id=repair_id, type="REPAIR", state=_run_state(attempts, now))
+                    for repair_id, attempts in run.repairs
+                ],
+            )
+
+    def _run_output(self, run_id):
+        with self._lock:
+            try:
+                run, attempt = self.task_runs[run_id]
+            except KeyError:
+                raise FakeApiError(f"Run {run_id} does not exist.", "INVALID_PARAMETER_VALUE")
+            value = self.outputs.get(attempt.task_key, self.outputs.get(run.name))
+            finished = time.monotonic() >= attempt.end
+            failed = finished and attempt.result == "FAILED"
+            return SimpleNamespace(
+                notebook_output=SimpleNamespace(result=value if finished and not failed else None, truncated=False),
+                error=(value or attempt.message) if failed else None
+            )
@@ -1,51 +1,120 @@
 from pathlib import Path
-from databricks.sdk.service import jobs
+from databricks.sdk.service import jobs, compute
 
 from dbx_tester.utils.api import get_workspace_client
+from dbx_tester.utils.admission import get_admission_controller
 
 
 class submit_run:
-    def __init__(self, name, cluster_id = None):
+    # Tag marking jobs created only to run a submission on job clusters
+    TRANSIENT_JOB_TAG = "dbx_tester_transient"
+
+    def __init__(self, name, cluster_id = None, base_parameters = None, job_clusters = None):
         self.name = name
         self.tasks = []
         self.cluster_id = cluster_id
+        # Parameters shared by every task, e.g. the resolved config snapshot
+        self.base_parameters = base_parameters or {}
+        # job_cluster_key -> cluster spec dict shared by the tasks of this submission
+        self.job_clusters = job_clusters or {}
+        # task_key -> job_cluster_key; SubmitTask has no such field, so it is
+        # only set on the jobs.Task built for a transient job
+        self.job_cluster_keys = {}
+        self.transient_job_id = None
         self.workspace_client = get_workspace_client()
     
-    def add_task(self, task_key, notebook_path:Path, params = {}, depend_on = None, cluster_id = None):
+    def add_task(self, task_key, notebook_path:Path, params = {}, depend_on = None, cluster_id = None, job_cluster_key = None):
+        if job_cluster_key is not None and job_cluster_key not in self.job_clusters:
+            raise ValueError(f"JOB CLUSTER NOT FOUND: Job cluster key {job_cluster_key} not declared")
+        if job_cluster_key is not None:
+            self.job_cluster_keys[task_key] = job_cluster_key
         self.tasks.append(
             jobs.SubmitTask(
-                existing_cluster_id=cluster_id if cluster_id else self.cluster_id,
-                notebook_task=jobs.NotebookTask(notebook_path=notebook_path, base_parameters=params),
+                existing_cluster_id=None if job_cluster_key else (cluster_id if cluster_id else self.cluster_id),
+                notebook_task=jobs.NotebookTask(notebook_path=notebook_path, base_parameters={**self.base_parameters, **params}),
                 task_key=task_key,
                 depends_on=[jobs.TaskDependency(task_key=i) for i in depend_on] if depend_on is not None else None
             )
         )
 
-    def run(self):
-        return self.workspace_client.jobs.submit(
+    def uses_job_clusters(self):
+        return bool(self.job_cluster_keys)
+
+    def run(self, priority = 0):
+        if self.uses_job_clusters():
+            return self._run_on_job_clusters(priority)
+        return get_admission_controller().submit(
+            self.workspace_client.jobs.submit,
             run_name = self.name,
-            tasks = self.tasks
+            tasks = self.tasks,
+            priority = priority
+        )
+
+    def _run_on_job_clusters(self, priority = 0):
+        # One-time submissions cannot declare shared job clusters, so the
+        # tasks run through a transient job that is removed by cleanup()
+        job = get_admission_controller().call(
+            "jobs",
+            self.workspace_client.jobs.create,
+            name=self.name,
+            tasks=[self._job_task(task) for task in self.tasks],
+            job_clusters=[
+                jobs.JobCluster(job_cluster_key=key, new_cluster=compute.ClusterSpec.from_dict(spec))
+                for key, spec in self.job_clusters.items()
+            ],
+            tags={self.TRANSIENT_JOB_TAG: "true"}
+        )
+        self.transient_job_id = job.job_id
+        return get_admission_controller().submit(
+            self.workspace_client.jobs.run_now, job_id=job.job_id, priority=priority
         )
+
+    def _job_task(self, task):
+        job_task = jobs.Task.from_dict(task.as_dict())
+        job_task.job_cluster_key = self.job_cluster_keys.get(task.task_key)
+        return job_task
+
+    def cleanup(self):
+        """Delete the transient job once its run is no longer needed."""
+        if self.transient_job_id is not None:
+            self.workspace_client.jobs.delete(job_id=self.transient_job_id)
+            self.transient_job_id = None
     
     def as_dict(self):
         return {
             "run_name": self.name,
             "cluster_id": self.cluster_id,
-            "tasks": [task.as_dict() for task in self.tasks]
+            "job_clusters": self.job_clusters,
+            "tasks": [self._job_task(task).as_dict() for task in self.tasks]
         }
 
     
 class JobRunner():
-    def __init__(self, job_id, params = {}):
+    def __init__(self, job_id, params = {}, run_id = None):
         self.job_id = job_id
-        self.run_id = None
+        self.params = params
+        self.run_id = run_id
 
     def run(self):
         w = get_workspace_client()
-        run_id = w.jobs.run_now(job_id=self.job_id, params = {}).run_id
-        return run_id
+        self.run_id = get_admission_controller().submit(
+            w.jobs.run_now, job_id=self.job_id, job_parameters=self.params
+        ).run_id
+        return self.run_id
     
     def get_run_status(self):
         w = get_workspace_client()
-        run = w.jobs.get_run(run_id=self.run_id)
-        return run.state.life_cycle_state, run.state.result_state
\ No newline at end of file
+        run = get_admission_controller().call("jobs", w.jobs.get_run, run_id=self.run_id)
+        return run.state.life_cycle_state, run.state.result_state
+
+    def cancel_run(self):
+        w = get_workspace_client()
+        w.jobs.cancel_run(run_id=self.run_id)
+
+
+def find_job_run(job_id, start_time_from=None):
+    """Most recent run of a job started at or after start_time_from (epoch ms)."""
+    w = get_workspace_client()
+    for run in w.jobs.list_runs(job_id=job_id, start_time_from=start_time_from):
+        return run.run_id
+    return None
\ No newline at end of file
@@ -7,6 +7,7 @@ import uuid
 
 
 from dbx_tester.utils.api import get_workspace_client
+from dbx_tester.utils.admission import get_admission_controller
 
 class notebook_builder:
     def __init__(self, name:str):
@@ -37,8 +38,11 @@ class notebook_builder:
             "nbformat": 4,
             "nbformat_minor": 0
         }
-    def add_cell(self, cell):
-        self._notebook_dict['cells'].append(self.create_cell(cell))
+    def add_cell(self, cell, index = None):
+        if index is None:
+            self._notebook_dict['cells'].append(self.create_cell(cell))
+        else:
+            self._notebook_dict['cells'].insert(index, self.create_cell(cell))
 
     def save_notebook(self, path):
 
@@ -48,7 +52,9 @@ class notebook_builder:
 
         encoded_bytes = base64.b64encode(out_utf8).decode('utf-8')
 
-        self.workspace_client.workspace.import_(
+        get_admission_controller().call(
+            "workspace",
+            self.workspace_client.workspace.import_,
             path=path
             , content=encoded_bytes,
             overwrite=True,
@@ -0,0 +1,29 @@
+import json
+
+# Marker lines of notebooks exported in Databricks source format
+SOURCE_HEADER = "# Databricks notebook source"
+SOURCE_SEPARATOR = "\n# COMMAND ----------\n"
+MAGIC_PREFIX = "# MAGIC"
+
+
+def jupyter_cells(notebook):
+    return [
+        "".join(cell["source"]) if isinstance(cell["source"], list) else cell["source"]
+        for cell in notebook["cells"] if cell.get("cell_type", "code") == "code"
+    ]
+
+def parse_cells(text, jupyter=False):
+    """Code cells of a notebook in Jupyter or Databricks source format."""
+    if jupyter or text.lstrip().startswith("{"):
+        return jupyter_cells(json.loads(text))
+
+    if text.startswith(SOURCE_HEADER):
+        text = text[len(SOURCE_HEADER):]
+    cells = []
+    for cell in text.split(SOURCE_SEPARATOR):
+        # Magic cells are exported as comments: "# MAGIC %run ./helpers"
+        lines = [line[len(MAGIC_PREFIX) + 1:] if line.startswith(MAGIC_PREFIX) else line for line in cell.splitlines()]
+        cell = "\n".join(lines).strip("\n")
+        if cell.strip():
+            cells.append(cell)
+    return cells
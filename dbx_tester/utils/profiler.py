@@ -0,0 +1,254 @@
+from bisect import bisect_left
+import json
+import logging
+import os
+import threading
+import time
+
+from dbx_tester.utils.admission import is_throttled
+
+logger = logging.getLogger(__name__)
+
+# Set to a truthy value to profile API calls from interpreter start
+PROFILE_ENV = "DBX_TESTER_PROFILE_API"
+
+# Upper bounds in milliseconds of the latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf"))
+
+
+def _payload_size(value):
+    """Approximate JSON size of a request or response in bytes."""
+    if value is None:
+        return 0
+    if hasattr(value, "as_dict"):
+        value = value.as_dict()
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class EndpointStats:
+    __slots__ = ("calls", "errors", "throttled", "retries", "total_ms", "max_ms", "request_bytes", "response_bytes", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+
+    def percentile(self, pct):
+        """Upper bound of the histogram bucket holding the percentile."""
+        if not self.calls:
+            return None
+        rank = pct / 100 * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(self.max_ms, 3),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
+
+
+class ApiProfiler:
+    """Per-endpoint statistics of workspace client calls.
+
+    A call made right after a throttled call to the same endpoint on the same
+    thread is counted as a retry. Listing calls are counted when their first
+    item is requested, so listings broken off early count too; the page
+    requests made while iterating further add to the endpoint's total time
+    and response size.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.endpoints = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def wrap(self, client):
+        if not self.enabled or isinstance(client, _ProfiledClient):
+            return client
+        return _ProfiledClient(client, self)
+
+    def _is_retry(self, endpoint):
+        throttled = getattr(self._local, "throttled", None)
+        return throttled is not None and endpoint in throttled
+
+    def record(self, endpoint, elapsed_ms, request_bytes=0, response_bytes=0, error=None):
+        throttled = error is not None and is_throttled(error)
+        retry = self._is_retry(endpoint)
+        pending = getattr(self._local, "throttled", None)
+        if pending is None:
+            pending = self._local.throttled = set()
+        if throttled:
+            pending.add(endpoint)
+        else:
+            pending.discard(endpoint)
+
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.calls += 1
+            stats.errors += error is not None
+            stats.throttled += throttled
+            stats.retries += retry
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+            stats.histogram[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def extend(self, endpoint, elapsed_ms, response_bytes=0, error=None):
+        """Add time, response size and an error to a call already recorded for an endpoint."""
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                return
+            stats.errors += error is not None
+            stats.total_ms += elapsed_ms
+            stats.response_bytes += response_bytes
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def summary(self, top=10, sort_by="total_ms"):
+        """Statistics of the ``top`` endpoints, most expensive first."""
+        with self._lock:
+            rows = [{"endpoint": endpoint, **stats.as_dict()} for endpoint, stats in self.endpoints.items()]
+        rows.sort(key=lambda row: row[sort_by] or 0, reverse=True)
+        return rows[:top]
+
+    def format_summary(self, top=10):
+        rows = self.summary(top)
+        if not rows:
+            return "No API calls recorded"
+        lines = [f"{'endpoint':<28}{'calls':>7}{'total ms':>11}{'p50 ms':>9}{'p95 ms':>9}{'429s':>6}{'retries':>9}{'resp KB':>9}"]
+        for row in rows:
+            lines.append(
+                f"{row['endpoint']:<28}{row['calls']:>7}{row['total_ms']:>11.1f}{row['p50_ms']:>9.1f}"
+                f"{row['p95_ms']:>9.1f}{row['throttled']:>6}{row['retries']:>9}{row['response_bytes'] / 1024:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+class _ProfiledIterator:
+    def __init__(self, iterator, profiler, endpoint, request_bytes, elapsed_ms):
+        self._iterator = iterator
+        self._profiler = profiler
+        self._endpoint = endpoint
+        self._request_bytes = request_bytes
+        self._elapsed_ms = elapsed_ms
+        self._recorded = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            item = next(self._iterator)
+        except StopIteration:
+            self._record(start)
+            raise
+        except Exception as e:
+            self._record(start, error=e)
+            raise
+        self._record(start, _payload_size(item))
+        return item
+
+    def _record(self, start, response_bytes=0, error=None):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if self._recorded:
+            self._profiler.extend(self._endpoint, elapsed_ms, response_bytes, error)
+            return
+        self._recorded = True
+        self._profiler.record(self._endpoint, self._elapsed_ms + elapsed_ms, self._request_bytes, response_bytes, error)
+
+
+class _ProfiledService:
+    def __init__(self, service, name, profiler):
+        self._service = service
+        self._name = name
+        self._profiler = profiler
+
+    def __getattr__(self, attr):
+        method = getattr(self._service, attr)
+        if not callable(method) or attr.startswith("_"):
+            return method
+        endpoint = f"{self._name}.{attr}"
+        profiler = self._profiler
+
+        def call(*args, **kwargs):
+            request_bytes = _payload_size(kwargs) if kwargs else 0
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as e:
+                profiler.record(endpoint, (time.perf_counter() - start) * 1000, request_bytes, error=e)
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if hasattr(result, "__next__"):
+                return _ProfiledIterator(result, profiler, endpoint, request_bytes, elapsed_ms)
+            profiler.record(endpoint, elapsed_ms, request_bytes, _payload_size(result))
+            return result
+
+        call.__name__ = attr
+        return call
+
+
+class _ProfiledClient:
+    """WorkspaceClient proxy timing every service method call."""
+
+    def __init__(self, client, profiler):
+        self._client = client
+        self._profiler = profiler
+
+    def __getattr__(self, attr):
+        service = getattr(self._client, attr)
+        if attr.startswith("_") or callable(service):
+            return service
+        return _ProfiledService(service, attr, self._profiler)
+
+
+_profiler = ApiProfiler(enabled=bool(os.environ.get(PROFILE_ENV)))
+
+
+def get_api_profiler():
+    return _profiler
+
+def configure_api_profiler(enabled=True):
+    """Replace the shared profiler, discarding recorded statistics."""
+    global _profiler
+    _profiler = ApiProfiler(enabled=enabled)
+    return _profiler
+
+def report_api_profile(top=10):
+    """Log the top-N endpoint summary if profiling is enabled."""
+    if not _profiler.enabled:
+        return None
+    summary = _profiler.format_summary(top)
+    logger.info(f"API call profile:\n{summary}")
+    return summary
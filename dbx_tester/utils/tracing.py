@@ -0,0 +1,202 @@
+from functools import wraps
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Set to a truthy value to trace from interpreter start
+TRACE_ENV = "DBX_TESTER_TRACE"
+
+
+class TracingError(Exception):
+    pass
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "thread_id", "start_ns", "end_ns", "attributes", "_tracer")
+
+    def __init__(self, tracer, name, span_id, parent_id, attributes):
+        self._tracer = tracer
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+        self.start_ns = None
+        self.end_ns = None
+
+    def set(self, **attributes):
+        """Add attributes known only once the span is running, e.g. a run ID."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self):
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def __enter__(self):
+        self._tracer._push(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self._tracer._pop(self)
+        return False
+
+
+class _NoopSpan:
+    """Shared span returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Collects nested spans of the test phases.
+
+    Spans nest per thread. While disabled, ``span`` returns a shared no-op
+    span so instrumented code pays one attribute check per call.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin_ns = time.perf_counter_ns()
+        self._origin_epoch = time.time()
+
+    def span(self, name, **attributes):
+        if not self.enabled:
+            return _NOOP_SPAN
+        stack = getattr(self._local, "stack", None)
+        parent_id = stack[-1].span_id if stack else None
+        return Span(self, name, next(self._ids), parent_id, attributes)
+
+    def _push(self, span):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+
+    def _pop(self, span):
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+    def to_chrome_trace(self):
+        """Spans as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": "dbx_tester",
+                "ph": "X",
+                "ts": (span.start_ns - self._origin_ns) / 1e3,
+                "dur": (span.end_ns - span.start_ns) / 1e3,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {"span_id": span.span_id, "parent_id": span.parent_id, **span.attributes},
+            }
+            for span in spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.trace_id}}
+
+    def export_chrome(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        return path
+
+    def export_sqlite(self):
+        """Write the collected spans to the ``trace_spans`` table."""
+        from dbx_tester.db.init import db_conn
+
+        with self._lock:
+            spans = list(self.spans)
+        rows = [
+            (
+                self.trace_id,
+                span.span_id,
+                span.parent_id,
+                span.name,
+                self._origin_epoch + (span.start_ns - self._origin_ns) / 1e9,
+                span.duration_ms,
+                span.thread_id,
+                json.dumps(span.attributes, default=str),
+            )
+            for span in spans
+        ]
+        conn, cursor = db_conn()
+        try:
+            cursor.executemany("""
+            INSERT OR REPLACE INTO trace_spans
+                (trace_id, span_id, parent_id, name, started_at, duration_ms, thread_id, attributes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+            conn.commit()
+        except Exception as e:
+            raise TracingError(f"Error exporting trace: {e}")
+        finally:
+            cursor.close()
+        return len(rows)
+
+
+_tracer = Tracer(enabled=bool(os.environ.get(TRACE_ENV)))
+
+
+def get_tracer():
+    return _tracer
+
+def configure_tracing(enabled=True):
+    """Replace the shared tracer, starting a new trace."""
+    global _tracer
+    _tracer = Tracer(enabled=enabled)
+    return _tracer
+
+def span(name, **attributes):
+    """Context manager timing a phase under the current span."""
+    return _tracer.span(name, **attributes)
+
+def traced(name):
+    """Decorator wrapping every call of a function in a span."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return fn(*args, **kwargs)
+            with _tracer.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,44 @@
+import pytest
+
+import dbx_tester.notebook as notebook_module
+from dbx_tester.global_config import CONFIG_SNAPSHOT_ENV, GlobalConfig
+from dbx_tester.notebook import Notebook, NotebookTest, defer_registration, flush
+from dbx_tester.utils.admission import configure_admission
+from dbx_tester.utils.backend import set_backend
+from dbx_tester.utils.fake_backend import FakeBackend
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend(task_duration=0.01)
+    previous = set_backend(backend)
+    configure_admission()
+    yield backend
+    set_backend(previous)
+
+
+@pytest.fixture
+def test_path(tmp_path, monkeypatch):
+    """Test path of a fake workspace holding the cached tests of two test notebooks."""
+    test_path = tmp_path / "tests"
+    test_path.mkdir()
+    config = GlobalConfig(TEST_PATH=test_path.as_posix(), CLUSTER_ID="cluster", REPO_PATH=tmp_path.as_posix())
+    monkeypatch.setenv(CONFIG_SNAPSHOT_ENV, config.to_snapshot())
+    backend = FakeBackend()
+    backend.add_notebook((tmp_path / "src" / "target").as_posix())
+    previous = set_backend(backend)
+    configure_admission()
+
+    for module, names in {"test_orders": ["test_alpha", "test_beta"], "test_users": ["test_gamma"]}.items():
+        backend.add_notebook((test_path / module).as_posix())
+        backend.current_notebook = test_path / module
+        notebook_module._registry = None
+        defer_registration()
+        for name in names:
+            def body():
+                pass
+            body.__name__ = name
+            NotebookTest(notebook=Notebook("src/target"))(body)
+        flush()
+    yield test_path.as_posix()
+    set_backend(previous)
@@ -0,0 +1,74 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from dbx_tester.utils.admission import AdmissionController, AdmissionRejectedError
+
+
+def test_throttled_calls_are_retried_and_counted():
+    controller = AdmissionController(backoff_seconds=0)
+    calls = []
+
+    def flaky_api():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("429 Too Many Requests")
+        return "ok"
+
+    assert controller.call("jobs", flaky_api) == "ok"
+    assert controller.stats["throttled"] == 2
+
+    with pytest.raises(ValueError):
+        controller.call("jobs", lambda: (_ for _ in ()).throw(ValueError("bad request")))
+
+
+def test_run_slots_queue_by_priority_and_reject():
+    active = {1}
+    controller = AdmissionController(max_active_runs=1, reap_interval=0.01, is_run_active=lambda run_id: run_id in active)
+    controller.submit(lambda: SimpleNamespace(run_id=1))
+
+    order = []
+    def submit(run_id, priority):
+        controller.submit(lambda: order.append(run_id) or SimpleNamespace(run_id=run_id), priority=priority)
+        controller.release_run(run_id)
+
+    threads = [threading.Thread(target=submit, args=(run_id, priority)) for run_id, priority in [(2, 5), (3, 0)]]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    assert order == []
+    active.clear()
+    for thread in threads:
+        thread.join()
+    assert order == [3, 2]
+    assert controller.stats["queued"] == 2
+
+    controller = AdmissionController(max_active_runs=1, max_wait=0.05, is_run_active=lambda run_id: True)
+    controller.submit(lambda: SimpleNamespace(run_id=1))
+    with pytest.raises(AdmissionRejectedError):
+        controller.submit(lambda: SimpleNamespace(run_id=2))
+    assert controller.stats["rejected"] == 1
+
+
+def test_reaping_does_not_block_releases():
+    checking, released = threading.Event(), threading.Event()
+
+    def is_run_active(run_id):
+        checking.set()
+        released.wait(5)
+        return True
+
+    controller = AdmissionController(max_active_runs=1, reap_interval=0, is_run_active=is_run_active)
+    controller.track_run(1)
+    submitter = threading.Thread(target=controller.submit, args=(lambda: SimpleNamespace(run_id=2),))
+    submitter.start()
+    assert checking.wait(5)
+    releaser = threading.Thread(target=controller.release_run, args=(1,))
+    releaser.start()
+    releaser.join(1)
+    assert not releaser.is_alive()
+    released.set()
+    submitter.join(5)
+    assert controller._active_runs == {2}
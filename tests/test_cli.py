@@ -0,0 +1,38 @@
+import json
+
+from dbx_tester.cli import EXIT_ERROR, EXIT_NO_TESTS, EXIT_OK, in_shard, main
+from dbx_tester.utils.backend import get_backend
+from dbx_tester.utils.databricks_api import submit_run
+from dbx_tester.utils.fake_backend import FakeApiError
+
+
+def test_shards_partition_notebooks():
+    ids = [f"folder/test_{i}" for i in range(50)]
+    shards = [[i for i in ids if in_shard(i, index, 3)] for index in (1, 2, 3)]
+    assert sorted(sum(shards, [])) == sorted(ids)
+    assert all(shards)
+
+
+def test_list_filters_by_keyword(test_path, capsys):
+    assert main(["list", "--test-path", test_path, "-k", "ALPHA", "-k", "users"]) == EXIT_OK
+    assert capsys.readouterr().out.split() == ["test_orders::test_alpha", "test_users::test_gamma"]
+    assert main(["list", "--test-path", test_path, "-k", "missing"]) == EXIT_NO_TESTS
+
+
+def test_gc_keeps_recent_transient_jobs(test_path, capsys):
+    backend = get_backend()
+    old = backend.add_job("old", tags={submit_run.TRANSIENT_JOB_TAG: "true"})
+    backend.jobs[old].created_time -= 2 * 60 * 60 * 1000
+    recent = backend.add_job("recent", tags={submit_run.TRANSIENT_JOB_TAG: "true"})
+
+    assert main(["gc", "--test-path", test_path, "--json"]) == EXIT_OK
+    assert json.loads(capsys.readouterr().out)["jobs"] == [old]
+    assert list(backend.jobs) == [recent]
+
+
+def test_workspace_errors_exit_with_error(test_path, monkeypatch):
+    def unauthorized(family, endpoint):
+        raise FakeApiError("Invalid access token", "PERMISSION_DENIED")
+
+    monkeypatch.setattr(get_backend(), "_api_call", unauthorized)
+    assert main(["list", "--test-path", test_path]) == EXIT_ERROR
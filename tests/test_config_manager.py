@@ -0,0 +1,27 @@
+import json
+
+from dbx_tester.config_manager import TASK_VALUES_PARAM, JobClusterConfig, NotebookConfigManager
+
+def test_job_cluster_spec_prefers_instance_pool():
+    spec = JobClusterConfig(spark_version="15.4.x-scala2.12", node_type_id="i3.xlarge", instance_pool_id="pool-1").to_cluster_spec()
+    assert spec == {
+        "spark_version": "15.4.x-scala2.12",
+        "num_workers": 1,
+        "instance_pool_id": "pool-1",
+        "driver_instance_pool_id": "pool-1",
+    }
+
+def test_job_cluster_spec_autoscale_and_policy():
+    spec = JobClusterConfig(
+        spark_version="15.4.x-scala2.12", node_type_id="i3.xlarge", policy_id="p", min_workers=1, max_workers=8
+    ).to_cluster_spec()
+    assert spec["autoscale"] == {"min_workers": 1, "max_workers": 8}
+    assert "num_workers" not in spec
+    assert spec["policy_id"] == "p" and spec["apply_policy_default_values"] is True
+
+def test_task_value_parameters_group_by_task_key():
+    config = NotebookConfigManager()
+    config.add_task_value("setup", "table", "sales").add_task_value("setup", "rows", "10").add_task_value("other", "x", "1")
+    params = config.task_value_parameters()
+    assert set(params) == {"setup", "other"}
+    assert json.loads(params["setup"][TASK_VALUES_PARAM]) == {"table": "sales", "rows": "10"}
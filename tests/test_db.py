@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+
+from dbx_tester.db.init import ConnectionManager
+
+def test_connection_manager_reuses_thread_connection(tmp_path):
+    manager = ConnectionManager(db_path=tmp_path / "test.db")
+    assert manager.connection() is manager.connection()
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not manager.connection()
+    manager.close()
+
+def test_connection_manager_staged_sync(tmp_path):
+    db_path = tmp_path / "test.db"
+    manager = ConnectionManager(db_path=db_path, staged=True, sync_interval=0)
+    conn = manager.connection()
+    conn.execute("CREATE TABLE t (a INTEGER)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    assert not db_path.exists()
+
+    other = ConnectionManager(db_path=db_path, staged=True, sync_interval=0)
+    other.connection()
+    staged = manager.local_path
+    assert other.local_path != staged
+    other.close()
+    assert staged.exists()
+
+    manager.close()
+    assert not staged.parent.exists()
+    assert sqlite3.connect(db_path).execute("SELECT a FROM t").fetchall() == [(1,)]
+
+def test_buffered_writer_batches_and_flushes(tmp_path):
+    from dbx_tester.db import writer as writer_module
+    from dbx_tester.db.init import configure_connection_manager
+
+    manager = configure_connection_manager(db_path=tmp_path / "test.db")
+    manager.connection().execute("CREATE TABLE t (a INTEGER)")
+    writer = writer_module.BufferedWriter(flush_interval=60, batch_size=1000)
+    for i in range(100):
+        writer.submit("INSERT INTO t VALUES (?)", (i,))
+    writer.submit("INSERT INTO missing VALUES (?)", (0,))
+    writer.close()
+    writer.flush()
+
+    assert manager.connection().execute("SELECT COUNT(*) FROM t").fetchone() == (100,)
+    stats = writer.get_stats()
+    assert stats["written"] == 100
+    assert stats["failed"] == 1
+    assert stats["flushes"] == 1
+    assert stats["dropped"] == 0
+    manager.close()
+
+def test_schema_migrations_and_history(tmp_path):
+    from dbx_tester.db import history
+    from dbx_tester.db.init import configure_connection_manager, init
+    from dbx_tester.db.notebook import add_notebook_test, list_notebook_tests
+
+    manager = configure_connection_manager(db_path=tmp_path / "test.db")
+    init()
+    init()
+    conn = manager.connection()
+    assert conn.execute("PRAGMA user_version").fetchone() == (init.SCHEMA_VERSION,)
+
+    add_notebook_test("dir", "path", "test_a", {"nodes": 1})
+    add_notebook_test("dir", "path", "test_a", {"nodes": 2})
+    tests = list_notebook_tests("dir")
+    assert len(tests) == 1 and tests[0]["test_dag"] == {"nodes": 2}
+
+    test_id = tests[0]["test_id"]
+    conn.executemany(
+        "INSERT INTO notebook_test_status (test_id, status, created_at, ends_at) "
+        "VALUES (?, ?, datetime('now', ?), datetime('now', ?))",
+        [
+            (test_id, "FAILED", "-3 minutes", "-2 minutes"),
+            (test_id, "SUCCESS", "-2 minutes", "-1 minutes"),
+            (test_id, "SUCCESS", "-1 minutes", "-1 minutes"),
+        ],
+    )
+    conn.commit()
+
+    assert history.latest_status("notebook", "dir")[0]["status"] == "SUCCESS"
+    rates = history.pass_rates("notebook")[test_id]
+    assert (rates["runs"], rates["passed"], rates["failed"]) == (3, 2, 1)
+    durations = history.duration_percentiles("notebook", test_id, percentiles=(50, 100))
+    assert round(durations[50]) == 60000 and round(durations[100]) == 60000
+    manager.close()
+
+def test_retention_rolls_up_and_deletes_old_rows(tmp_path):
+    from dbx_tester.db.init import configure_connection_manager, init
+    from dbx_tester.db.retention import RetentionPolicy, apply_retention, is_retention_due
+
+    manager = configure_connection_manager(db_path=tmp_path / "test.db")
+    init()
+    conn = manager.connection()
+    conn.executemany(
+        "INSERT INTO notebook_test_status (test_id, status, created_at, ends_at) "
+        "VALUES (1, ?, datetime('now', ?), datetime('now', ?, '+10 seconds'))",
+        [
+            ("SUCCESS", "-40 days", "-40 days"),
+            ("FAILED", "-40 days", "-40 days"),
+            ("SUCCESS", "-1 days", "-1 days"),
+        ],
+    )
+    conn.execute("INSERT INTO notebook_test_logs (test_id, event_type, created_at) VALUES (1, 'x', datetime('now', '-40 days'))")
+    conn.commit()
+
+    policy = RetentionPolicy(keep_days=30)
+    assert is_retention_due(policy)
+    result = apply_retention(policy)
+    assert result == {"rolled_up": 1, "deleted": 3}
+    assert not is_retention_due(policy)
+
+    daily = conn.execute("SELECT runs, passed, failed, round(p50_ms), log_events FROM notebook_test_daily").fetchall()
+    assert daily == [(2, 1, 1, 10000.0, 1)]
+    assert conn.execute("SELECT COUNT(*) FROM notebook_test_status").fetchone() == (1,)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone() == (2,)
+    manager.close()
@@ -0,0 +1,50 @@
+import pytest
+
+from dbx_tester.config_manager import JobConfigManager
+from dbx_tester.jobs import Job, JobTest, JobTestGraph, JobTestProcess, JobTestProcessManager, JobTestState
+from dbx_tester.retry import RetryPolicy, RunRetrier
+from dbx_tester.utils import databricks_api
+from dbx_tester.utils.fake_backend import FakeApiError
+
+
+def test_job_graph_runs_end_to_end(backend):
+    config = JobConfigManager()
+    extract = Job(job_id=backend.add_job("extract"), config=config)
+    load = Job(job_id=backend.add_job("load"), config=config, depends_on=[extract])
+    test = JobTest.__new__(JobTest)
+    test.job, test.dep_graph = load, JobTestGraph()
+    test._build_dep_graph()
+
+    manager = JobTestProcessManager(JobTestProcess(test_graph=test.dep_graph))
+    assert manager.run(poll_interval=0.005, timeout=5) == JobTestState.SUCCESS
+    assert backend.calls["jobs.run_now"] == 2
+
+
+def test_workspace_and_repair_flow(backend, tmp_path):
+    builder = databricks_api.notebook_builder("nb")
+    builder.add_cell("print(1)")
+    builder.save_notebook((tmp_path / "nb").as_posix())
+    assert databricks_api.is_notebook((tmp_path / "nb").as_posix())
+    assert not databricks_api.is_notebook((tmp_path / "missing").as_posix())
+
+    backend.failures["main"] = 1
+    submission = databricks_api.submit_run("flaky")
+    submission.add_task("setup", "/setup")
+    submission.add_task("main", "/main", depend_on=["setup"])
+    run = submission.run()
+
+    retrier = RunRetrier(RetryPolicy(max_attempts=2, backoff_seconds=0), poll_interval=0.005)
+    assert retrier.watch([run.run_id]) == {run.run_id: "SUCCESS"}
+    assert retrier.flaky == {run.run_id: ["main"]}
+
+
+def test_jobs_api_rejects_invalid_task_keys(backend):
+    submission = databricks_api.submit_run("invalid")
+    submission.add_task("main", "/main", depend_on=["setup"])
+    with pytest.raises(FakeApiError, match="unknown tasks"):
+        submission.run()
+
+    submission.add_task("setup", "/setup")
+    submission.add_task("main", "/main")
+    with pytest.raises(FakeApiError, match="unique"):
+        submission.run()
@@ -1,7 +1,14 @@
-from dbx_tester.global_config import GlobalConfigManager
+from dbx_tester.global_config import GlobalConfigManager, GlobalConfig
 
 def test_global_config_manager():
     pass
 
+def test_global_config_snapshot_roundtrip():
+    config = GlobalConfig(TEST_PATH="/Workspace/tests", CLUSTER_ID="0101-abc")
+    snapshot = config.to_snapshot()
+    assert " " not in snapshot
+    assert GlobalConfig.from_snapshot(snapshot) == config
+
 if __name__ == '__main__':
-    test_global_config_manager()
\ No newline at end of file
+    test_global_config_manager()
+    test_global_config_snapshot_roundtrip()
@@ -0,0 +1,143 @@
+import itertools
+
+import dbx_tester.jobs as jobs_module
+from dbx_tester.config_manager import JobConfigManager
+from dbx_tester.jobs import Job, JobTestGraph, JobTestProcess, JobTestProcessManager, JobTestState
+from dbx_tester.utils.admission import configure_admission
+
+
+class FakeRunner:
+    """JobRunner stand-in whose runs finish after a fixed number of polls."""
+    clock = 0
+    durations = {}
+    failing = set()
+    started = {}
+    _ids = itertools.count(1)
+
+    def __init__(self, job_id, params={}, run_id=None):
+        self.job_id = job_id
+        self.params = params
+        self.run_id = run_id
+
+    def run(self):
+        self.run_id = next(self._ids)
+        self.started[self.run_id] = FakeRunner.clock
+        return self.run_id
+
+    def get_run_status(self):
+        if FakeRunner.clock - self.started[self.run_id] < self.durations[self.job_id]:
+            return "RUNNING", None
+        return "TERMINATED", "FAILED" if self.job_id in self.failing else "SUCCESS"
+
+    def cancel_run(self):
+        pass
+
+
+def _graph(monkeypatch):
+    monkeypatch.setattr(jobs_module, "JobRunner", FakeRunner)
+    monkeypatch.setattr(jobs_module, "is_job", lambda **kwargs: True)
+    monkeypatch.setattr(jobs_module, "get_job_id", lambda **kwargs: kwargs["job_id"])
+    config = JobConfigManager()
+    a = Job(job_id=1, config=config)
+    b = Job(job_id=2, config=config)
+    c = Job(job_id=3, config=config, depends_on=[a])
+    d = Job(job_id=4, config=config, depends_on=[b, c])
+    test = jobs_module.JobTest.__new__(jobs_module.JobTest)
+    test.job, test.dep_graph = d, JobTestGraph()
+    test._build_dep_graph()
+    return test.dep_graph
+
+
+def _run(graph, **kwargs):
+    FakeRunner.clock = 0
+    manager = JobTestProcessManager(JobTestProcess(test_graph=graph), **kwargs)
+    manager.init()
+    while manager.state() == JobTestState.RUNNING:
+        FakeRunner.clock += 1
+        manager.monitor()
+    return manager
+
+
+def test_scheduler_follows_critical_path(monkeypatch):
+    graph = _graph(monkeypatch)
+    FakeRunner.durations = {1: 2, 2: 5, 3: 2, 4: 1}
+    FakeRunner.failing = set()
+    manager = _run(graph)
+    assert manager.state() == JobTestState.SUCCESS
+    assert FakeRunner.clock == 6
+
+    assert _run(graph, max_concurrency=1).state() == JobTestState.SUCCESS
+    assert FakeRunner.clock == 10
+
+
+def test_scheduler_skips_only_failed_subtree(monkeypatch):
+    graph = _graph(monkeypatch)
+    FakeRunner.durations = {1: 2, 2: 5, 3: 2, 4: 1}
+    FakeRunner.failing = {1}
+    manager = _run(graph)
+    states = {graph.job_index[i].job_id: state for i, state in manager.processes.logs.items()}
+    assert states == {
+        1: JobTestState.FAILED,
+        2: JobTestState.SUCCESS,
+        3: JobTestState.SKIPPED,
+        4: JobTestState.SKIPPED,
+    }
+    assert manager.state() == JobTestState.FAILED
+
+
+def test_run_state_table_tracks_changes_and_counts():
+    table = jobs_module.RunStateTable(3)
+    assert table.summary()[JobTestState.PENDING] == 3
+
+    assert table.set(0, JobTestState.RUNNING)
+    assert not table.set(0, JobTestState.RUNNING)
+    assert table.set(1, JobTestState.SUCCESS)
+    assert table.drain_dirty() == [0, 1]
+    assert table.drain_dirty() == []
+
+    summary = table.summary()
+    assert summary[JobTestState.PENDING] == 1
+    assert summary[JobTestState.RUNNING] == 1
+    assert summary[JobTestState.SUCCESS] == 1
+
+
+def test_registry_shares_runs_between_tests(monkeypatch):
+    graph = _graph(monkeypatch)
+    FakeRunner.durations = {1: 2, 2: 5, 3: 2, 4: 1}
+    FakeRunner.failing = set()
+    registry = jobs_module.JobRunRegistry(reuse_minutes=10)
+
+    first = JobTestProcessManager(JobTestProcess(test_graph=graph), registry=registry)
+    second = JobTestProcessManager(JobTestProcess(test_graph=graph), registry=registry)
+    FakeRunner.clock = 0
+    first.init()
+    second.init()
+    assert registry.stats == {"launched": 2, "attached": 2, "reused": 0}
+
+    while first.state() == JobTestState.RUNNING or second.state() == JobTestState.RUNNING:
+        FakeRunner.clock += 1
+        first.monitor()
+        second.monitor()
+    assert first.state() == second.state() == JobTestState.SUCCESS
+    assert registry.stats == {"launched": 4, "attached": 4, "reused": 0}
+
+    assert _run(graph, registry=registry).state() == JobTestState.SUCCESS
+    assert registry.stats["reused"] == 4
+
+
+def test_registry_does_not_reuse_canceled_runs(monkeypatch):
+    graph = _graph(monkeypatch)
+    FakeRunner.durations = {1: 2, 2: 5, 3: 2, 4: 1}
+    FakeRunner.failing = set()
+    registry = jobs_module.JobRunRegistry(reuse_minutes=10)
+
+    manager = JobTestProcessManager(JobTestProcess(test_graph=graph), registry=registry)
+    manager.init()
+    controller = configure_admission()
+    for runner in manager.processes.runs.values():
+        controller.track_run(runner.run_id)
+    manager.stop()
+    assert manager.state() == JobTestState.CANCELED
+    assert controller._active_runs == set()
+    assert _run(graph, registry=registry).state() == JobTestState.SUCCESS
+    assert registry.stats == {"launched": 6, "attached": 0, "reused": 0}
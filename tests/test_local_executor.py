@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from dbx_tester.config_manager import TASK_VALUES_PARAM
+from dbx_tester.global_config import GlobalConfig, GlobalConfigManager
+from dbx_tester.local_executor import LocalExecutor, read_cells
+from dbx_tester.notebook import NotebookGraph, NotebookNode
+from dbx_tester.utils.backend import set_backend
+from dbx_tester.utils.databricks_api import notebook_builder
+from dbx_tester.utils.fake_backend import FakeBackend
+
+LIB = """# Databricks notebook source
+VALUE = 2
+
+# COMMAND ----------
+
+# MAGIC %run ./helpers
+"""
+
+TEST_NOTEBOOK = """# Databricks notebook source
+from dbx_tester.notebook import Notebook, NotebookTest
+
+# COMMAND ----------
+
+@NotebookTest(notebook=Notebook("src/lib", task_name="lib"))
+def test_double():
+    assert double(VALUE) == 4
+    print("doubled")
+"""
+
+
+@pytest.fixture
+def executor(tmp_path):
+    (tmp_path / "repo" / "src").mkdir(parents=True)
+    (tmp_path / "repo" / "src" / "lib.py").write_text(LIB)
+    (tmp_path / "repo" / "src" / "helpers.py").write_text("def double(x):\n    return x * 2\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_lib.py").write_text(TEST_NOTEBOOK)
+
+    config = GlobalConfigManager()
+    config._config = GlobalConfig(TEST_PATH="/Workspace/tests", REPO_PATH="/Workspace/repo")
+    previous = set_backend(FakeBackend(local_files=False))
+    with LocalExecutor(str(tmp_path / "repo"), str(tmp_path / "tests"), global_config=config, max_workers=2) as executor:
+        yield executor
+    set_backend(previous)
+
+
+def _notebook(*cells):
+    notebook = notebook_builder("nb")
+    for cell in cells:
+        notebook.add_cell(cell)
+    return notebook
+
+
+def test_read_cells_unwraps_magic_commands(tmp_path):
+    path = tmp_path / "lib.py"
+    path.write_text(LIB)
+    assert read_cells(path) == ["VALUE = 2", "%run ./helpers"]
+
+
+def test_graph_runs_in_dependency_order(executor):
+    graph = NotebookGraph(
+        nodes={
+            "values": NotebookNode("values", None, type="task", params={TASK_VALUES_PARAM: json.dumps({"rows": "3"})}),
+            "main": NotebookNode("main", _notebook(
+                "%run /Workspace/repo/src/lib",
+                "assert double(VALUE) == 4\n"
+                "assert dbutils.jobs.taskValues.get('values', 'rows') == '3'\n"
+                "dbutils.jobs.taskValues.set('env', dbutils.widgets.get('env'))"
+            )),
+            "broken": NotebookNode("broken", _notebook("raise ValueError('boom')")),
+            "after": NotebookNode("after", _notebook("pass")),
+        },
+        edges={"values": [], "main": ["values"], "broken": [], "after": ["broken"]},
+    )
+    results = executor.run(graph, parameters={"env": "dev"})
+
+    assert {task: result.status for task, result in results.items()} == {
+        "values": "SUCCESS", "main": "SUCCESS", "broken": "FAILED", "after": "UPSTREAM_FAILED"
+    }
+    assert results["main"].task_values == {"env": "dev"}
+    assert "ValueError: boom" in results["broken"].error
+
+
+def test_collected_test_runs_locally(executor):
+    tests = executor.collect_tests("/Workspace/tests/test_lib")
+    assert [test.fn.__name__ for test in tests] == ["test_double"]
+
+    results = executor.run_test(tests[0])
+    assert results["lib"].status == "SUCCESS"
+    assert results["lib"].output == "doubled\n"
@@ -0,0 +1,54 @@
+from pathlib import PurePosixPath
+
+from dbx_tester.notebook import MAX_TASKS_PER_RUN, NotebookTest, NotebookTestRunner, _matrix_chunks, _pack_submissions
+
+
+def test_parameter_matrix_expands_every_combination():
+    test = NotebookTest(parametrize={"env": ["dev", "prd"], "rows": [1, 10, 100]})
+    matrix = test.parameter_matrix
+    assert len(matrix) == 6
+    assert matrix[0] == {"env": "dev", "rows": "1"}
+    assert matrix[-1] == {"env": "prd", "rows": "100"}
+
+
+def test_matrix_chunks_leave_room_for_shared_tasks():
+    matrix = [{"i": str(i)} for i in range(250)]
+    chunks = _matrix_chunks(matrix, shared_tasks=2)
+    assert [len(chunk) for chunk in chunks] == [98, 98, 54]
+    assert all(len(chunk) + 2 <= MAX_TASKS_PER_RUN for chunk in chunks)
+
+
+def test_setup_ids_share_session_scope_across_modules():
+    cache = PurePosixPath("/Workspace/tests/_test_cache")
+    test_a = cache / "module_a" / "test_type=notebook" / "test_one" / "main"
+    test_b = cache / "module_b" / "test_type=notebook" / "test_two" / "main"
+    session = {"scope": "session", "key": "abc"}
+    module = {"scope": "module", "key": "abc"}
+    assert NotebookTestRunner._setup_id(test_a, session) == NotebookTestRunner._setup_id(test_b, session)
+    assert NotebookTestRunner._setup_id(test_a, module) != NotebookTestRunner._setup_id(test_b, module)
+
+
+def _task(task_key, depend_on=None):
+    return {"task_key": task_key, "notebook_path": f"/cache/{task_key}", "depend_on": depend_on}
+
+
+def _task_keys(submission):
+    return [task.task_key for task in submission.tasks]
+
+
+def test_pack_submissions_shares_upstream_between_tests(backend):
+    setup = {"setup": _task("setup")}
+    plans = [(setup, [_task("test_a", ["setup"])]), (setup, [_task("test_b", ["setup"])]), ({}, [_task("test_c")])]
+    submissions = _pack_submissions("tests", plans, None, {}, {})
+    assert len(submissions) == 1
+    assert _task_keys(submissions[0]) == ["setup", "test_a", "test_b", "test_c"]
+    submissions[0].run()
+
+
+def test_pack_submissions_never_repeats_a_task_key(backend):
+    other_setup = {**_task("setup"), "notebook_path": "/cache/other_setup"}
+    plans = [({"setup": _task("setup")}, [_task("test_a")]), ({"setup": other_setup}, [_task("test_b")]), ({}, [_task("test_b")])]
+    submissions = _pack_submissions("tests", plans, None, {}, {})
+    assert [_task_keys(submission) for submission in submissions] == [["setup", "test_a"], ["setup", "test_b"], ["test_b"]]
+    for submission in submissions:
+        submission.run()
@@ -0,0 +1,75 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import dbx_tester.notebook as notebook_module
+from dbx_tester.notebook import NotebookTest, NotebookTestRunner
+from dbx_tester.outcome import NotebookTestOutcome, record_metric, run_test_function
+from dbx_tester.reporting import JsonLinesReporter, Reporter
+from dbx_tester.retry import RunRetrier
+from dbx_tester.utils.backend import get_backend
+
+
+def test_outcome_round_trips_through_error_message():
+    def body():
+        record_metric("rows", 3)
+        raise AssertionError("expected 2 rows")
+
+    outcome = run_test_function(body)
+    assert (outcome.status, outcome.message, outcome.metrics) == ("FAILED", "expected 2 rows", {"rows": 3})
+    parsed = NotebookTestOutcome.from_text(f"NotebookTestFailed: {outcome.to_json()}")
+    assert parsed.to_dict() == outcome.to_dict()
+
+
+def test_runner_reports_outcomes(test_path, tmp_path):
+    backend = get_backend()
+    backend.failures["test_beta_target"] = 1
+    backend.outputs["test_beta_target"] = NotebookTestOutcome("FAILED", message="expected 2 rows").to_json()
+    backend.outputs["test_gamma_target"] = NotebookTestOutcome("SUCCESS", metrics={"rows": 5}).to_json()
+    report, results = tmp_path / "report.xml", tmp_path / "results.jsonl"
+
+    runner = NotebookTestRunner(
+        test_path, junit_path=report.as_posix(),
+        reporters=[JsonLinesReporter(results.as_posix())]
+    )
+    runner.run()
+
+    outcomes = [json.loads(line) for line in results.read_text().splitlines()]
+    statuses = {outcome["test_id"]: (outcome["status"], outcome["message"]) for outcome in outcomes}
+    assert statuses == {
+        "test_orders::test_alpha": ("SUCCESS", None),
+        "test_orders::test_beta": ("FAILED", "expected 2 rows"),
+        "test_users::test_gamma": ("SUCCESS", None),
+    }
+    suite = ET.parse(report).getroot().find("testsuite")
+    assert int(suite.get("failures")) == 1
+    assert suite.find("testcase/failure").get("message") == "expected 2 rows"
+    assert suite.find("testcase/properties/property[@name='rows']").get("value") == "5"
+
+
+
+def test_runner_finishes_reporters_when_watching_fails(test_path, monkeypatch):
+    class Finished(Reporter):
+        finished = False
+
+        def finish(self):
+            self.finished = True
+
+    def interrupted(self, run_ids, timeout=None, on_result=None):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(RunRetrier, "watch", interrupted)
+    reporter = Finished()
+    with pytest.raises(KeyboardInterrupt):
+        NotebookTestRunner(test_path, reporters=[reporter]).run()
+    assert reporter.finished
+
+
+def test_passing_test_exits_with_its_outcome(monkeypatch):
+    exits = []
+    monkeypatch.setattr(notebook_module, "exit_notebook", exits.append)
+    test = NotebookTest.__new__(NotebookTest)
+    test.fn, test.is_test = lambda: None, False
+    test._run_test_execution()
+    assert NotebookTestOutcome.from_text(exits[0]).passed
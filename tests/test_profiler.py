@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from dbx_tester.utils.profiler import ApiProfiler
+
+
+class ThrottledError(Exception):
+    error_code = "TOO_MANY_REQUESTS"
+
+
+class FakeJobs:
+    def __init__(self):
+        self.throttle = 1
+
+    def get_run(self, run_id):
+        if self.throttle:
+            self.throttle -= 1
+            raise ThrottledError("429")
+        return {"run_id": run_id, "state": "TERMINATED"}
+
+    def list(self):
+        return iter(range(3))
+
+
+def test_profiler_counts_calls_throttles_and_retries():
+    profiler = ApiProfiler(enabled=True)
+    client = profiler.wrap(SimpleNamespace(jobs=FakeJobs()))
+
+    try:
+        client.jobs.get_run(run_id=1)
+    except ThrottledError:
+        pass
+    client.jobs.get_run(run_id=1)
+    assert list(client.jobs.list()) == [0, 1, 2]
+    listing = client.jobs.list()
+    assert next(listing) == 0
+
+    stats = {row["endpoint"]: row for row in profiler.summary()}
+    assert stats["jobs.get_run"]["calls"] == 2
+    assert stats["jobs.get_run"]["throttled"] == 1
+    assert stats["jobs.get_run"]["retries"] == 1
+    assert stats["jobs.get_run"]["response_bytes"] > 0
+    assert stats["jobs.list"]["calls"] == 2
+    assert stats["jobs.list"]["response_bytes"] == 4  # "0", "1", "2", then "0" of the broken off listing
+    assert "jobs.get_run" in profiler.format_summary()
+
+
+def test_disabled_profiler_returns_client_unchanged():
+    client = SimpleNamespace(jobs=FakeJobs())
+    assert ApiProfiler(enabled=False).wrap(client) is client
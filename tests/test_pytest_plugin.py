@@ -0,0 +1,20 @@
+from dbx_tester.outcome import NotebookTestOutcome
+from dbx_tester.utils.backend import get_backend
+
+pytest_plugins = ["pytester"]
+
+
+def test_cached_tests_run_as_items(test_path, pytester):
+    get_backend().failures["test_beta_target"] = 1
+    get_backend().outputs["test_beta_target"] = NotebookTestOutcome("FAILED", message="expected 2 rows").to_json()
+    result = pytester.runpytest_inprocess(
+        "-p", "dbx_tester.pytest_plugin", f"--dbx-test-path={test_path}", "--dbx-poll-interval", "0.01",
+        "-k", "orders", "--junitxml", "report.xml"
+    )
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines([
+        "collected 3 items / 1 deselected / 2 selected",
+        "Run * FAILED",
+        "FAILED test_orders::test_beta - test_beta_target_task FAILED: expected 2 rows",
+    ])
+    assert 'name="run_id"' in (pytester.path / "report.xml").read_text()
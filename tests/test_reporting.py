@@ -0,0 +1,28 @@
+import xml.etree.ElementTree as ET
+
+from dbx_tester.outcome import NotebookTestOutcome
+from dbx_tester.reporting import JUnitXmlReporter, ProgressReporter
+
+
+def test_junit_report_is_valid_after_every_test(tmp_path):
+    path = tmp_path / "report.xml"
+    reporter = JUnitXmlReporter(path.as_posix())
+    reporter.start(["nb::test_a", "nb::test_b"])
+    assert ET.parse(path).getroot().find("testsuite").get("tests") == "00000000"
+
+    reporter.test_finished(NotebookTestOutcome("SUCCESS", duration_seconds=1.5, test_id="nb::test_a", task_key="test_a_task"))
+    reporter.test_finished(NotebookTestOutcome("FAILED", message="boom", test_id="nb::test_b", task_key="test_b_task__p1"))
+    suite = ET.parse(path).getroot().find("testsuite")
+    assert (int(suite.get("tests")), int(suite.get("failures")), float(suite.get("time"))) == (2, 1, 1.5)
+    assert [case.get("name") for case in suite] == ["test_a", "test_b[test_b_task__p1]"]
+    reporter.finish()
+
+
+def test_progress_eta_scales_history_by_observed_pace():
+    reporter = ProgressReporter({"nb::slow": 30.0, "nb::fast": 10.0}, interval=float("inf"))
+    reporter.start(["nb::fast", "nb::slow", "nb::unknown"])
+    reporter._started = 100.0
+    reporter.test_finished(NotebookTestOutcome("SUCCESS", test_id="nb::fast"))
+    # 10s of history took 5s, the remaining 30s + 20s (median) should take 25s
+    assert reporter.eta(now=105.0) == 25.0
+    assert "[1/3] 1 passed, 0 not passed | 12.0 tests/min | ETA 0m25s" == reporter.line(now=105.0)
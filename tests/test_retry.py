@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import dbx_tester.retry as retry_module
+from dbx_tester.retry import RetryPolicy, RunRetrier, retry_on_message
+
+
+def _state(life_cycle_state, result_state=None, message=""):
+    return SimpleNamespace(life_cycle_state=life_cycle_state, result_state=result_state, state_message=message)
+
+
+def _task(task_key, result_state, attempt_number=0, message=""):
+    return SimpleNamespace(task_key=task_key, attempt_number=attempt_number, state=_state("TERMINATED", result_state, message))
+
+
+class FakeWorkspace:
+    """Run whose "main" task fails until it has been repaired `fail_times` times."""
+
+    def __init__(self, fail_times, message="cluster terminated"):
+        self.fail_times = fail_times
+        self.message = message
+        self.repairs = []
+
+    def get_run(self, run_id):
+        attempt = len(self.repairs)
+        main = "SUCCESS" if attempt >= self.fail_times else "FAILED"
+        return SimpleNamespace(
+            state=_state("TERMINATED", main),
+            tasks=[
+                _task("task_values", "SUCCESS"),
+                _task("main", "FAILED", 0, self.message),
+                *([_task("main", main, attempt, self.message)] if attempt else []),
+            ],
+            repair_history=[SimpleNamespace(id=i + 1, state=_state("TERMINATED", main)) for i in range(attempt)],
+        )
+
+    def repair_run(self, run_id, rerun_tasks, latest_repair_id=None):
+        assert latest_repair_id == (len(self.repairs) or None)
+        self.repairs.append(rerun_tasks)
+        return len(self.repairs)
+
+
+def _watch(monkeypatch, workspace, policy):
+    monkeypatch.setattr(retry_module, "get_run", workspace.get_run)
+    monkeypatch.setattr(retry_module, "repair_run", workspace.repair_run)
+    retrier = RunRetrier(policy, poll_interval=0)
+    return retrier, retrier.watch([1])
+
+
+def test_repairs_only_failed_tasks_and_records_flaky(monkeypatch):
+    workspace = FakeWorkspace(fail_times=2)
+    retrier, results = _watch(monkeypatch, workspace, RetryPolicy(max_attempts=3, backoff_seconds=0))
+    assert results == {1: "SUCCESS"}
+    assert workspace.repairs == [["main"], ["main"]]
+    assert retrier.flaky == {1: ["main"]}
+
+
+def test_gives_up_after_max_attempts_or_unmatched_predicate(monkeypatch):
+    workspace = FakeWorkspace(fail_times=5)
+    _, results = _watch(monkeypatch, workspace, RetryPolicy(max_attempts=2, backoff_seconds=0))
+    assert results == {1: "FAILED"}
+    assert len(workspace.repairs) == 1
+
+    workspace = FakeWorkspace(fail_times=1, message="AssertionError")
+    policy = RetryPolicy(backoff_seconds=0, retry_on=retry_on_message("cluster"))
+    _, results = _watch(monkeypatch, workspace, policy)
+    assert results == {1: "FAILED"}
+    assert workspace.repairs == []
+
+
+def test_run_without_failed_tasks_passes_only_on_success(monkeypatch):
+    run = SimpleNamespace(
+        state=_state("TERMINATED", "TIMEDOUT"),
+        tasks=[_task("task_values", "SUCCESS"), _task("main", "CANCELED")],
+        repair_history=[]
+    )
+    monkeypatch.setattr(retry_module, "get_run", lambda run_id: run)
+    assert RunRetrier(RetryPolicy(max_attempts=1), poll_interval=0).watch([1]) == {1: "FAILED"}
@@ -0,0 +1,64 @@
+from dbx_tester.scanner import StaticNotebook, NotebookScanner, Unresolved, scan_source
+from dbx_tester.utils.backend import set_backend
+from dbx_tester.utils.fake_backend import FakeBackend
+
+SOURCE = '''# Databricks notebook source
+from dbx_tester.notebook import Notebook, NotebookTest as NT
+from dbx_tester.jobs import Job, JobTest
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # Orders
+
+# COMMAND ----------
+
+upstream = Notebook("src/setup", task_name="setup", scope="module")
+
+@NT(notebook=Notebook("src/orders", depends_on=[upstream]), parametrize={"region": ["eu", "us"]})
+def test_orders():
+    pass
+
+# COMMAND ----------
+
+def test_load():
+    pass
+
+load = JobTest(test_load, job=Job(name="load", depends_on=[Job(job_id=7)]))
+test_dynamic = NT(notebook=Notebook(f"src/{name}"))(dynamic)
+'''
+
+
+def test_scan_source_resolves_arguments():
+    tests = {test.name: test for test in scan_source(SOURCE, "folder/test_orders")}
+    assert sorted(tests) == ["dynamic", "test_load", "test_orders"]
+
+    orders = tests["test_orders"]
+    assert (orders.test_id, orders.kind, orders.cell, orders.unresolved) == ("folder/test_orders::test_orders", "notebook", 2, [])
+    assert orders.notebook == StaticNotebook(
+        "src/orders", depends_on=[StaticNotebook("src/setup", task_name="setup", scope="module")]
+    )
+    assert orders.parametrize == {"region": ["eu", "us"]}
+
+    load = tests["test_load"]
+    assert (load.kind, load.job.name, load.job.depends_on[0].job_id) == ("job", "load", 7)
+
+    dynamic = tests["dynamic"]
+    assert isinstance(dynamic.notebook.notebook_path, Unresolved)
+    assert dynamic.unresolved == ["f'src/{name}'"]
+
+
+def test_scanner_reports_broken_notebooks(tmp_path):
+    backend = FakeBackend()
+    previous = set_backend(backend)
+    try:
+        backend.add_notebook((tmp_path / "test_orders").as_posix(), SOURCE.encode())
+        backend.add_notebook((tmp_path / "test_broken").as_posix(), b"def broken(:\n")
+        backend.add_notebook((tmp_path / "_test_cache" / "test_orders" / "cached").as_posix(), SOURCE.encode())
+        scanner = NotebookScanner(tmp_path.as_posix())
+        tests = scanner.scan()
+    finally:
+        set_backend(previous)
+
+    assert {test.notebook_id for test in tests} == {"test_orders"}
+    assert list(scanner.errors) == ["test_broken"]
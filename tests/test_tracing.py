@@ -0,0 +1,32 @@
+import json
+
+from dbx_tester.utils.tracing import Tracer, _NOOP_SPAN
+
+def test_disabled_tracer_returns_shared_noop_span():
+    tracer = Tracer(enabled=False)
+    with tracer.span("phase", test="a") as span:
+        span.set(run_id=1)
+    assert span is _NOOP_SPAN
+    assert tracer.spans == []
+
+def test_spans_nest_and_export(tmp_path):
+    from dbx_tester.db.init import configure_connection_manager, init
+
+    tracer = Tracer(enabled=True)
+    with tracer.span("runner.run") as outer:
+        with tracer.span("api.submit", run_name="t") as inner:
+            inner.set(run_id=42)
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id is None
+
+    trace = json.loads(json.dumps(tracer.to_chrome_trace()))
+    events = {event["name"]: event for event in trace["traceEvents"]}
+    assert events["api.submit"]["args"]["run_id"] == 42
+    assert events["runner.run"]["dur"] >= events["api.submit"]["dur"]
+
+    manager = configure_connection_manager(db_path=tmp_path / "test.db")
+    init()
+    assert tracer.export_sqlite() == 2
+    rows = manager.connection().execute("SELECT name, parent_id FROM trace_spans ORDER BY span_id").fetchall()
+    assert rows == [("runner.run", None), ("api.submit", outer.span_id)]
+    manager.close()